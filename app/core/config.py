@@ -11,7 +11,64 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 
 SUPER_ADMIN_PASSWORD = os.getenv("SUPER_ADMIN_PASSWORD", "root") 
 
-DB_PATH = BASE_DIR / "saas.db"
+DB_PATH = Path(os.getenv("DB_PATH", BASE_DIR / "saas.db"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Исходящие сообщения: общий лимит бота и лимит на один чат (сообщений в секунду)
+OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "25"))
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = int(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_CONCURRENCY = int(os.getenv("OUTBOUND_CONCURRENCY", "8"))
+
+# FSM: размер кэша, период сброса в БД (сек) и срок жизни незавершенного диалога (часы)
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "5000"))
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "1"))
+FSM_STATE_TTL_HOURS = float(os.getenv("FSM_STATE_TTL_HOURS", "24"))
+
+# Отметки чек-листа: период сброса из памяти в БД (сек)
+DUTY_FLUSH_INTERVAL = float(os.getenv("DUTY_FLUSH_INTERVAL", "2"))
+
+# Режим получения апдейтов: polling или webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+
+# Метрики хендлеров: Prometheus-текст на http://METRICS_HOST:METRICS_PORT/metrics (порт 0 — выключено)
+# и сводка в лог раз в METRICS_LOG_INTERVAL секунд (0 — выключено)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "300"))
+
+# Журнал медленных запросов: порог в мс (0 — выключено), файл и ротация
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", str(BASE_DIR / "slow_queries.log"))
+SLOW_QUERY_LOG_MB = float(os.getenv("SLOW_QUERY_LOG_MB", "10"))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+
+# Свой адрес Bot API (локальный сервер или тестовый стенд tools/fake_telegram.py)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# Шардирование по кофейням: SHARDS воркеров (python -m app.main с SHARD_ID=0..SHARDS-1),
+# каждый со своей базой SHARD_DIR/shard<id>.db, и роутер (python -m app.router) перед ними.
+# SHARDS=1 — обычный режим одним процессом.
+SHARDS = max(1, int(os.getenv("SHARDS", "1")))
+SHARD_ID = int(os.getenv("SHARD_ID", "0"))
+SHARD_DIR = Path(os.getenv("SHARD_DIR", BASE_DIR / "shards"))
+SHARD_HOST = os.getenv("SHARD_HOST", "127.0.0.1")
+SHARD_BASE_PORT = int(os.getenv("SHARD_BASE_PORT", "8200"))
+SHARD_SECRET = os.getenv("SHARD_SECRET", "")
+SHARD_RPC_TIMEOUT = float(os.getenv("SHARD_RPC_TIMEOUT", "10"))
+
+if SHARDS > 1:
+    DB_PATH = SHARD_DIR / f"shard{SHARD_ID}.db"
+    # Лимит Telegram общий на бота — делим его между воркерами; метрики у каждого на своем порту
+    OUTBOUND_RATE = OUTBOUND_RATE / SHARDS
+    if METRICS_PORT:
+        METRICS_PORT += SHARD_ID
 
 WEB_APP_URL = "https://akku-2325.github.io/coffee-frontend/frontend/?update=1"
 TZ = pytz.timezone("Asia/Almaty")
\ No newline at end of file
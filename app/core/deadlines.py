@@ -0,0 +1,98 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from app.core.config import TZ
+
+logger = logging.getLogger(__name__)
+
+DATE_FMT = "%Y-%m-%d %H:%M:%S"
+# Если обработка сроков упала (например, БД занята), пачка ставится заново через столько секунд
+RETRY_DELAY = 15
+
+_heap: List[Tuple[datetime, int]] = []
+_scheduled: Dict[int, datetime] = {}
+_wakeup = asyncio.Event()
+_worker: Optional[asyncio.Task] = None
+
+def _now() -> datetime:
+    return datetime.now(TZ).replace(tzinfo=None)
+
+def schedule(task_id: int, deadline: str):
+    """Ставит (или переносит) срок задачи. deadline — строка в формате БД, в часовом поясе TZ."""
+    try:
+        deadline_dt = datetime.strptime(deadline, DATE_FMT)
+    except (TypeError, ValueError):
+        return
+
+    wake = not _heap or deadline_dt < _heap[0][0]
+    _scheduled[task_id] = deadline_dt
+    heapq.heappush(_heap, (deadline_dt, task_id))
+    if wake:
+        _wakeup.set()
+
+def unschedule(task_id: int):
+    # Запись в куче остается и отбрасывается при извлечении
+    _scheduled.pop(task_id, None)
+
+def load(tasks: Iterable[Tuple[int, str]]):
+    for task_id, deadline in tasks:
+        schedule(task_id, deadline)
+    logger.info(f"Дедлайны: загружено задач {len(_scheduled)}")
+
+def pending_count() -> int:
+    return len(_scheduled)
+
+def _pop_due(now: datetime) -> List[int]:
+    due = []
+    while _heap and _heap[0][0] <= now:
+        deadline_dt, task_id = heapq.heappop(_heap)
+        if _scheduled.get(task_id) == deadline_dt:
+            del _scheduled[task_id]
+            due.append(task_id)
+    return due
+
+def _retry(task_ids: List[int]):
+    retry_at = _now() + timedelta(seconds=RETRY_DELAY)
+    for task_id in task_ids:
+        # Задачу могли перенести, пока шла обработка, — новый срок важнее
+        if task_id not in _scheduled:
+            _scheduled[task_id] = retry_at
+            heapq.heappush(_heap, (retry_at, task_id))
+
+async def _run(on_due: Callable[[List[int]], Awaitable[None]]):
+    while True:
+        due = _pop_due(_now())
+        if due:
+            try:
+                await on_due(due)
+            except Exception:
+                logger.exception(f"Дедлайны: ошибка обработки {due}, повтор через {RETRY_DELAY} с")
+                _retry(due)
+            continue
+
+        # Убираем из вершины кучи отмененные записи, чтобы не просыпаться ради них
+        while _heap and _scheduled.get(_heap[0][1]) != _heap[0][0]:
+            heapq.heappop(_heap)
+
+        timeout = max((_heap[0][0] - _now()).total_seconds(), 0) if _heap else None
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+def start(on_due: Callable[[List[int]], Awaitable[None]]):
+    """Запускает фоновую задачу, которая вызывает on_due(ids) ровно в момент наступления сроков."""
+    global _worker
+    if _worker is None or _worker.done():
+        _worker = asyncio.create_task(_run(on_due))
+
+async def stop():
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try: await _worker
+        except asyncio.CancelledError: pass
+        _worker = None
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from aiohttp import web
+from app.core.config import METRICS_HOST, METRICS_PORT, METRICS_LOG_INTERVAL
+from app.database.connection import get_pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограммы времени обработки апдейта, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SUMMARY_TOP = 5
+
+class _HandlerStats:
+    __slots__ = ("count", "errors", "seconds", "max_seconds", "db_queries", "db_seconds", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds: float, db_queries: int, db_seconds: float, error: bool):
+        self.count += 1
+        self.errors += error
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.db_queries += db_queries
+        self.db_seconds += db_seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+# (router, handler) -> накопленные значения с запуска и за текущий интервал сводки
+_total: Dict[Tuple[str, str], _HandlerStats] = {}
+_interval: Dict[Tuple[str, str], _HandlerStats] = {}
+_interval_started = time.monotonic()
+
+_runner: Optional[web.AppRunner] = None
+_reporter: Optional[asyncio.Task] = None
+
+def observe(router: str, handler: str, seconds: float, db_queries: int = 0, db_seconds: float = 0.0, error: bool = False):
+    key = (router, handler)
+    for stats in (_total, _interval):
+        entry = stats.get(key)
+        if entry is None:
+            entry = stats[key] = _HandlerStats()
+        entry.add(seconds, db_queries, db_seconds, error)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(key: Tuple[str, str], **extra) -> str:
+    pairs = {"router": key[0], "handler": key[1], **extra}
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items())
+
+def render() -> str:
+    """Метрики в текстовом формате Prometheus."""
+    lines: List[str] = [
+        "# HELP bot_handler_duration_seconds Время обработки апдейта хендлером",
+        "# TYPE bot_handler_duration_seconds histogram",
+    ]
+    for key, s in sorted(_total.items()):
+        for bound, n in zip(BUCKETS, s.buckets):
+            lines.append(f"bot_handler_duration_seconds_bucket{{{_labels(key, le=bound)}}} {n}")
+        lines.append(f'bot_handler_duration_seconds_bucket{{{_labels(key, le="+Inf")}}} {s.count}')
+        lines.append(f"bot_handler_duration_seconds_sum{{{_labels(key)}}} {s.seconds:.6f}")
+        lines.append(f"bot_handler_duration_seconds_count{{{_labels(key)}}} {s.count}")
+
+    for name, kind, help_text, attr in (
+        ("bot_handler_errors_total", "counter", "Апдейты, завершившиеся исключением", "errors"),
+        ("bot_handler_db_queries_total", "counter", "Запросы к БД из хендлера", "db_queries"),
+        ("bot_handler_db_seconds_total", "counter", "Время работы с БД из хендлера", "db_seconds"),
+        ("bot_handler_max_seconds", "gauge", "Самый долгий апдейт с запуска", "max_seconds"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for key, s in sorted(_total.items()):
+            lines.append(f"{name}{{{_labels(key)}}} {getattr(s, attr):g}")
+
+    pool = get_pool_stats()
+    for name, kind, value in (
+        ("bot_db_pool_size", "gauge", pool["size"]),
+        ("bot_db_pool_idle", "gauge", pool["idle"]),
+        ("bot_db_pool_acquired_total", "counter", pool["acquired"]),
+        ("bot_db_pool_waited_total", "counter", pool["waited"]),
+        ("bot_db_pool_wait_max_seconds", "gauge", pool["wait_max_ms"] / 1000),
+        ("bot_db_busy_seconds_total", "counter", pool["busy_total_ms"] / 1000),
+        ("bot_db_queries_total", "counter", pool["queries"]),
+    ):
+        lines += [f"# TYPE {name} {kind}", f"{name} {value:g}"]
+    return "\n".join(lines) + "\n"
+
+def summary() -> str:
+    """Сводка за интервал с прошлого вызова: самые затратные хендлеры по суммарному времени."""
+    global _interval_started
+    stats, elapsed = dict(_interval), time.monotonic() - _interval_started
+    _interval.clear()
+    _interval_started = time.monotonic()
+
+    updates = sum(s.count for s in stats.values())
+    if not updates:
+        return f"Метрики за {elapsed:.0f} с: апдейтов не было"
+    errors = sum(s.errors for s in stats.values())
+    parts = []
+    for (router, handler), s in sorted(stats.items(), key=lambda kv: kv[1].seconds, reverse=True)[:SUMMARY_TOP]:
+        parts.append(
+            f"{router}:{handler} n={s.count} avg={s.seconds / s.count * 1000:.0f}мс max={s.max_seconds * 1000:.0f}мс "
+            f"БД {s.db_queries / s.count:.1f} запр./{s.db_seconds / s.count * 1000:.0f}мс"
+        )
+    return f"Метрики за {elapsed:.0f} с: апдейтов {updates}, ошибок {errors}; дольше всего: " + "; ".join(parts)
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+async def _report_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            logger.info(summary())
+        except Exception as e:
+            logger.warning(f"Метрики: не удалось собрать сводку: {e}")
+
+async def start(host: str = METRICS_HOST, port: int = METRICS_PORT, log_interval: float = METRICS_LOG_INTERVAL):
+    """Поднимает /metrics и периодическую сводку в лог (что включено в конфиге)."""
+    global _runner, _reporter
+    if port and _runner is None:
+        app = web.Application()
+        app.router.add_get("/metrics", _handle_metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            await runner.cleanup()
+            logger.warning(f"Метрики: не удалось занять {host}:{port}: {e}")
+        else:
+            _runner = runner
+            logger.info(f"Метрики: http://{host}:{port}/metrics")
+    if log_interval and (_reporter is None or _reporter.done()):
+        _reporter = asyncio.create_task(_report_loop(log_interval))
+
+async def stop():
+    global _runner, _reporter
+    if _reporter is not None:
+        _reporter.cancel()
+        try: await _reporter
+        except asyncio.CancelledError: pass
+        _reporter = None
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
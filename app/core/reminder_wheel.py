@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import TZ
+
+logger = logging.getLogger(__name__)
+
+DATE_FMT = "%Y-%m-%d %H:%M:%S"
+WHEEL_SIZE = 60
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Слот = минута срабатывания по модулю WHEEL_SIZE. В слоте лежат (fire_at, shift_id, reminder_id);
+# записи с fire_at дальше текущего оборота колеса просто ждут своего круга.
+_slots: List[List[Tuple[datetime, int, int]]] = [[] for _ in range(WHEEL_SIZE)]
+_shifts: Dict[int, Dict] = {}
+_reminders: Dict[int, Dict] = {}
+_reminders_by_scope: Dict[Tuple[int, str], Set[int]] = {}
+_last_minute: Optional[int] = None
+
+def _now() -> datetime:
+    return datetime.now(TZ).replace(tzinfo=None)
+
+def _minute(dt: datetime) -> int:
+    return int((dt - _EPOCH).total_seconds() // 60)
+
+def _next_fire(started_at: datetime, interval: int, after: datetime) -> datetime:
+    """Ближайшая точка started_at + k * interval минут (k >= 1), строго позже after."""
+    step = timedelta(minutes=interval)
+    elapsed = after - started_at
+    k = max(1, int(elapsed / step) + 1) if elapsed >= timedelta(0) else 1
+    return started_at + step * k
+
+def _arm(shift_id: int, reminder_id: int, after: datetime):
+    shift = _shifts[shift_id]
+    reminder = _reminders[reminder_id]
+    fire_at = _next_fire(shift['started_at'], reminder['interval'], after)
+    _slots[_minute(fire_at) % WHEEL_SIZE].append((fire_at, shift_id, reminder_id))
+
+def add_shift(shift_id: int, user_id: int, restaurant_id: int, role: str, started_at: str):
+    try:
+        started_dt = datetime.strptime(started_at, DATE_FMT)
+    except (TypeError, ValueError):
+        return
+    _shifts[shift_id] = {"user_id": user_id, "restaurant_id": restaurant_id, "role": role, "started_at": started_dt}
+    now = _now()
+    for reminder_id in _reminders_by_scope.get((restaurant_id, role), ()):
+        _arm(shift_id, reminder_id, now)
+
+def remove_shift(shift_id: int):
+    # Записи в слотах отбрасываются лениво, когда до них доходит колесо
+    _shifts.pop(shift_id, None)
+
+def remove_user_shifts(user_id: int, restaurant_id: int):
+    for shift_id in [sid for sid, s in _shifts.items() if s['user_id'] == user_id and s['restaurant_id'] == restaurant_id]:
+        remove_shift(shift_id)
+
+def add_reminder(reminder_id: int, restaurant_id: int, role: str, text: str, interval: int):
+    if interval <= 0:
+        return
+    _reminders[reminder_id] = {"restaurant_id": restaurant_id, "role": role, "text": text, "interval": interval}
+    _reminders_by_scope.setdefault((restaurant_id, role), set()).add(reminder_id)
+    now = _now()
+    for shift_id, shift in _shifts.items():
+        if shift['restaurant_id'] == restaurant_id and shift['role'] == role:
+            _arm(shift_id, reminder_id, now)
+
+def remove_reminder(reminder_id: int):
+    reminder = _reminders.pop(reminder_id, None)
+    if reminder:
+        _reminders_by_scope.get((reminder['restaurant_id'], reminder['role']), set()).discard(reminder_id)
+
+def remove_restaurant(restaurant_id: int):
+    for shift_id in [sid for sid, s in _shifts.items() if s['restaurant_id'] == restaurant_id]:
+        remove_shift(shift_id)
+    for reminder_id in [rid for rid, r in _reminders.items() if r['restaurant_id'] == restaurant_id]:
+        remove_reminder(reminder_id)
+
+def load(shifts: Iterable[Dict], reminders: Iterable[Dict]):
+    for r in reminders:
+        add_reminder(r['id'], r['restaurant_id'], r['role'], r['text'], r['interval_hours'])
+    for s in shifts:
+        add_shift(s['id'], s['user_id'], s['restaurant_id'], s['role'], s['started_at'])
+    logger.info(f"Напоминания: смен {len(_shifts)}, правил {len(_reminders)}")
+
+def collect_due(now: Optional[datetime] = None) -> List[Tuple[int, str]]:
+    """Забирает наступившие напоминания и перевзводит их на следующий интервал.
+    Возвращает список (user_id, text). Просматриваются только слоты прошедших минут."""
+    global _last_minute
+    now = now or _now()
+    current = _minute(now)
+    first = current if _last_minute is None else max(_last_minute, current - WHEEL_SIZE + 1)
+    _last_minute = current
+
+    due = []
+    for minute in range(first, current + 1):
+        idx = minute % WHEEL_SIZE
+        slot = _slots[idx]
+        if not slot:
+            continue
+        keep = []
+        fired = []
+        for entry in slot:
+            fire_at, shift_id, reminder_id = entry
+            if shift_id not in _shifts or reminder_id not in _reminders:
+                continue
+            if fire_at > now:
+                keep.append(entry)
+                continue
+            fired.append((shift_id, reminder_id))
+        _slots[idx] = keep
+
+        for shift_id, reminder_id in fired:
+            due.append((_shifts[shift_id]['user_id'], _reminders[reminder_id]['text']))
+            _arm(shift_id, reminder_id, now)
+    return due
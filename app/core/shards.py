@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
+from app.core.config import SHARDS, SHARD_ID, SHARD_HOST, SHARD_BASE_PORT, SHARD_SECRET, SHARD_RPC_TIMEOUT
+
+# Шардирование по кофейням. Кофейня живет в воркере restaurant_id % SHARDS, пользователь
+# без сессии — в «лобби» user_id % SHARDS. Хендлеры об этом не знают: repo-функции, которым
+# может достаться чужая кофейня (вход, приглашения, регистрация, панель платформы), помечены
+# @owned или @gathered и сами уходят в нужный воркер по HTTP (/rpc, только 127.0.0.1 и с секретом).
+# При SHARDS=1 декораторы возвращают функцию как есть.
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Shard-Secret"
+
+class ShardError(RuntimeError):
+    pass
+
+_remote: Dict[str, Callable[..., Awaitable[Any]]] = {}
+_client: Optional[ClientSession] = None
+
+def enabled() -> bool:
+    return SHARDS > 1
+
+def shard_of(restaurant_id: int) -> int:
+    return restaurant_id % SHARDS
+
+def lobby_of(user_id: int) -> int:
+    """Воркер для пользователя без сессии (вход, регистрация, панель платформы)."""
+    return user_id % SHARDS
+
+def worker_url(shard: int) -> str:
+    return f"http://{SHARD_HOST}:{SHARD_BASE_PORT + shard}"
+
+def _name(fn: Callable) -> str:
+    return f"{fn.__module__}.{fn.__qualname__}"
+
+def remote(fn):
+    """Разрешает вызывать функцию из других воркеров (call / others)."""
+    _remote[_name(fn)] = fn
+    return fn
+
+def owned(param: str = "restaurant_id", locate: Optional[Callable[[Dict[str, Any]], Awaitable[Optional[int]]]] = None):
+    """Функция работает с одной кофейней: в чужом воркере вызов уходит воркеру-владельцу.
+    Шард — по аргументу param (id кофейни) или корутиной locate(аргументы); None — выполнить здесь."""
+    def wrap(fn):
+        remote(fn)
+        if not enabled():
+            return fn
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            shard = await locate(arguments) if locate else shard_of(arguments[param])
+            if shard is None or shard == SHARD_ID:
+                return await fn(*args, **kwargs)
+            return await call(shard, fn, *args, **kwargs)
+        return wrapper
+    return wrap
+
+def gathered(merge: Callable[[List[Any]], Any]):
+    """Функция читает (или помечает) данные всех кофеен: вызывается во всех воркерах, merge сливает ответы."""
+    def wrap(fn):
+        remote(fn)
+        if not enabled():
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return merge(await everywhere(fn, *args, **kwargs))
+        return wrapper
+    return wrap
+
+def first(results: List[Any]) -> Any:
+    return next((r for r in results if r), None)
+
+def concat(results: List[List[Any]]) -> List[Any]:
+    return [item for result in results for item in result]
+
+async def call(shard: int, fn: Callable, *args, **kwargs) -> Any:
+    """Выполняет зарегистрированную функцию в воркере shard (в своем — напрямую)."""
+    if shard == SHARD_ID:
+        return await _remote[_name(fn)](*args, **kwargs)
+    global _client
+    if _client is None or _client.closed:
+        _client = ClientSession(timeout=ClientTimeout(total=SHARD_RPC_TIMEOUT))
+    payload = {"fn": _name(fn), "args": list(args), "kwargs": kwargs}
+    try:
+        async with _client.post(f"{worker_url(shard)}/rpc", json=payload, headers={SECRET_HEADER: SHARD_SECRET}) as resp:
+            body = await resp.json()
+            status = resp.status
+    except (ClientError, asyncio.TimeoutError) as e:
+        raise ShardError(f"Шард {shard} недоступен: {e}") from e
+    if status != 200:
+        raise ShardError(f"Шард {shard}: {_name(fn)}: {body.get('error')}")
+    return body["result"]
+
+async def everywhere(fn: Callable, *args, **kwargs) -> List[Any]:
+    return list(await asyncio.gather(*[call(shard, fn, *args, **kwargs) for shard in range(SHARDS)]))
+
+async def others(fn: Callable, *args, **kwargs):
+    """Выполняет функцию во всех воркерах, кроме текущего. Недоступный воркер только логируется."""
+    if not enabled():
+        return
+    results = await asyncio.gather(
+        *[call(shard, fn, *args, **kwargs) for shard in range(SHARDS) if shard != SHARD_ID],
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"{_name(fn)}: {result}")
+
+async def _handle_rpc(request: web.Request) -> web.Response:
+    if not SHARD_SECRET or request.headers.get(SECRET_HEADER) != SHARD_SECRET:
+        return web.json_response({"error": "forbidden"}, status=403)
+    payload = await request.json()
+    fn = _remote.get(payload.get("fn"))
+    if fn is None:
+        return web.json_response({"error": f"неизвестная функция {payload.get('fn')}"}, status=404)
+    try:
+        result = await fn(*payload.get("args", []), **payload.get("kwargs", {}))
+    except Exception as e:
+        logger.exception(f"Шард {SHARD_ID}: ошибка в {payload['fn']}")
+        return web.json_response({"error": f"{type(e).__name__}: {e}"}, status=500)
+    return web.json_response({"result": result})
+
+def setup_rpc(app: web.Application):
+    app.router.add_post("/rpc", _handle_rpc)
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,105 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from app.database.connection import acquire
+
+# Реестр открытых смен в памяти: по (сотрудник, заведение) и по заведению.
+# Загружается из БД один раз (при старте бота или при первом обращении), дальше его ведут
+# repo-функции, которые открывают, закрывают и удаляют смены, — после коммита.
+# Рассчитан на то, что в базу пишет один процесс бота.
+
+_by_user: Dict[Tuple[int, int], Dict] = {}
+_by_restaurant: Dict[int, Dict[int, Dict]] = {}
+_loaded = False
+_lock: Optional[asyncio.Lock] = None
+
+def _get_lock() -> asyncio.Lock:
+    global _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    return _lock
+
+async def load():
+    """Загружает открытые смены из БД. Повторный вызов ничего не делает.
+    Repo-функции вызывают его перед записью, чтобы смена не разминулась с загрузкой."""
+    global _loaded
+    if _loaded:
+        return
+    async with _get_lock():
+        if _loaded:
+            return
+        async with acquire() as db:
+            async with db.execute("""
+                SELECT s.*, u.full_name
+                FROM shifts s
+                LEFT JOIN users u ON s.user_id = u.tg_id AND s.restaurant_id = u.restaurant_id
+                WHERE s.ended_at IS NULL
+                ORDER BY s.id
+            """) as cur:
+                rows = [dict(row) for row in await cur.fetchall()]
+        for shift in rows:
+            _add(shift)
+        _loaded = True
+
+def _add(shift: Dict):
+    key = (shift['user_id'], shift['restaurant_id'])
+    _by_restaurant.setdefault(shift['restaurant_id'], {})[shift['id']] = shift
+    current = _by_user.get(key)
+    # Если открытых смен почему-то несколько, активной считается последняя — как в ORDER BY id DESC
+    if current is None or current['id'] < shift['id']:
+        _by_user[key] = shift
+
+def add(shift: Dict):
+    """Смена открыта (строка shifts + full_name сотрудника)."""
+    if _loaded:
+        _add(dict(shift))
+
+def remove(shift_id: int, restaurant_id: int):
+    shifts = _by_restaurant.get(restaurant_id)
+    shift = shifts.pop(shift_id, None) if shifts else None
+    if shift is None:
+        return
+    if not shifts:
+        del _by_restaurant[restaurant_id]
+    key = (shift['user_id'], restaurant_id)
+    if _by_user.get(key) is shift:
+        rest = [s for s in (shifts or {}).values() if s['user_id'] == shift['user_id']]
+        if rest:
+            _by_user[key] = max(rest, key=lambda s: s['id'])
+        else:
+            del _by_user[key]
+
+def remove_user(user_id: int, restaurant_id: int) -> List[int]:
+    """Убирает открытые смены сотрудника и возвращает их id."""
+    shift_ids = [sid for sid, s in _by_restaurant.get(restaurant_id, {}).items() if s['user_id'] == user_id]
+    for shift_id in shift_ids:
+        remove(shift_id, restaurant_id)
+    return shift_ids
+
+def remove_restaurant(restaurant_id: int) -> List[int]:
+    """Убирает открытые смены заведения и возвращает их id."""
+    shifts = _by_restaurant.pop(restaurant_id, {})
+    for shift in shifts.values():
+        _by_user.pop((shift['user_id'], restaurant_id), None)
+    return list(shifts)
+
+def rename(user_id: int, restaurant_id: int, full_name: str):
+    for shift in _by_restaurant.get(restaurant_id, {}).values():
+        if shift['user_id'] == user_id:
+            shift['full_name'] = full_name
+
+async def get(user_id: int, restaurant_id: int) -> Optional[Dict]:
+    await load()
+    shift = _by_user.get((user_id, restaurant_id))
+    return dict(shift) if shift else None
+
+async def for_restaurant(restaurant_id: int) -> List[Dict]:
+    await load()
+    return [dict(s) for _, s in sorted(_by_restaurant.get(restaurant_id, {}).items())]
+
+async def all_shifts() -> List[Dict]:
+    await load()
+    return [dict(s) for shifts in _by_restaurant.values() for s in shifts.values()]
+
+async def count() -> int:
+    await load()
+    return sum(len(shifts) for shifts in _by_restaurant.values())
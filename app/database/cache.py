@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+MISS = object()
+
+SESSION_CACHE_SIZE = 10000
+SESSION_CACHE_TTL = 300
+
+_sessions: "OrderedDict[int, tuple]" = OrderedDict()
+_sessions_version = 0
+
+def session_version() -> int:
+    return _sessions_version
+
+def get_session(user_id: int):
+    """Возвращает закэшированную сессию (может быть None — сессии нет) или MISS."""
+    entry = _sessions.get(user_id)
+    if entry is None:
+        return MISS
+    expires_at, value = entry
+    if expires_at < time.monotonic():
+        _sessions.pop(user_id, None)
+        return MISS
+    _sessions.move_to_end(user_id)
+    return value
+
+def put_session(user_id: int, value: Optional[Dict[str, Any]], version: int):
+    # Если между чтением из БД и записью в кэш была инвалидация — данные могли устареть
+    if version != _sessions_version:
+        return
+    _sessions[user_id] = (time.monotonic() + SESSION_CACHE_TTL, value)
+    _sessions.move_to_end(user_id)
+    while len(_sessions) > SESSION_CACHE_SIZE:
+        _sessions.popitem(last=False)
+
+def invalidate_session(user_id: int):
+    global _sessions_version
+    _sessions_version += 1
+    _sessions.pop(user_id, None)
+
+def invalidate_restaurant_sessions(restaurant_id: int):
+    global _sessions_version
+    _sessions_version += 1
+    for user_id in [uid for uid, (_, value) in _sessions.items() if value and value["active_restaurant_id"] == restaurant_id]:
+        _sessions.pop(user_id, None)
+
+# --- Шаблоны чек-листов ---
+# Ключ (restaurant_id, role, shift_type). У каждого заведения свой счетчик версии:
+# правка шаблонов увеличивает его, и все закэшированные списки заведения становятся устаревшими.
+
+CHECKLIST_CACHE_SIZE = 5000
+
+_checklists: "OrderedDict[tuple, tuple]" = OrderedDict()
+_checklist_versions: Dict[int, int] = {}
+_checklist_stats = {"hits": 0, "misses": 0}
+
+def checklist_version(restaurant_id: int) -> int:
+    return _checklist_versions.get(restaurant_id, 0)
+
+def get_checklist(restaurant_id: int, role: str, shift_type: str):
+    key = (restaurant_id, role, shift_type)
+    entry = _checklists.get(key)
+    if entry is None or entry[0] != checklist_version(restaurant_id):
+        _checklist_stats["misses"] += 1
+        return MISS
+    _checklist_stats["hits"] += 1
+    _checklists.move_to_end(key)
+    return [dict(item) for item in entry[1]]
+
+def put_checklist(restaurant_id: int, role: str, shift_type: str, items: list, version: int):
+    if version != checklist_version(restaurant_id):
+        return
+    key = (restaurant_id, role, shift_type)
+    _checklists[key] = (version, [dict(item) for item in items])
+    _checklists.move_to_end(key)
+    while len(_checklists) > CHECKLIST_CACHE_SIZE:
+        _checklists.popitem(last=False)
+
+def invalidate_checklists(restaurant_id: int):
+    _checklist_versions[restaurant_id] = checklist_version(restaurant_id) + 1
+
+def get_checklist_stats() -> Dict[str, Any]:
+    hits, misses = _checklist_stats["hits"], _checklist_stats["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "size": len(_checklists),
+    }
+
+# --- Метаданные заведения (роли, админы, название, статус) ---
+
+TENANT_CACHE_SIZE = 2000
+TENANT_CACHE_TTL = 600
+
+_tenants: "OrderedDict[int, tuple]" = OrderedDict()
+_tenants_version = 0
+
+def tenant_version() -> int:
+    return _tenants_version
+
+def get_tenant(restaurant_id: int):
+    """Возвращает метаданные заведения (None — заведения нет) или MISS."""
+    entry = _tenants.get(restaurant_id)
+    if entry is None:
+        return MISS
+    expires_at, value = entry
+    if expires_at < time.monotonic():
+        _tenants.pop(restaurant_id, None)
+        return MISS
+    _tenants.move_to_end(restaurant_id)
+    return value
+
+def put_tenant(restaurant_id: int, value: Optional[Dict[str, Any]], version: int):
+    if version != _tenants_version:
+        return
+    _tenants[restaurant_id] = (time.monotonic() + TENANT_CACHE_TTL, value)
+    _tenants.move_to_end(restaurant_id)
+    while len(_tenants) > TENANT_CACHE_SIZE:
+        _tenants.popitem(last=False)
+
+def invalidate_tenant(restaurant_id: int):
+    global _tenants_version
+    _tenants_version += 1
+    _tenants.pop(restaurant_id, None)
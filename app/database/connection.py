@@ -1,15 +1,173 @@
+import asyncio
+import time
+import logging
 import aiosqlite
+from aiosqlite.context import Result
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import List, Dict, Any, Optional
-from app.core.config import DB_PATH
+from app.core.config import DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS, SLOW_QUERY_MS
+from app.database import tracing
 
-async def _get_db():
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        yield db
+logger = logging.getLogger(__name__)
+
+_pool: Optional[asyncio.Queue] = None
+_connections: List[aiosqlite.Connection] = []
+_init_lock = asyncio.Lock()
+
+_stats = {
+    "acquired": 0,
+    "waited": 0,
+    "wait_total_ms": 0.0,
+    "wait_max_ms": 0.0,
+    "busy_total_ms": 0.0,
+    "queries": 0,
+}
+
+class DbUsage:
+    """Сколько запросов и времени БД потратил текущий апдейт. Вложенный учет пишет и в родителя."""
+    __slots__ = ("queries", "ms", "parent")
+
+    def __init__(self, parent: Optional["DbUsage"] = None):
+        self.queries = 0
+        self.ms = 0.0
+        self.parent = parent
+
+_usage: ContextVar[Optional[DbUsage]] = ContextVar("db_usage", default=None)
+
+def track_db_usage() -> DbUsage:
+    """Включает учет запросов и времени БД в текущем контексте (задаче апдейта)."""
+    usage = DbUsage(_usage.get())
+    _usage.set(usage)
+    return usage
+
+def _count_query():
+    _stats["queries"] += 1
+    usage = _usage.get()
+    while usage is not None:
+        usage.queries += 1
+        usage = usage.parent
+
+class _CountingConnection:
+    """Соединение из пула: считает execute/executemany, при SLOW_QUERY_MS > 0 еще и замеряет их
+    (для SELECT — до первой строки). Остальное отдает как есть."""
+    __slots__ = ("_db",)
+
+    def __init__(self, db: aiosqlite.Connection):
+        self._db = db
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def execute(self, sql: str, parameters=None):
+        _count_query()
+        if not SLOW_QUERY_MS:
+            return self._db.execute(sql, parameters)
+        return Result(self._timed(self._db.execute, sql, parameters, tracing.caller(), False))
+
+    def executemany(self, sql: str, parameters):
+        _count_query()
+        if not SLOW_QUERY_MS:
+            return self._db.executemany(sql, parameters)
+        return Result(self._timed(self._db.executemany, sql, parameters, tracing.caller(), True))
+
+    @staticmethod
+    async def _timed(method, sql: str, parameters, where: str, many: bool):
+        started = time.perf_counter()
+        try:
+            return await method(sql, parameters)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            if ms >= SLOW_QUERY_MS:
+                tracing.record(sql, parameters, ms, where, many)
+
+async def _open_connection() -> aiosqlite.Connection:
+    db = await aiosqlite.connect(DB_PATH)
+    db.row_factory = aiosqlite.Row
+    await db.execute("PRAGMA journal_mode=WAL")
+    await db.execute("PRAGMA synchronous=NORMAL")
+    await db.execute("PRAGMA foreign_keys=ON")
+    await db.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    return db
+
+async def init_pool(size: int = DB_POOL_SIZE):
+    """Открывает пул соединений. Вызывается один раз при старте бота."""
+    global _pool
+    async with _init_lock:
+        if _pool is not None:
+            return
+        queue = asyncio.Queue()
+        for _ in range(max(1, size)):
+            db = await _open_connection()
+            _connections.append(db)
+            queue.put_nowait(db)
+        _pool = queue
+        logger.info(f"DB pool: открыто соединений {len(_connections)}")
+
+async def close_pool():
+    global _pool
+    async with _init_lock:
+        if _pool is not None:
+            logger.info(f"DB pool: {get_pool_stats()}")
+        _pool = None
+        await tracing.stop()
+        while _connections:
+            db = _connections.pop()
+            try: await db.close()
+            except Exception as e: logger.warning(f"DB pool: ошибка закрытия соединения: {e}")
+
+@asynccontextmanager
+async def acquire():
+    """Выдает соединение из пула. Незакоммиченная транзакция откатывается при возврате."""
+    if _pool is None:
+        await init_pool()
+    pool = _pool
+
+    started = time.perf_counter()
+    db = await pool.get()
+    wait_ms = (time.perf_counter() - started) * 1000
+
+    _stats["acquired"] += 1
+    if wait_ms >= 1:
+        _stats["waited"] += 1
+    _stats["wait_total_ms"] += wait_ms
+    _stats["wait_max_ms"] = max(_stats["wait_max_ms"], wait_ms)
+    if wait_ms >= 100:
+        logger.warning(f"DB pool: ожидание соединения {wait_ms:.0f} мс (size={len(_connections)})")
+
+    held_from = time.perf_counter()
+    try:
+        yield _CountingConnection(db)
+    finally:
+        held_ms = (time.perf_counter() - held_from) * 1000
+        _stats["busy_total_ms"] += held_ms
+        usage = _usage.get()
+        while usage is not None:
+            usage.ms += held_ms
+            usage = usage.parent
+        try:
+            if db.in_transaction:
+                await db.rollback()
+        except Exception as e:
+            logger.warning(f"DB pool: rollback не удался: {e}")
+        pool.put_nowait(db)
+
+def get_pool_stats() -> Dict[str, Any]:
+    acquired = _stats["acquired"]
+    return {
+        "size": len(_connections),
+        "idle": _pool.qsize() if _pool is not None else 0,
+        "acquired": acquired,
+        "waited": _stats["waited"],
+        "wait_avg_ms": round(_stats["wait_total_ms"] / acquired, 3) if acquired else 0.0,
+        "wait_max_ms": round(_stats["wait_max_ms"], 3),
+        "busy_total_ms": round(_stats["busy_total_ms"], 3),
+        "queries": _stats["queries"],
+    }
 
 async def execute(query: str, params: tuple = (), commit: bool = True) -> int:
     """Выполняет запрос INSERT/UPDATE/DELETE"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         cursor = await db.execute(query, params)
         if commit:
             await db.commit()
@@ -17,16 +175,14 @@ async def execute(query: str, params: tuple = (), commit: bool = True) -> int:
 
 async def fetch_one(query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
     """Возвращает одну строку в виде словаря"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute(query, params) as cursor:
             row = await cursor.fetchone()
             return dict(row) if row else None
 
 async def fetch_all(query: str, params: tuple = ()) -> List[Dict[str, Any]]:
     """Возвращает список строк в виде словарей"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute(query, params) as cursor:
             rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
\ No newline at end of file
+            return [dict(row) for row in rows]
@@ -1,6 +1,143 @@
+import json
+import logging
 import aiosqlite
 from app.core.config import DB_PATH
 
+logger = logging.getLogger(__name__)
+
+async def _m001_hot_path_indexes(db: aiosqlite.Connection):
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_shifts_user_open ON shifts(user_id, restaurant_id, ended_at)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_extra_tasks_status_deadline ON extra_tasks(status, deadline)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_extra_tasks_assignee ON extra_tasks(assigned_to, restaurant_id, status)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_checklist_items_lookup ON checklist_items(restaurant_id, role, shift_type)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_users_restaurant_role ON users(restaurant_id, role)")
+
+async def _m002_shift_duties(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS shift_duties (
+            shift_id INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            done BOOLEAN NOT NULL DEFAULT 0,
+            done_at TIMESTAMP,
+            PRIMARY KEY (shift_id, item_id),
+            FOREIGN KEY (shift_id) REFERENCES shifts(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Перенос отметок из shifts.report: раньше duties хранились списком по позициям
+    # чек-листа, поэтому сопоставляем их с пунктами в том же порядке, что и get_checklist.
+    order = {'morning': 1, 'common': 2, 'evening': 3}
+    types_by_shift = {
+        'full': ('morning', 'common', 'evening'),
+        'morning': ('morning', 'common'),
+        'evening': ('common', 'evening'),
+    }
+
+    items = {}
+    async with db.execute("SELECT id, restaurant_id, role, shift_type, text FROM checklist_items") as cur:
+        for row in await cur.fetchall():
+            items.setdefault((row[1], row[2]), []).append(row)
+
+    async with db.execute("SELECT id, restaurant_id, role, shift_type, report FROM shifts WHERE report IS NOT NULL") as cur:
+        shifts = await cur.fetchall()
+
+    rows = []
+    for shift_id, r_id, role, shift_type, report in shifts:
+        try:
+            duties = json.loads(report).get('duties', [])
+        except (ValueError, AttributeError):
+            continue
+        if not duties:
+            continue
+
+        types = types_by_shift.get(shift_type, ('common',))
+        checklist = sorted(
+            (it for it in items.get((r_id, role), []) if it[3] in types),
+            key=lambda it: (order[it[3]], it[0])
+        )
+        by_title = {it[4]: it[0] for it in checklist}
+
+        for i, duty in enumerate(duties):
+            title = duty.get('title')
+            if i < len(checklist) and checklist[i][4] == title:
+                item_id = checklist[i][0]
+            elif title in by_title:
+                item_id = by_title[title]
+            else:
+                continue
+            rows.append((shift_id, item_id, 1 if duty.get('done') else 0))
+
+    await db.executemany("INSERT OR IGNORE INTO shift_duties (shift_id, item_id, done) VALUES (?, ?, ?)", rows)
+
+async def _m003_fsm_states(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at REAL NOT NULL
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states(updated_at)")
+
+async def _m004_kpi_rollup(db: aiosqlite.Connection):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS kpi_rollup (
+            user_id INTEGER NOT NULL,
+            restaurant_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            shifts INTEGER NOT NULL DEFAULT 0,
+            done_items INTEGER NOT NULL DEFAULT 0,
+            total_items INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, restaurant_id, day),
+            FOREIGN KEY (restaurant_id) REFERENCES restaurants(id) ON DELETE CASCADE
+        )
+    """)
+    await db.execute("""
+        INSERT INTO kpi_rollup (user_id, restaurant_id, day, shifts, done_items, total_items)
+        SELECT s.user_id, s.restaurant_id, date(s.started_at), COUNT(*),
+               COALESCE(SUM((SELECT SUM(done) FROM shift_duties WHERE shift_id = s.id)), 0),
+               COALESCE(SUM((SELECT COUNT(*) FROM shift_duties WHERE shift_id = s.id)), 0)
+        FROM shifts s
+        WHERE s.ended_at IS NOT NULL
+        GROUP BY s.user_id, s.restaurant_id, date(s.started_at)
+    """)
+
+async def _m005_history_indexes(db: aiosqlite.Connection):
+    # Внутри индекса записи упорядочены по rowid (id), поэтому страница "id < курсор" читается с места
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_shifts_restaurant ON shifts(restaurant_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_shifts_user_history ON shifts(user_id, restaurant_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_extra_tasks_restaurant ON extra_tasks(restaurant_id)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_kpi_rollup_restaurant ON kpi_rollup(restaurant_id)")
+
+# Порядок важен: номер версии схемы = позиция миграции в списке (начиная с 1).
+# Новые миграции добавляются только в конец, существующие не редактируются.
+MIGRATIONS = [
+    _m001_hot_path_indexes,
+    _m002_shift_duties,
+    _m003_fsm_states,
+    _m004_kpi_rollup,
+    _m005_history_indexes,
+]
+
+async def run_migrations(db: aiosqlite.Connection):
+    async with db.execute("PRAGMA user_version") as cur:
+        current = (await cur.fetchone())[0]
+
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        try:
+            await db.execute("BEGIN")
+            await migration(db)
+            await db.execute(f"PRAGMA user_version = {version}")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception(f"Миграция {version} ({migration.__name__}) не применена")
+            raise
+        logger.info(f"Схема БД обновлена до версии {version} ({migration.__name__})")
+
 async def init_db():
     async with aiosqlite.connect(DB_PATH) as db:
         await db.execute("PRAGMA journal_mode=WAL;") 
@@ -125,4 +262,6 @@ async def init_db():
             )
         """)
         
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+
+        await run_migrations(db)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from app.core.config import DUTY_FLUSH_INTERVAL
+from app.database.connection import acquire
+
+# Отметки чек-листа открытых смен (write-behind поверх shift_duties).
+# Чтения идут из памяти, отметки копятся и сбрасываются в БД одной транзакцией раз в
+# DUTY_FLUSH_INTERVAL секунд, а также при закрытии смены и остановке бота.
+# При падении процесса теряются отметки не старше этого интервала.
+
+logger = logging.getLogger(__name__)
+
+_UPSERT = """
+    INSERT INTO shift_duties (shift_id, item_id, done, done_at)
+    SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM shifts WHERE id = ? AND ended_at IS NULL)
+    ON CONFLICT(shift_id, item_id) DO UPDATE SET done = excluded.done, done_at = excluded.done_at
+"""
+
+# shift_id -> {item_id: done} — полная картина отметок смены
+_maps: Dict[int, Dict[int, bool]] = {}
+# shift_id -> {item_id: (done, done_at)} — еще не записано в БД
+_dirty: Dict[int, Dict[int, Tuple[int, Optional[str]]]] = {}
+_flusher: Optional[asyncio.Task] = None
+_lock: Optional[asyncio.Lock] = None
+
+def _get_lock() -> asyncio.Lock:
+    global _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    return _lock
+
+async def get_map(shift_id: int) -> Dict[int, bool]:
+    """Отметки открытой смены (для закрытых читать shift_duties напрямую — иначе смена осядет в памяти)."""
+    duties = _maps.get(shift_id)
+    if duties is None:
+        # Под замком сброса: иначе можно прочитать БД до коммита пачки, уже изъятой из _dirty
+        async with _get_lock():
+            async with acquire() as db:
+                async with db.execute("SELECT item_id, done FROM shift_duties WHERE shift_id = ?", (shift_id,)) as cur:
+                    loaded = {row[0]: bool(row[1]) for row in await cur.fetchall()}
+        # Пока ждали БД, смену могли загрузить или отметить — то, что в памяти, свежее
+        duties = _maps.get(shift_id)
+        if duties is None:
+            for item_id, (done, _) in _dirty.get(shift_id, {}).items():
+                loaded[item_id] = bool(done)
+            duties = _maps[shift_id] = loaded
+    return dict(duties)
+
+def set_duty(shift_id: int, item_id: int, done: bool, at: str):
+    global _flusher
+    _dirty.setdefault(shift_id, {})[item_id] = (int(done), at if done else None)
+    duties = _maps.get(shift_id)
+    if duties is not None:
+        duties[item_id] = done
+    if _flusher is None or _flusher.done():
+        _flusher = asyncio.create_task(_flush_loop())
+
+def take(shift_id: int) -> List[Tuple[int, int, int, Optional[str]]]:
+    """Забирает несохраненные отметки смены — их запишет вызывающий в своей транзакции."""
+    pending = _dirty.pop(shift_id, {})
+    return [(shift_id, item_id, done, at) for item_id, (done, at) in pending.items()]
+
+def forget(shift_id: int):
+    """Смена закрыта или удалена: отметки больше не меняются, держать их в памяти незачем."""
+    _maps.pop(shift_id, None)
+    _dirty.pop(shift_id, None)
+
+async def flush():
+    """Сбрасывает накопленные отметки в БД одной транзакцией. Отметки закрытых
+    и удаленных смен отбрасываются."""
+    global _dirty
+    async with _get_lock():
+        if not _dirty:
+            return
+        batch, _dirty = _dirty, {}
+        rows = [
+            (shift_id, item_id, done, at, shift_id)
+            for shift_id, items in batch.items() for item_id, (done, at) in items.items()
+        ]
+        try:
+            async with acquire() as db:
+                await db.executemany(_UPSERT, rows)
+                await db.commit()
+        except BaseException:
+            # Вернем отметки (в т.ч. при отмене задачи), не затирая более свежие
+            for shift_id, items in batch.items():
+                pending = _dirty.setdefault(shift_id, {})
+                for item_id, value in items.items():
+                    pending.setdefault(item_id, value)
+            raise
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(DUTY_FLUSH_INTERVAL)
+        try:
+            await flush()
+        except Exception as e:
+            logger.warning(f"Отметки чек-листа: ошибка сброса в БД: {e}")
+
+async def close():
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try: await _flusher
+        except asyncio.CancelledError: pass
+        _flusher = None
+    await flush()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from app.core.config import FSM_CACHE_SIZE, FSM_FLUSH_INTERVAL, FSM_STATE_TTL_HOURS
+from app.database.connection import acquire
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 600
+
+def _key(key: StorageKey) -> str:
+    return ":".join(str(part) for part in (
+        key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+    ))
+
+class SQLiteStorage(BaseStorage):
+    """FSM в таблице fsm_states. Чтения идут из LRU-кэша, записи копятся и
+    сбрасываются в БД одной транзакцией раз в flush_interval секунд."""
+
+    def __init__(self, cache_size: int = FSM_CACHE_SIZE, flush_interval: float = FSM_FLUSH_INTERVAL,
+                 ttl_hours: float = FSM_STATE_TTL_HOURS):
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.ttl = ttl_hours * 3600
+        # key -> {"state", "data", "updated_at"}; пустая запись = состояния нет (тоже кэшируется)
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+
+    async def _entry(self, key: StorageKey) -> Dict[str, Any]:
+        k = _key(key)
+        entry = self._cache.get(k)
+        if entry is None:
+            async with acquire() as db:
+                async with db.execute("SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (k,)) as cur:
+                    row = await cur.fetchone()
+            # Пока ждали БД, запись могла появиться в кэше — она свежее
+            entry = self._cache.get(k)
+            if entry is None:
+                if row:
+                    entry = {"state": row['state'], "data": json.loads(row['data']), "updated_at": row['updated_at']}
+                else:
+                    entry = {"state": None, "data": {}, "updated_at": time.time()}
+                self._cache[k] = entry
+        self._cache.move_to_end(k)
+        self._evict()
+
+        if (entry["state"] is not None or entry["data"]) and entry["updated_at"] < time.time() - self.ttl:
+            self._write(k, entry, None, {})
+        return entry
+
+    def _write(self, k: str, entry: Dict[str, Any], state: Optional[str], data: Dict[str, Any]):
+        entry["state"] = state
+        entry["data"] = data
+        entry["updated_at"] = time.time()
+        self._dirty.add(k)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    def _evict(self):
+        # Несохраненные записи не вытесняем — они уйдут из кэша после сброса
+        if len(self._cache) <= self.cache_size:
+            return
+        # Самую свежую запись (последнюю) не трогаем — с ней сейчас работают
+        candidates = [k for k in list(self._cache)[:-1] if k not in self._dirty]
+        for k in candidates[:len(self._cache) - self.cache_size]:
+            del self._cache[k]
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._entry(key)
+        self._write(_key(key), entry, state.state if isinstance(state, State) else state, entry["data"])
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._entry(key))["state"]
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        entry = await self._entry(key)
+        self._write(_key(key), entry, entry["state"], data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._entry(key))["data"].copy()
+
+    async def flush(self):
+        """Сбрасывает накопленные изменения в БД одной транзакцией."""
+        if not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+        upserts, deletes = [], []
+        for k in keys:
+            entry = self._cache.get(k)
+            if entry is None:
+                continue
+            if entry["state"] is None and not entry["data"]:
+                deletes.append((k,))
+            else:
+                upserts.append((k, entry["state"], json.dumps(entry["data"], ensure_ascii=False), entry["updated_at"]))
+
+        try:
+            async with acquire() as db:
+                if deletes:
+                    await db.executemany("DELETE FROM fsm_states WHERE key = ?", deletes)
+                if upserts:
+                    await db.executemany("""
+                        INSERT INTO fsm_states (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+                    """, upserts)
+                await db.commit()
+        except BaseException:
+            # Вернем ключи (в т.ч. при отмене задачи), чтобы записать их при следующем сбросе
+            self._dirty |= keys
+            raise
+        self._evict()
+
+    async def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        async with acquire() as db:
+            cursor = await db.execute("DELETE FROM fsm_states WHERE updated_at < ?", (cutoff,))
+            await db.commit()
+        for k in [k for k, e in self._cache.items() if k not in self._dirty and e["updated_at"] < cutoff]:
+            del self._cache[k]
+        if cursor.rowcount:
+            logger.info(f"FSM: удалено устаревших состояний {cursor.rowcount}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL:
+                    self._last_purge = time.monotonic()
+                    await self.purge_expired()
+            except Exception as e:
+                logger.warning(f"FSM: ошибка сброса в БД: {e}")
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try: await self._flusher
+            except asyncio.CancelledError: pass
+            self._flusher = None
+        await self.flush()
@@ -0,0 +1,41 @@
+from typing import Any, Dict, Optional, Tuple
+from app.database.connection import fetch_all
+
+# Постраничный вывод по курсору на id вместо OFFSET: стоимость страницы не зависит от ее номера.
+# Курсор — строка для callback_data: "<id" — записи старше id, ">id" — новее id, пусто — самые новые.
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    if cursor and cursor[0] in "<>" and cursor[1:].isdigit():
+        return cursor[0], int(cursor[1:])
+    return None, None
+
+async def fetch_page(query: str, params: tuple, cursor: Optional[str], per_page: int, id_column: str) -> Dict[str, Any]:
+    """query — SELECT ... WHERE ... без ORDER BY/LIMIT, в выборке должен быть столбец id.
+    Возвращает {"rows": [...] (от новых к старым), "newer": курсор|None, "older": курсор|None}."""
+    direction, anchor = parse_cursor(cursor)
+    if direction == ">":
+        sql = f"{query} AND {id_column} > ? ORDER BY {id_column} ASC LIMIT ?"
+        args = (*params, anchor, per_page + 1)
+    elif direction == "<":
+        sql = f"{query} AND {id_column} < ? ORDER BY {id_column} DESC LIMIT ?"
+        args = (*params, anchor, per_page + 1)
+    else:
+        sql = f"{query} ORDER BY {id_column} DESC LIMIT ?"
+        args = (*params, per_page + 1)
+
+    rows = await fetch_all(sql, args)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == ">":
+        rows.reverse()
+
+    if not rows:
+        return {"rows": [], "newer": None, "older": None}
+    # В сторону, откуда пришли, записи точно есть; в сторону движения — если выбралась лишняя строка
+    has_newer = direction == "<" or (direction == ">" and has_more)
+    has_older = direction == ">" or (direction != ">" and has_more)
+    return {
+        "rows": rows,
+        "newer": f">{rows[0]['id']}" if has_newer else None,
+        "older": f"<{rows[-1]['id']}" if has_older else None,
+    }
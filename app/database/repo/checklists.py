@@ -1,11 +1,16 @@
-import aiosqlite
 import uuid
-from typing import List, Dict
-from app.core.config import DB_PATH
+from typing import List, Dict, Iterable, Tuple
+from app.core import reminder_wheel, shards
+from app.database import cache
+from app.database.connection import acquire
 
 async def get_checklist(restaurant_id: int, role: str, shift_type: str) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    cached = cache.get_checklist(restaurant_id, role, shift_type)
+    if cached is not cache.MISS:
+        return cached
+
+    version = cache.checklist_version(restaurant_id)
+    async with acquire() as db:
         if shift_type == 'full':
             types = ('morning', 'common', 'evening')
         elif shift_type == 'morning':
@@ -29,19 +34,46 @@ async def get_checklist(restaurant_id: int, role: str, shift_type: str) -> List[
         params = (restaurant_id, role, *types)
 
         async with db.execute(query, params) as cur:
-            rows = await cur.fetchall()
-            return [dict(row) for row in rows]
+            items = [dict(row) for row in await cur.fetchall()]
+
+    cache.put_checklist(restaurant_id, role, shift_type, items, version)
+    return items
 
 async def add_checklist_item(restaurant_id: int, role: str, shift_type: str, text: str, item_type: str = 'simple'):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "INSERT INTO checklist_items (restaurant_id, role, shift_type, text, item_type) VALUES (?, ?, ?, ?, ?)", 
             (restaurant_id, role, shift_type, text, item_type)
         )
         await db.commit()
+    cache.invalidate_checklists(restaurant_id)
+
+async def add_checklist_items(restaurant_id: int, role: str, shift_type: str, items: Iterable[Tuple[str, str]]) -> int:
+    """Добавляет пункты (текст, тип) одной транзакцией. Пункты, которые уже есть в категории
+    (или повторяются в самом списке), пропускаются. Возвращает число добавленных."""
+    async with acquire() as db:
+        async with db.execute(
+            "SELECT text FROM checklist_items WHERE restaurant_id = ? AND role = ? AND shift_type = ?",
+            (restaurant_id, role, shift_type)
+        ) as cur:
+            seen = {row[0] for row in await cur.fetchall()}
+        rows = []
+        for text, item_type in items:
+            if text in seen: continue
+            seen.add(text)
+            rows.append((restaurant_id, role, shift_type, text, item_type))
+        if rows:
+            await db.executemany(
+                "INSERT INTO checklist_items (restaurant_id, role, shift_type, text, item_type) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            await db.commit()
+    if rows:
+        cache.invalidate_checklists(restaurant_id)
+    return len(rows)
 
 async def is_checklist_item_exists(restaurant_id: int, role: str, shift_type: str, text: str) -> bool:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute(
             "SELECT 1 FROM checklist_items WHERE restaurant_id = ? AND role = ? AND shift_type = ? AND text = ?", 
             (restaurant_id, role, shift_type, text)
@@ -49,16 +81,30 @@ async def is_checklist_item_exists(restaurant_id: int, role: str, shift_type: st
             return await cur.fetchone() is not None
 
 async def delete_checklist_item(item_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "DELETE FROM checklist_items WHERE id = ? AND restaurant_id = ?", 
             (item_id, restaurant_id)
         )
         await db.commit()
+    cache.invalidate_checklists(restaurant_id)
+
+async def delete_checklist_items(item_ids: List[int], restaurant_id: int) -> int:
+    """Удаляет несколько пунктов одним запросом. Возвращает число удаленных."""
+    if not item_ids: return 0
+    placeholders = ','.join(['?'] * len(item_ids))
+    async with acquire() as db:
+        cursor = await db.execute(
+            f"DELETE FROM checklist_items WHERE id IN ({placeholders}) AND restaurant_id = ?",
+            (*item_ids, restaurant_id)
+        )
+        await db.commit()
+    if cursor.rowcount:
+        cache.invalidate_checklists(restaurant_id)
+    return cursor.rowcount
 
 async def get_items_by_type(restaurant_id: int, role: str, shift_type: str) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("""
             SELECT * FROM checklist_items 
             WHERE restaurant_id = ? AND role = ? AND shift_type = ?
@@ -67,30 +113,37 @@ async def get_items_by_type(restaurant_id: int, role: str, shift_type: str) -> L
             return [dict(row) for row in await cur.fetchall()]
 
 async def add_reminder(restaurant_id: int, role: str, text: str, interval: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
+    async with acquire() as db:
+        cursor = await db.execute(
             "INSERT INTO reminders (restaurant_id, role, text, interval_hours) VALUES (?, ?, ?, ?)",
             (restaurant_id, role, text, interval)
         )
         await db.commit()
+    reminder_wheel.add_reminder(cursor.lastrowid, restaurant_id, role, text, interval)
 
 async def delete_reminder(rem_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
+    async with acquire() as db:
+        cursor = await db.execute(
             "DELETE FROM reminders WHERE id = ? AND restaurant_id = ?", 
             (rem_id, restaurant_id)
         )
         await db.commit()
+    if cursor.rowcount:
+        reminder_wheel.remove_reminder(rem_id)
         
 async def get_all_reminders(restaurant_id: int) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT * FROM reminders WHERE restaurant_id = ?", (restaurant_id,)) as cur:
             return [dict(row) for row in await cur.fetchall()]
 
+async def get_reminders_all_restaurants() -> List[Dict]:
+    async with acquire() as db:
+        async with db.execute("SELECT * FROM reminders") as cur:
+            return [dict(row) for row in await cur.fetchall()]
+
 async def create_invite(restaurant_id: int, role: str) -> str:
     code = str(uuid.uuid4())[:8]
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "INSERT INTO invites (code, restaurant_id, role) VALUES (?, ?, ?)", 
             (code, restaurant_id, role)
@@ -98,14 +151,15 @@ async def create_invite(restaurant_id: int, role: str) -> str:
         await db.commit()
     return code
 
+@shards.gathered(shards.first)
 async def check_invite(code: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT * FROM invites WHERE code = ? AND is_used = 0", (code,)) as cur:
             row = await cur.fetchone()
             return dict(row) if row else None
 
+@shards.gathered(shards.first)
 async def mark_invite_used(code: str):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute("UPDATE invites SET is_used = 1 WHERE code = ?", (code,))
         await db.commit()
\ No newline at end of file
@@ -0,0 +1,78 @@
+from typing import Optional, Dict
+from app.database.connection import acquire
+
+# Итоги смен по дням: (user, restaurant, день начала смены) -> смен, выполнено пунктов, всего пунктов.
+# Пополняется в end_shift, полностью пересчитывается через rebuild_rollup (python -m tools.rebuild_kpi).
+
+_ROLLUP_SELECT = """
+    SELECT s.user_id, s.restaurant_id, date(s.started_at), COUNT(*),
+           COALESCE(SUM((SELECT SUM(done) FROM shift_duties WHERE shift_id = s.id)), 0),
+           COALESCE(SUM((SELECT COUNT(*) FROM shift_duties WHERE shift_id = s.id)), 0)
+    FROM shifts s
+    WHERE s.ended_at IS NOT NULL
+"""
+
+async def add_shift_to_rollup(db, shift_id: int):
+    """Добавляет закрытую смену в итоги. Вызывается внутри транзакции end_shift."""
+    await db.execute(f"""
+        INSERT INTO kpi_rollup (user_id, restaurant_id, day, shifts, done_items, total_items)
+        {_ROLLUP_SELECT} AND s.id = ?
+        GROUP BY s.id
+        ON CONFLICT(user_id, restaurant_id, day) DO UPDATE SET
+            shifts = shifts + excluded.shifts,
+            done_items = done_items + excluded.done_items,
+            total_items = total_items + excluded.total_items
+    """, (shift_id,))
+
+async def rebuild_rollup(restaurant_id: Optional[int] = None) -> int:
+    """Пересчитывает итоги с нуля по таблицам shifts/shift_duties. Возвращает число строк."""
+    scope, params = ("", ()) if restaurant_id is None else (" AND s.restaurant_id = ?", (restaurant_id,))
+    async with acquire() as db:
+        await db.execute("BEGIN")
+        if restaurant_id is None:
+            await db.execute("DELETE FROM kpi_rollup")
+        else:
+            await db.execute("DELETE FROM kpi_rollup WHERE restaurant_id = ?", (restaurant_id,))
+        await db.execute(f"""
+            INSERT INTO kpi_rollup (user_id, restaurant_id, day, shifts, done_items, total_items)
+            {_ROLLUP_SELECT}{scope}
+            GROUP BY s.user_id, s.restaurant_id, date(s.started_at)
+        """, params)
+        async with db.execute("SELECT changes()") as cur:
+            rows = (await cur.fetchone())[0]
+        await db.commit()
+    return rows
+
+async def get_kpi_totals(tg_id: int, restaurant_id: int) -> Dict[str, int]:
+    """Сумма итогов с момента сброса KPI (или за 30 дней). Дни после дня сброса берутся из
+    kpi_rollup, сам день сброса — из смен, начатых не раньше точного времени сброса."""
+    async with acquire() as db:
+        async with db.execute(
+            "SELECT kpi_reset_at FROM users WHERE tg_id = ? AND restaurant_id = ?", (tg_id, restaurant_id)
+        ) as cur:
+            row = await cur.fetchone()
+        reset_at = row[0] if row else None
+
+        if reset_at:
+            async with db.execute("""
+                SELECT COALESCE(SUM(shifts), 0), COALESCE(SUM(done_items), 0), COALESCE(SUM(total_items), 0)
+                FROM kpi_rollup
+                WHERE user_id = ? AND restaurant_id = ? AND day > date(?)
+            """, (tg_id, restaurant_id, reset_at)) as cur:
+                shifts, done, total = await cur.fetchone()
+            async with db.execute(f"""
+                {_ROLLUP_SELECT}
+                AND s.user_id = ? AND s.restaurant_id = ? AND date(s.started_at) = date(?) AND s.started_at >= ?
+            """, (tg_id, restaurant_id, reset_at, reset_at)) as cur:
+                row = await cur.fetchone()
+            # Без GROUP BY агрегат всегда дает одну строку: (NULL, NULL, NULL, 0, 0, 0), если смен не было
+            shifts, done, total = shifts + row[3], done + row[4], total + row[5]
+        else:
+            async with db.execute("""
+                SELECT COALESCE(SUM(shifts), 0), COALESCE(SUM(done_items), 0), COALESCE(SUM(total_items), 0)
+                FROM kpi_rollup
+                WHERE user_id = ? AND restaurant_id = ? AND day >= date('now', '-30 days')
+            """, (tg_id, restaurant_id)) as cur:
+                shifts, done, total = await cur.fetchone()
+
+    return {"shifts": shifts, "done_items": done, "total_items": total}
@@ -1,11 +1,42 @@
 import uuid
-import aiosqlite
 from typing import List, Dict, Optional
-from app.core.config import DB_PATH
+from app.core import reminder_wheel, shards
+from app.core.config import SHARDS, SHARD_ID
+from app.database.connection import acquire
+from app.database import cache, active_shifts, duty_buffer, routes
+from app.database.repo import users as user_repo
 
+async def _least_loaded_shard(arguments: Dict) -> int:
+    """Новый ключ (а с ним и кофейню) кладем в шард, где меньше всего кофеен и неиспользованных ключей."""
+    loads = await shards.everywhere(count_tenants)
+    return loads.index(min(loads))
+
+async def _key_shard(arguments: Dict) -> Optional[int]:
+    found = await shards.everywhere(get_license_key, arguments["key_code"])
+    return next((shard for shard, key in enumerate(found) if key), None)
+
+def _sum_stats(results: List[Dict]) -> Dict:
+    return {name: sum(r[name] for r in results) for name in ("cafes", "users", "shifts")}
+
+def _newest_first(results: List[List[Dict]]) -> List[Dict]:
+    return sorted(shards.concat(results), key=lambda r: r['id'], reverse=True)
+
+def _distinct(results: List[List[int]]) -> List[int]:
+    return list(dict.fromkeys(shards.concat(results)))
+
+@shards.remote
+async def count_tenants() -> int:
+    """Кофейни шарда вместе с будущими — по выданным, но еще не активированным ключам."""
+    async with acquire() as db:
+        async with db.execute(
+            "SELECT (SELECT COUNT(*) FROM restaurants) + (SELECT COUNT(*) FROM license_keys WHERE is_used = 0)"
+        ) as cur:
+            return (await cur.fetchone())[0]
+
+@shards.owned(locate=_least_loaded_shard)
 async def create_license_key(admin_id: int, target_username: Optional[str] = None) -> str:
     key = f"LICENSE-{uuid.uuid4().hex[:8].upper()}"
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "INSERT INTO license_keys (key_code, activated_by_tg_id, target_username) VALUES (?, ?, ?)",
             (key, admin_id, target_username)
@@ -13,16 +44,16 @@ async def create_license_key(admin_id: int, target_username: Optional[str] = Non
         await db.commit()
     return key
 
+@shards.gathered(shards.first)
 async def get_license_key(key_code: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT * FROM license_keys WHERE key_code = ?", (key_code,)) as cur:
             row = await cur.fetchone()
             return dict(row) if row else None
 
+@shards.owned(locate=_key_shard)
 async def register_new_restaurant(title: str, owner_tg_id: int, owner_username: Optional[str], owner_name: str, pin_hash: str, key_code: str) -> bool:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT * FROM license_keys WHERE key_code = ?", (key_code,)) as cur:
             row = await cur.fetchone()
             if not row or row['is_used']: return False
@@ -31,7 +62,22 @@ async def register_new_restaurant(title: str, owner_tg_id: int, owner_username:
                 clean_owner = owner_username.lower() if owner_username else ""
                 if clean_target != clean_owner: return False
 
-        async with db.execute("INSERT INTO restaurants (title, owner_tg_id, is_active) VALUES (?, ?, 1)", (title, owner_tg_id)) as cursor:
+        if shards.enabled():
+            # id кофейни определяет ее шард: берем следующий id, который попадает в этот шард
+            insert = (
+                """
+                INSERT INTO restaurants (id, title, owner_tg_id, is_active)
+                SELECT last + 1 + ((? - (last + 1)) % ? + ?) % ?, ?, ?, 1
+                FROM (SELECT MAX(
+                    COALESCE((SELECT MAX(id) FROM restaurants), 0),
+                    COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'restaurants'), 0)
+                ) AS last)
+                """,
+                (SHARD_ID, SHARDS, SHARDS, SHARDS, title, owner_tg_id)
+            )
+        else:
+            insert = ("INSERT INTO restaurants (title, owner_tg_id, is_active) VALUES (?, ?, 1)", (title, owner_tg_id))
+        async with db.execute(*insert) as cursor:
             restaurant_id = cursor.lastrowid
 
         await db.execute("INSERT INTO roles (slug, restaurant_id, name) VALUES (?, ?, ?)", ("admin", restaurant_id, "Владелец"))
@@ -39,45 +85,60 @@ async def register_new_restaurant(title: str, owner_tg_id: int, owner_username:
         await db.execute("UPDATE license_keys SET is_used = 1, activated_at = CURRENT_TIMESTAMP WHERE key_code = ?", (key_code,))
         await db.execute("INSERT OR REPLACE INTO sessions (user_id, active_restaurant_id, role) VALUES (?, ?, ?)", (owner_tg_id, restaurant_id, "admin"))
         await db.commit()
-        return True
+    cache.invalidate_session(owner_tg_id)
+    cache.invalidate_tenant(restaurant_id)
+    await routes.set_route(owner_tg_id, restaurant_id)
+    await shards.others(user_repo.delete_session, owner_tg_id)
+    return True
 
+@shards.owned()
 async def delete_restaurant(restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    await active_shifts.load()
+    async with acquire() as db:
         await db.execute("DELETE FROM sessions WHERE active_restaurant_id = ?", (restaurant_id,))
         await db.execute("DELETE FROM restaurants WHERE id = ?", (restaurant_id,))
         await db.commit()
+    cache.invalidate_restaurant_sessions(restaurant_id)
+    cache.invalidate_checklists(restaurant_id)
+    cache.invalidate_tenant(restaurant_id)
+    await routes.drop_restaurant(restaurant_id)
+    for shift_id in active_shifts.remove_restaurant(restaurant_id):
+        duty_buffer.forget(shift_id)
+    reminder_wheel.remove_restaurant(restaurant_id)
 
+@shards.owned()
 async def get_restaurant_info(restaurant_id: int) -> Optional[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT * FROM restaurants WHERE id = ?", (restaurant_id,)) as cur:
             row = await cur.fetchone()
             return dict(row) if row else None
 
+@shards.owned()
 async def get_restaurant_users(restaurant_id: int) -> List[int]:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute("SELECT tg_id FROM users WHERE restaurant_id = ?", (restaurant_id,)) as cur:
             rows = await cur.fetchall()
             return [r[0] for r in rows]
 
+@shards.gathered(_sum_stats)
 async def get_platform_stats() -> Dict:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute("SELECT COUNT(*) FROM restaurants") as c:
             cafes = (await c.fetchone())[0]
         async with db.execute("SELECT COUNT(*) FROM users") as c:
             users = (await c.fetchone())[0]
-        async with db.execute("SELECT COUNT(*) FROM shifts WHERE ended_at IS NULL") as c:
-            shifts = (await c.fetchone())[0]
+    shifts = await active_shifts.count()
     return {"cafes": cafes, "users": users, "shifts": shifts}
 
+@shards.gathered(_newest_first)
 async def get_all_restaurants() -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT id, title, is_active FROM restaurants ORDER BY id DESC") as cur:
             return [dict(row) for row in await cur.fetchall()]
 
+@shards.owned()
 async def toggle_restaurant_status(restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute("SELECT is_active FROM restaurants WHERE id = ?", (restaurant_id,)) as cur:
             row = await cur.fetchone()
             if not row: return None
@@ -90,16 +151,22 @@ async def toggle_restaurant_status(restaurant_id: int):
             await db.execute("DELETE FROM sessions WHERE active_restaurant_id = ?", (restaurant_id,))
             
         await db.commit()
-        return new_status
+    cache.invalidate_restaurant_sessions(restaurant_id)
+    cache.invalidate_tenant(restaurant_id)
+    if new_status == 0:
+        await routes.drop_restaurant(restaurant_id)
+    return new_status
 
+@shards.owned()
 async def is_restaurant_active(restaurant_id: int) -> bool:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute("SELECT is_active FROM restaurants WHERE id = ?", (restaurant_id,)) as cur:
             row = await cur.fetchone()
             return bool(row[0]) if row else False
 
+@shards.gathered(_distinct)
 async def get_all_owners_ids() -> List[int]:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute("SELECT DISTINCT owner_tg_id FROM restaurants") as cur:
             rows = await cur.fetchall()
             return [r[0] for r in rows]
\ No newline at end of file
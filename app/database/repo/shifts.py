@@ -1,49 +1,84 @@
-import aiosqlite
 from datetime import datetime
 from typing import Optional, Dict, List
-from app.core.config import DB_PATH, TZ
+from app.core.config import TZ
+from app.core import reminder_wheel, shards
+from app.database.connection import acquire
+from app.database import pagination, duty_buffer, active_shifts
+from app.database.repo import kpi as kpi_repo
 
 def now():
     return datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
 
-async def start_shift(tg_id: int, restaurant_id: int, role: str, shift_type: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO shifts (user_id, restaurant_id, role, shift_type, started_at) VALUES (?, ?, ?, ?, ?)", 
-            (tg_id, restaurant_id, role, shift_type, now())
-        )
+async def start_shift(tg_id: int, restaurant_id: int, role: str, shift_type: str) -> int:
+    started_at = now()
+    await active_shifts.load()
+    async with acquire() as db:
+        async with db.execute("""
+            INSERT INTO shifts (user_id, restaurant_id, role, shift_type, started_at) VALUES (?, ?, ?, ?, ?)
+            RETURNING *, (SELECT full_name FROM users WHERE tg_id = shifts.user_id AND restaurant_id = shifts.restaurant_id) AS full_name
+        """, (tg_id, restaurant_id, role, shift_type, started_at)) as cur:
+            shift = dict(await cur.fetchone())
         await db.commit()
+    active_shifts.add(shift)
+    reminder_wheel.add_shift(shift['id'], tg_id, restaurant_id, role, started_at)
+    return shift['id']
 
+# Нужна и воркеру-лобби сразу после входа — поэтому owned
+@shards.owned()
 async def get_active_shift(tg_id: int, restaurant_id: int) -> Optional[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT * FROM shifts 
-            WHERE user_id = ? AND restaurant_id = ? AND ended_at IS NULL 
-            ORDER BY id DESC LIMIT 1
-        """, (tg_id, restaurant_id)) as cur:
-            row = await cur.fetchone()
-            return dict(row) if row else None
-
-async def end_shift(shift_id: int, restaurant_id: int, report_json: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "UPDATE shifts SET ended_at = ?, report = ? WHERE id = ? AND restaurant_id = ?", 
+    return await active_shifts.get(tg_id, restaurant_id)
+
+async def end_shift(shift_id: int, restaurant_id: int, report_json: str, item_ids: Optional[List[int]] = None):
+    # Отметки из буфера должны попасть в БД до закрытия: по ним считаются итоги и KPI
+    await duty_buffer.flush()
+    await active_shifts.load()
+    async with acquire() as db:
+        pending = duty_buffer.take(shift_id)
+        if pending:
+            await db.executemany("""
+                INSERT INTO shift_duties (shift_id, item_id, done, done_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(shift_id, item_id) DO UPDATE SET done = excluded.done, done_at = excluded.done_at
+            """, pending)
+        cursor = await db.execute(
+            "UPDATE shifts SET ended_at = ?, report = ? WHERE id = ? AND restaurant_id = ? AND ended_at IS NULL", 
             (now(), report_json, shift_id, restaurant_id)
         )
+        # Смену уже закрыли параллельным запросом — второй раз в KPI не учитываем
+        if cursor.rowcount:
+            if item_ids is not None:
+                await _finalize_duties(db, shift_id, item_ids)
+            await kpi_repo.add_shift_to_rollup(db, shift_id)
         await db.commit()
+    active_shifts.remove(shift_id, restaurant_id)
+    duty_buffer.forget(shift_id)
+    reminder_wheel.remove_shift(shift_id)
 
-async def update_shift_report(shift_id: int, restaurant_id: int, report_json: str):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "UPDATE shifts SET report = ? WHERE id = ? AND restaurant_id = ?", 
-            (report_json, shift_id, restaurant_id)
-        )
-        await db.commit()
+async def _finalize_duties(db, shift_id: int, item_ids: List[int]):
+    """Приводит отметки смены к итоговому чек-листу: лишние пункты убираются, недостающие — как невыполненные.
+    Смены, где не было ни одной отметки, не трогаем (в KPI они не учитываются)."""
+    async with db.execute("SELECT 1 FROM shift_duties WHERE shift_id = ? LIMIT 1", (shift_id,)) as cur:
+        if not await cur.fetchone():
+            return
+
+    if item_ids:
+        placeholders = ','.join(['?'] * len(item_ids))
+        await db.execute(f"DELETE FROM shift_duties WHERE shift_id = ? AND item_id NOT IN ({placeholders})", (shift_id, *item_ids))
+    else:
+        await db.execute("DELETE FROM shift_duties WHERE shift_id = ?", (shift_id,))
+    await db.executemany(
+        "INSERT OR IGNORE INTO shift_duties (shift_id, item_id, done) VALUES (?, ?, 0)",
+        [(shift_id, item_id) for item_id in item_ids]
+    )
+
+async def set_duty(shift_id: int, item_id: int, done: bool):
+    """Отметка копится в памяти (app.database.duty_buffer) и попадает в БД со следующим сбросом."""
+    duty_buffer.set_duty(shift_id, item_id, done, now())
+
+async def get_duties_map(shift_id: int) -> Dict[int, bool]:
+    return await duty_buffer.get_map(shift_id)
 
 async def get_last_shifts(tg_id: int, restaurant_id: int, limit: int = 5) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("""
             SELECT * FROM shifts 
             WHERE user_id = ? AND restaurant_id = ? AND ended_at IS NOT NULL 
@@ -51,74 +86,48 @@ async def get_last_shifts(tg_id: int, restaurant_id: int, limit: int = 5) -> Lis
         """, (tg_id, restaurant_id, limit)) as cur:
             return [dict(row) for row in await cur.fetchall()]
 
-async def get_all_active_shifts_data(restaurant_id: int) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT s.*, u.full_name 
-            FROM shifts s
-            JOIN users u ON s.user_id = u.tg_id AND s.restaurant_id = u.restaurant_id
-            WHERE s.ended_at IS NULL AND s.restaurant_id = ?
-        """, (restaurant_id,)) as cur:
-            return [dict(row) for row in await cur.fetchall()]
+async def get_all_open_shifts() -> List[Dict]:
+    return await active_shifts.all_shifts()
 
-async def get_monthly_stats(tg_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT * FROM shifts 
-            WHERE user_id = ? 
-            AND restaurant_id = ?
-            AND ended_at IS NOT NULL
-            AND started_at >= COALESCE(
-                (SELECT kpi_reset_at FROM users WHERE tg_id = ? AND restaurant_id = ?), 
-                date('now', '-30 days')
-            )
-        """, (tg_id, restaurant_id, tg_id, restaurant_id)) as cur:
-            return [dict(row) for row in await cur.fetchall()]
+async def get_all_active_shifts_data(restaurant_id: int) -> List[Dict]:
+    return await active_shifts.for_restaurant(restaurant_id)
 
-async def get_shifts_paginated(restaurant_id: int, page: int = 0, per_page: int = 10):
-    offset = page * per_page
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT s.*, u.full_name 
-            FROM shifts s
-            JOIN users u ON s.user_id = u.tg_id AND s.restaurant_id = u.restaurant_id
-            WHERE s.restaurant_id = ? AND s.ended_at IS NOT NULL 
-            ORDER BY s.id DESC LIMIT ? OFFSET ?
-        """, (restaurant_id, per_page, offset)) as cur:
-            return [dict(row) for row in await cur.fetchall()]
+async def get_shifts_page(restaurant_id: int, cursor: Optional[str] = None, per_page: int = 10) -> Dict:
+    return await pagination.fetch_page("""
+        SELECT s.*, u.full_name 
+        FROM shifts s
+        JOIN users u ON s.user_id = u.tg_id AND s.restaurant_id = u.restaurant_id
+        WHERE s.restaurant_id = ? AND s.ended_at IS NOT NULL
+    """, (restaurant_id,), cursor, per_page, "s.id")
 
-async def count_total_shifts(restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT COUNT(*) FROM shifts WHERE restaurant_id = ? AND ended_at IS NOT NULL", (restaurant_id,)) as cur:
-            res = await cur.fetchone()
-            return res[0] if res else 0
+async def count_total_shifts(restaurant_id: int) -> int:
+    """Число закрытых смен по итогам kpi_rollup — без COUNT(*) по всей таблице смен."""
+    async with acquire() as db:
+        async with db.execute("SELECT COALESCE(SUM(shifts), 0) FROM kpi_rollup WHERE restaurant_id = ?", (restaurant_id,)) as cur:
+            return (await cur.fetchone())[0]
 
-async def get_user_shifts_paginated(user_id: int, restaurant_id: int, page: int = 0, per_page: int = 10):
-    offset = page * per_page
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT * FROM shifts 
-            WHERE user_id = ? AND restaurant_id = ? AND ended_at IS NOT NULL 
-            ORDER BY id DESC LIMIT ? OFFSET ?
-        """, (user_id, restaurant_id, per_page, offset)) as cur:
-            return [dict(row) for row in await cur.fetchall()]
+async def get_user_shifts_page(user_id: int, restaurant_id: int, cursor: Optional[str] = None, per_page: int = 10) -> Dict:
+    return await pagination.fetch_page("""
+        SELECT * FROM shifts 
+        WHERE user_id = ? AND restaurant_id = ? AND ended_at IS NOT NULL
+    """, (user_id, restaurant_id), cursor, per_page, "id")
 
-async def count_user_shifts(user_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT COUNT(*) FROM shifts WHERE user_id = ? AND restaurant_id = ? AND ended_at IS NOT NULL", (user_id, restaurant_id)) as cur:
-            res = await cur.fetchone()
-            return res[0] if res else 0
+async def count_user_shifts(user_id: int, restaurant_id: int) -> int:
+    async with acquire() as db:
+        async with db.execute(
+            "SELECT COALESCE(SUM(shifts), 0) FROM kpi_rollup WHERE user_id = ? AND restaurant_id = ?", 
+            (user_id, restaurant_id)
+        ) as cur:
+            return (await cur.fetchone())[0]
 
 async def clear_all_restaurant_shifts(restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute("DELETE FROM shifts WHERE restaurant_id = ? AND ended_at IS NOT NULL", (restaurant_id,))
+        await db.execute("DELETE FROM kpi_rollup WHERE restaurant_id = ?", (restaurant_id,))
         await db.commit()
 
 async def clear_user_shifts(user_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute("DELETE FROM shifts WHERE user_id = ? AND restaurant_id = ? AND ended_at IS NOT NULL", (user_id, restaurant_id))
+        await db.execute("DELETE FROM kpi_rollup WHERE user_id = ? AND restaurant_id = ?", (user_id, restaurant_id))
         await db.commit()
\ No newline at end of file
@@ -1,33 +1,54 @@
-import aiosqlite
 from typing import List, Dict, Optional
-from app.core.config import DB_PATH
+from app.core import deadlines
+from app.database.connection import acquire
+from app.database import pagination
 
 async def create_personal_task_with_deadline(text: str, reward: int, deadline: str, tg_id: int, restaurant_id: int) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         cursor = await db.execute(
             """INSERT INTO extra_tasks (restaurant_id, text, reward, deadline, assigned_to, status) 
                VALUES (?, ?, ?, ?, ?, 'pending')""", 
             (restaurant_id, text, reward, deadline, tg_id)
         )
         await db.commit()
-        return cursor.lastrowid
+    deadlines.schedule(cursor.lastrowid, deadline)
+    return cursor.lastrowid
 
 async def set_task_message_id(task_id: int, message_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute("UPDATE extra_tasks SET message_id = ? WHERE id = ?", (message_id, task_id))
         await db.commit()
 
-async def mark_task_completed(task_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "UPDATE extra_tasks SET status = 'completed' WHERE id = ? AND restaurant_id = ?", 
-            (task_id, restaurant_id)
-        )
+async def complete_task(task_id: int, restaurant_id: int, now: str) -> Optional[Dict]:
+    """Выполняет pending-задачу и начисляет награду одной транзакцией.
+    Если срок уже прошел, задача помечается expired. Возвращает задачу с новым статусом
+    ('completed' или 'expired') или None, если задача уже неактуальна — повторное нажатие ничего не начислит."""
+    async with acquire() as db:
+        async with db.execute("""
+            UPDATE extra_tasks SET status = 'completed'
+            WHERE id = ? AND restaurant_id = ? AND status = 'pending' AND (deadline IS NULL OR deadline >= ?)
+            RETURNING id, text, reward, assigned_to, status
+        """, (task_id, restaurant_id, now)) as cur:
+            row = await cur.fetchone()
+        if row:
+            await db.execute(
+                "UPDATE users SET balance = COALESCE(balance, 0) + ? WHERE tg_id = ? AND restaurant_id = ?",
+                (row["reward"], row["assigned_to"], restaurant_id)
+            )
+        else:
+            async with db.execute("""
+                UPDATE extra_tasks SET status = 'expired'
+                WHERE id = ? AND restaurant_id = ? AND status = 'pending'
+                RETURNING id, text, reward, assigned_to, status
+            """, (task_id, restaurant_id)) as cur:
+                row = await cur.fetchone()
         await db.commit()
+    if not row: return None
+    deadlines.unschedule(task_id)
+    return dict(row)
 
 async def get_task_details(task_id: int, restaurant_id: int) -> Optional[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute(
             "SELECT * FROM extra_tasks WHERE id = ? AND restaurant_id = ?", 
             (task_id, restaurant_id)
@@ -35,20 +56,16 @@ async def get_task_details(task_id: int, restaurant_id: int) -> Optional[Dict]:
             row = await cur.fetchone()
             return dict(row) if row else None
 
-async def get_tasks_history(restaurant_id: int, limit: int = 10) -> List[dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT t.id, t.text, t.reward, t.status, u.full_name 
-            FROM extra_tasks t
-            LEFT JOIN users u ON t.assigned_to = u.tg_id AND t.restaurant_id = u.restaurant_id
-            WHERE t.restaurant_id = ?
-            ORDER BY t.id DESC LIMIT ?
-        """, (restaurant_id, limit)) as cur:
-            return [dict(row) for row in await cur.fetchall()]
+async def get_tasks_history(restaurant_id: int, cursor: Optional[str] = None, limit: int = 10) -> Dict:
+    return await pagination.fetch_page("""
+        SELECT t.id, t.text, t.reward, t.status, u.full_name 
+        FROM extra_tasks t
+        LEFT JOIN users u ON t.assigned_to = u.tg_id AND t.restaurant_id = u.restaurant_id
+        WHERE t.restaurant_id = ?
+    """, (restaurant_id,), cursor, limit, "t.id")
 
 async def add_bonus(tg_id: int, restaurant_id: int, amount: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "UPDATE users SET balance = COALESCE(balance, 0) + ? WHERE tg_id = ? AND restaurant_id = ?", 
             (amount, tg_id, restaurant_id)
@@ -56,7 +73,7 @@ async def add_bonus(tg_id: int, restaurant_id: int, amount: int):
         await db.commit()
 
 async def get_balance(tg_id: int, restaurant_id: int) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute(
             "SELECT balance FROM users WHERE tg_id = ? AND restaurant_id = ?", 
             (tg_id, restaurant_id)
@@ -65,8 +82,7 @@ async def get_balance(tg_id: int, restaurant_id: int) -> int:
             return row[0] if row else 0
         
 async def get_pending_tasks_details(restaurant_id: int) -> List[dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("""
             SELECT t.id, t.text, t.assigned_to, t.message_id, u.full_name 
             FROM extra_tasks t
@@ -77,15 +93,37 @@ async def get_pending_tasks_details(restaurant_id: int) -> List[dict]:
             return [dict(row) for row in await cur.fetchall()]
 
 async def cancel_task_in_db(task_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "UPDATE extra_tasks SET status = 'canceled' WHERE id = ? AND restaurant_id = ?", 
             (task_id, restaurant_id)
         )
         await db.commit()
+    deadlines.unschedule(task_id)
+
+async def expire_tasks(task_ids: List[int], now: str) -> List[Dict]:
+    """Одним UPDATE переводит просроченные pending-задачи в expired и возвращает их строки."""
+    if not task_ids: return []
+    placeholders = ','.join(['?'] * len(task_ids))
+    async with acquire() as db:
+        async with db.execute(f"""
+            UPDATE extra_tasks SET status = 'expired'
+            WHERE id IN ({placeholders}) AND status = 'pending' AND deadline <= ?
+            RETURNING id, text, reward, assigned_to, message_id, restaurant_id,
+                (SELECT u.full_name FROM users u
+                 WHERE u.tg_id = extra_tasks.assigned_to AND u.restaurant_id = extra_tasks.restaurant_id) AS full_name
+        """, (*task_ids, now)) as cur:
+            rows = [dict(row) for row in await cur.fetchall()]
+        await db.commit()
+    return rows
+
+async def get_pending_deadlines() -> List[tuple]:
+    async with acquire() as db:
+        async with db.execute("SELECT id, deadline FROM extra_tasks WHERE status = 'pending' AND deadline IS NOT NULL") as cur:
+            return [(row[0], row[1]) for row in await cur.fetchall()]
 
 async def reset_balance(tg_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "UPDATE users SET balance = 0 WHERE tg_id = ? AND restaurant_id = ?", 
             (tg_id, restaurant_id)
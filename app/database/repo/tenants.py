@@ -0,0 +1,32 @@
+from typing import Optional, Dict, Any
+from app.database.connection import acquire
+from app.database import cache
+
+def empty_meta() -> Dict[str, Any]:
+    """Метаданные для пользователя без активного заведения."""
+    return {"id": None, "title": None, "owner_tg_id": None, "is_active": False, "roles_map": {}, "admin_ids": []}
+
+async def get_tenant_meta(restaurant_id: int) -> Optional[Dict[str, Any]]:
+    """Название, статус, карта ролей и список админов заведения. Читается из кэша,
+    сбрасывается при изменении ролей, пользователей и самого заведения."""
+    cached = cache.get_tenant(restaurant_id)
+    if cached is not cache.MISS:
+        return cached
+
+    version = cache.tenant_version()
+    async with acquire() as db:
+        async with db.execute("SELECT id, title, owner_tg_id, is_active FROM restaurants WHERE id = ?", (restaurant_id,)) as cur:
+            row = await cur.fetchone()
+        if row:
+            meta = dict(row)
+            async with db.execute("SELECT slug, name FROM roles WHERE restaurant_id = ?", (restaurant_id,)) as cur:
+                meta["roles_map"] = {r['slug']: r['name'] for r in await cur.fetchall()}
+            async with db.execute(
+                "SELECT tg_id FROM users WHERE role = 'admin' AND restaurant_id = ?", (restaurant_id,)
+            ) as cur:
+                meta["admin_ids"] = [r[0] for r in await cur.fetchall()]
+        else:
+            meta = None
+
+    cache.put_tenant(restaurant_id, meta, version)
+    return meta
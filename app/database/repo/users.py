@@ -1,14 +1,19 @@
-import aiosqlite
 import hashlib
 from datetime import datetime
-from typing import Optional, List, Dict
-from app.core.config import DB_PATH, TZ
+from typing import Optional, List, Dict, Tuple
+from app.core.config import TZ
+from app.core import reminder_wheel, shards
+from app.database.connection import acquire
+from app.database import cache, active_shifts, duty_buffer, routes
+from app.database.repo import tenants
 
 def hash_pin(pin: str) -> str:
     return hashlib.sha256(pin.encode()).hexdigest()
 
+@shards.owned()
 async def add_user(tg_id: int, restaurant_id: int, full_name: str, role: str, pin: str):
-    async with aiosqlite.connect(DB_PATH) as db:
+    await active_shifts.load()
+    async with acquire() as db:
         await db.execute("""
             INSERT INTO users (tg_id, restaurant_id, full_name, role, pin_hash, is_active)
             VALUES (?, ?, ?, ?, ?, 1)
@@ -16,10 +21,12 @@ async def add_user(tg_id: int, restaurant_id: int, full_name: str, role: str, pi
                 full_name=excluded.full_name, role=excluded.role, pin_hash=excluded.pin_hash, is_active=1
         """, (tg_id, restaurant_id, full_name, role, hash_pin(pin)))
         await db.commit()
+    cache.invalidate_tenant(restaurant_id)
+    active_shifts.rename(tg_id, restaurant_id, full_name)
 
+@shards.owned()
 async def get_user(tg_id: int, restaurant_id: int) -> Optional[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute(
             "SELECT * FROM users WHERE tg_id = ? AND restaurant_id = ?", 
             (tg_id, restaurant_id)
@@ -27,9 +34,9 @@ async def get_user(tg_id: int, restaurant_id: int) -> Optional[Dict]:
             row = await cur.fetchone()
             return dict(row) if row else None
 
+@shards.gathered(shards.concat)
 async def get_user_restaurants(tg_id: int) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("""
             SELECT r.id, r.title, u.role 
             FROM users u
@@ -39,8 +46,7 @@ async def get_user_restaurants(tg_id: int) -> List[Dict]:
             return [dict(row) for row in await cur.fetchall()]
 
 async def get_all_users(restaurant_id: int) -> List[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute(
             "SELECT * FROM users WHERE restaurant_id = ? ORDER BY role", 
             (restaurant_id,)
@@ -48,7 +54,7 @@ async def get_all_users(restaurant_id: int) -> List[Dict]:
             return [dict(row) for row in await cur.fetchall()]
 
 async def delete_user(tg_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "UPDATE users SET is_active=0 WHERE tg_id=? AND restaurant_id=?", 
             (tg_id, restaurant_id)
@@ -56,36 +62,65 @@ async def delete_user(tg_id: int, restaurant_id: int):
         await db.commit()
 
 async def get_admins_ids(restaurant_id: int) -> List[int]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            "SELECT tg_id FROM users WHERE role = 'admin' AND restaurant_id = ?", 
-            (restaurant_id,)
-        ) as cur:
-            return [row[0] for row in await cur.fetchall()]
+    meta = await tenants.get_tenant_meta(restaurant_id)
+    return list(meta["admin_ids"]) if meta else []
 
+@shards.owned()
 async def create_session(tg_id: int, restaurant_id: int, role: str):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "INSERT OR REPLACE INTO sessions (user_id, active_restaurant_id, role) VALUES (?, ?, ?)", 
             (tg_id, restaurant_id, role)
         )
         await db.commit()
+    cache.invalidate_session(tg_id)
+    await routes.set_route(tg_id, restaurant_id)
+    # Сессия одна на пользователя: прежняя могла остаться в другом шарде
+    await shards.others(delete_session, tg_id)
+
+async def get_session_state(tg_id: int) -> Optional[Dict]:
+    """Сессия вместе со статусом кофейни. Читается из кэша, в БД идет только при промахе."""
+    cached = cache.get_session(tg_id)
+    if cached is not cache.MISS:
+        return cached
+
+    version = cache.session_version()
+    async with acquire() as db:
+        async with db.execute("""
+            SELECT s.active_restaurant_id, s.role, r.is_active 
+            FROM sessions s
+            LEFT JOIN restaurants r ON s.active_restaurant_id = r.id
+            WHERE s.user_id = ?
+        """, (tg_id,)) as cur:
+            row = await cur.fetchone()
+            state = dict(row) if row else None
+
+    cache.put_session(tg_id, state, version)
+    return state
 
 async def get_session_info(tg_id: int) -> Optional[Dict]:
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with acquire() as db:
         async with db.execute("SELECT active_restaurant_id, role FROM sessions WHERE user_id = ?", (tg_id,)) as cur:
             row = await cur.fetchone()
             return dict(row) if row else None
 
+@shards.remote
 async def delete_session(tg_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute("DELETE FROM sessions WHERE user_id = ?", (tg_id,))
         await db.commit()
+    cache.invalidate_session(tg_id)
+    await routes.drop(tg_id)
+
+async def get_session_routes() -> List[Tuple[int, int]]:
+    """(пользователь, кофейня) всех сессий — для справочника маршрутов."""
+    async with acquire() as db:
+        async with db.execute("SELECT user_id, active_restaurant_id FROM sessions WHERE active_restaurant_id IS NOT NULL") as cur:
+            return [(row[0], row[1]) for row in await cur.fetchall()]
 
 async def reset_user_kpi_date(tg_id: int, restaurant_id: int):
     now_str = datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         await db.execute(
             "UPDATE users SET kpi_reset_at = ? WHERE tg_id = ? AND restaurant_id = ?", 
             (now_str, tg_id, restaurant_id)
@@ -93,13 +128,21 @@ async def reset_user_kpi_date(tg_id: int, restaurant_id: int):
         await db.commit()
 
 async def fully_delete_user(tg_id: int, restaurant_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    await active_shifts.load()
+    async with acquire() as db:
         await db.execute("DELETE FROM sessions WHERE user_id = ? AND active_restaurant_id = ?", (tg_id, restaurant_id))
         await db.execute("DELETE FROM extra_tasks WHERE assigned_to = ? AND restaurant_id = ?", (tg_id, restaurant_id))
         await db.execute("DELETE FROM shifts WHERE user_id = ? AND restaurant_id = ?", (tg_id, restaurant_id))
+        await db.execute("DELETE FROM kpi_rollup WHERE user_id = ? AND restaurant_id = ?", (tg_id, restaurant_id))
         await db.execute("DELETE FROM users WHERE tg_id = ? AND restaurant_id = ?", (tg_id, restaurant_id))
         await db.commit()
+    cache.invalidate_session(tg_id)
+    cache.invalidate_tenant(restaurant_id)
+    await routes.drop(tg_id, restaurant_id)
+    for shift_id in active_shifts.remove_user(tg_id, restaurant_id):
+        duty_buffer.forget(shift_id)
+    reminder_wheel.remove_user_shifts(tg_id, restaurant_id)
 
 async def get_session_role(tg_id: int) -> Optional[str]:
-    info = await get_session_info(tg_id)
+    info = await get_session_state(tg_id)
     return info['role'] if info else None
\ No newline at end of file
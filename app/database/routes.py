@@ -0,0 +1,79 @@
+import asyncio
+from typing import Iterable, Optional, Tuple
+import aiosqlite
+from app.core.config import SHARDS, SHARD_ID, SHARD_DIR, DB_BUSY_TIMEOUT_MS
+from app.core import shards
+
+# Справочник маршрутов шардированного режима: пользователь -> кофейня его сессии.
+# Пишут воркеры при входе и выходе (repo-функции сессий, после коммита), читает роутер.
+# Файл общий для всех процессов — SHARD_DIR/routes.db. При SHARDS=1 ничего не делает.
+
+_db: Optional[aiosqlite.Connection] = None
+_lock: Optional[asyncio.Lock] = None
+
+def _get_lock() -> asyncio.Lock:
+    global _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    return _lock
+
+async def _conn() -> aiosqlite.Connection:
+    global _db
+    if _db is None:
+        async with _get_lock():
+            if _db is None:
+                SHARD_DIR.mkdir(parents=True, exist_ok=True)
+                db = await aiosqlite.connect(SHARD_DIR / "routes.db")
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+                await db.execute("CREATE TABLE IF NOT EXISTS routes (user_id INTEGER PRIMARY KEY, restaurant_id INTEGER NOT NULL)")
+                await db.commit()
+                _db = db
+    return _db
+
+async def lookup(user_id: int) -> Optional[int]:
+    """Кофейня активной сессии пользователя или None."""
+    db = await _conn()
+    async with db.execute("SELECT restaurant_id FROM routes WHERE user_id = ?", (user_id,)) as cur:
+        row = await cur.fetchone()
+        return row[0] if row else None
+
+async def set_route(user_id: int, restaurant_id: int):
+    if not shards.enabled():
+        return
+    db = await _conn()
+    await db.execute("INSERT OR REPLACE INTO routes (user_id, restaurant_id) VALUES (?, ?)", (user_id, restaurant_id))
+    await db.commit()
+
+async def drop(user_id: int, restaurant_id: Optional[int] = None):
+    """Сессия пользователя в этом шарде закрыта. Маршрут в другой шард не трогаем —
+    он мог появиться раньше, чем сюда дошло удаление старой сессии."""
+    if not shards.enabled():
+        return
+    db = await _conn()
+    await db.execute(
+        "DELETE FROM routes WHERE user_id = ? AND restaurant_id % ? = ? AND restaurant_id = COALESCE(?, restaurant_id)",
+        (user_id, SHARDS, SHARD_ID, restaurant_id)
+    )
+    await db.commit()
+
+async def drop_restaurant(restaurant_id: int):
+    if not shards.enabled():
+        return
+    db = await _conn()
+    await db.execute("DELETE FROM routes WHERE restaurant_id = ?", (restaurant_id,))
+    await db.commit()
+
+async def sync(sessions: Iterable[Tuple[int, int]]):
+    """Дописывает маршруты для сессий шарда, которых нет в справочнике (старт воркера после разделения базы)."""
+    if not shards.enabled():
+        return
+    db = await _conn()
+    await db.executemany("INSERT OR IGNORE INTO routes (user_id, restaurant_id) VALUES (?, ?)", list(sessions))
+    await db.commit()
+
+async def close():
+    global _db
+    if _db is not None:
+        await _db.close()
+        _db = None
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from logging.handlers import RotatingFileHandler
+from typing import Any, List, Optional
+import aiosqlite
+from app.core.config import DB_PATH, SLOW_QUERY_LOG, SLOW_QUERY_LOG_MB, SLOW_QUERY_LOG_BACKUPS
+
+# Журнал медленных запросов (включается SLOW_QUERY_MS > 0).
+# Соединение пула замеряет execute и кладет медленные запросы в очередь; фоновая задача
+# снимает EXPLAIN QUERY PLAN через отдельное соединение и пишет запись в ротируемый файл.
+# Значения параметров не пишутся — только их типы, чтобы в лог не попадали имена и PIN-коды.
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_SIZE = 256
+QUEUE_SIZE = 1000
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)\b(?! USING)")
+_LAYER_FILES = {os.path.join(os.path.dirname(__file__), name) for name in ("connection.py", "tracing.py")}
+
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+_conn: Optional[aiosqlite.Connection] = None
+_plans: "OrderedDict[str, List[str]]" = OrderedDict()
+_file_log: Optional[logging.Logger] = None
+_dropped = 0
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+def params_shape(params: Any) -> str:
+    """Типы параметров без значений: (int, str[8], None)."""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {_kind(v)}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(_kind(v) for v in params) + ")"
+
+def _kind(value: Any) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def caller() -> str:
+    """Первая функция вне слоя подключения — обычно repo-функция, выполнившая запрос."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename in _LAYER_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+def record(sql: str, params: Any, ms: float, where: str, many: bool = False):
+    """Ставит медленный запрос в очередь на разбор. Не блокирует: при переполнении запись теряется."""
+    global _queue, _worker, _dropped
+    if _queue is None:
+        _queue = asyncio.Queue(QUEUE_SIZE)
+    if _worker is None or _worker.done():
+        _worker = asyncio.create_task(_run())
+    try:
+        _queue.put_nowait((time.time(), sql, params, ms, where, many))
+    except asyncio.QueueFull:
+        _dropped += 1
+
+def _open_log() -> logging.Logger:
+    file_log = logging.getLogger("app.database.slow_queries")
+    file_log.propagate = False
+    file_log.setLevel(logging.INFO)
+    if not file_log.handlers:
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=int(SLOW_QUERY_LOG_MB * 1024 * 1024),
+            backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        file_log.addHandler(handler)
+    return file_log
+
+def _explain_params(sql: str, params: Any, many: bool) -> Any:
+    """Параметры для EXPLAIN: важно лишь их число. Для executemany — первая строка пачки
+    (или None на каждый ?, если пачка уже прочитана итератором)."""
+    if not many:
+        return params or ()
+    if isinstance(params, (list, tuple)) and params:
+        return params[0]
+    return (None,) * sql.count("?")
+
+async def _plan(sql: str, params: Any) -> List[str]:
+    global _conn
+    key = _normalize(sql)
+    if key in _plans:
+        _plans.move_to_end(key)
+        return _plans[key]
+    if not key.upper().startswith(_EXPLAINABLE):
+        return []
+    if _conn is None:
+        _conn = await aiosqlite.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        async with _conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()) as cur:
+            plan = [row[3] for row in await cur.fetchall()]
+    except Exception as e:
+        # Не кэшируем: ошибка может быть временной (например, база заблокирована)
+        return [f"(EXPLAIN не удался: {e})"]
+    _plans[key] = plan
+    if len(_plans) > PLAN_CACHE_SIZE:
+        _plans.popitem(last=False)
+    return plan
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Таблицы, которые читаются целиком, без индекса."""
+    return [m.group(1) for m in (_FULL_SCAN.match(line.strip()) for line in plan) if m]
+
+def _format(at: float, sql: str, params: Any, ms: float, where: str, many: bool, plan: List[str]) -> str:
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(at))
+    shape = "executemany" if many else params_shape(params)
+    lines = [f"{stamp} | {ms:.1f} мс | {where} | params {shape}", f"  SQL: {_normalize(sql)}"]
+    lines += [f"  PLAN: {line}" for line in plan]
+    scans = full_scans(plan)
+    if scans:
+        lines.append(f"  ⚠️ полный просмотр без индекса: {', '.join(scans)}")
+    return "\n".join(lines)
+
+async def _run():
+    global _file_log, _dropped
+    if _file_log is None:
+        _file_log = _open_log()
+    while True:
+        at, sql, params, ms, where, many = await _queue.get()
+        try:
+            plan = await _plan(sql, _explain_params(sql, params, many))
+            _file_log.info(_format(at, sql, params, ms, where, many, plan))
+            if _dropped:
+                _file_log.info(f"  (пропущено записей из-за переполнения очереди: {_dropped})")
+                _dropped = 0
+        except Exception as e:
+            logger.warning(f"Журнал медленных запросов: {e}")
+        finally:
+            _queue.task_done()
+
+async def stop(timeout: float = 5):
+    """Дописывает очередь и закрывает служебное соединение."""
+    global _queue, _worker, _conn
+    if _queue is not None and _worker is not None and not _worker.done():
+        try:
+            await asyncio.wait_for(_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    if _worker is not None:
+        _worker.cancel()
+        try: await _worker
+        except asyncio.CancelledError: pass
+        _worker = None
+    _queue = None
+    if _conn is not None:
+        await _conn.close()
+        _conn = None
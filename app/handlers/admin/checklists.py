@@ -1,3 +1,4 @@
+from typing import Union
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
@@ -5,6 +6,7 @@ from aiogram.filters import StateFilter
 
 from app.database.repo import users as user_repo, checklists as check_repo, roles as role_repo
 from app.keyboards import reply, builders
+from app.services import checklists as checklist_service
 from app.states.states import ChecklistState
 
 router = Router()
@@ -21,9 +23,9 @@ async def back_to_roles_cl(callback: CallbackQuery, restaurant_id: int):
     await callback.message.edit_text("📝 <b>Выберите роль:</b>", reply_markup=builders.dynamic_role_select(roles, "edit_cl"))
 
 @router.callback_query(F.data.startswith("edit_cl:"))
-async def view_checklist_categories(callback: CallbackQuery, restaurant_id: int):
+async def view_checklist_categories(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     role_slug = callback.data.split(":")[1]
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     role_name = roles_map.get(role_slug, role_slug)
     
     await callback.message.edit_text(
@@ -86,9 +88,8 @@ async def confirm_delete_selected(callback: CallbackQuery, state: FSMContext, re
     selected = data.get("selected_ids", [])
     
     if selected:
-        for item_id in selected:
-            await check_repo.delete_checklist_item(item_id, restaurant_id)
-        await callback.answer(f"🗑 Удалено задач: {len(selected)}")
+        deleted = await check_repo.delete_checklist_items(selected, restaurant_id)
+        await callback.answer(f"🗑 Удалено задач: {deleted}")
     
     await state.update_data(selected_ids=[], current_page=0)
     await render_checklist_items(callback, restaurant_id, role_slug, shift_type, mode="view")
@@ -97,7 +98,7 @@ async def confirm_delete_selected(callback: CallbackQuery, state: FSMContext, re
 async def noop_handler(callback: CallbackQuery):
     await callback.answer()
 
-async def render_checklist_items(callback: CallbackQuery, restaurant_id: int, role_slug: str, shift_type: str, mode: str, state: FSMContext = None):
+async def render_checklist_items(callback: Union[CallbackQuery, Message], restaurant_id: int, role_slug: str, shift_type: str, mode: str, state: FSMContext = None):
     items = await check_repo.get_items_by_type(restaurant_id, role_slug, shift_type)
     roles_map = await role_repo.get_roles_map(restaurant_id)
     role_name = roles_map.get(role_slug, role_slug)
@@ -129,11 +130,12 @@ async def render_checklist_items(callback: CallbackQuery, restaurant_id: int, ro
         selected_ids = data.get("selected_ids", [])
         current_page = data.get("current_page", 0)
 
+    markup = builders.checklist_items_edit(items, role_slug, shift_type, mode=mode, selected_ids=selected_ids, page=current_page)
+    if isinstance(callback, Message):
+        await callback.answer(text, reply_markup=markup)
+        return
     try:
-        await callback.message.edit_text(
-            text,
-            reply_markup=builders.checklist_items_edit(items, role_slug, shift_type, mode=mode, selected_ids=selected_ids, page=current_page)
-        )
+        await callback.message.edit_text(text, reply_markup=markup)
     except:
         await callback.answer()
 
@@ -190,4 +192,46 @@ async def save_checklist_item(callback: CallbackQuery, state: FSMContext, restau
     )
     
     await state.clear()
-    await render_checklist_items(callback, restaurant_id, data['role'], data['shift_type'], mode="view")
\ No newline at end of file
+    await render_checklist_items(callback, restaurant_id, data['role'], data['shift_type'], mode="view")
+
+@router.callback_query(F.data.startswith("import_items:"))
+async def import_items_start(callback: CallbackQuery, state: FSMContext):
+    parts = callback.data.split(":")
+    await state.update_data(role=parts[1], shift_type=parts[2])
+    await state.set_state(ChecklistState.waiting_import)
+
+    await callback.message.delete()
+    await callback.message.answer(
+        "📥 <b>Импорт задач списком</b>\n\n"
+        "Пришлите список — по одной задаче на строку — или CSV-файл.\n"
+        "Тип отчета можно указать через «;» в конце строки: <code>фото</code> или <code>видео</code>.\n\n"
+        "<i>Пример:</i>\n"
+        "<code>Включить кофемашину\n"
+        "Фото витрины; фото\n"
+        "Протереть столы</code>\n\n"
+        f"Не больше {checklist_service.MAX_IMPORT_ITEMS} задач за раз, дубли пропускаются.",
+        reply_markup=reply.cancel()
+    )
+
+@router.message(ChecklistState.waiting_import, F.text | F.document)
+async def import_items_finish(message: Message, state: FSMContext, restaurant_id: int):
+    if message.document:
+        if (message.document.file_size or 0) > 256 * 1024:
+            await message.answer("⚠️ Файл слишком большой. Пришлите CSV до 256 КБ.")
+            return
+        raw = checklist_service.decode_import((await message.bot.download(message.document)).read())
+    else:
+        raw = message.text
+
+    data = await state.get_data()
+    added, duplicates = await checklist_service.import_items(restaurant_id, data['role'], data['shift_type'], raw)
+    if not added and not duplicates:
+        await message.answer("⚠️ Не нашел ни одной задачи. Пришлите список по одной задаче на строку.")
+        return
+
+    summary = f"✅ Добавлено задач: <b>{added}</b>"
+    if duplicates:
+        summary += f"\n↩️ Уже были в списке: {duplicates}"
+    await state.clear()
+    await message.answer(summary, reply_markup=ReplyKeyboardRemove())
+    await render_checklist_items(message, restaurant_id, data['role'], data['shift_type'], mode="view")
@@ -10,11 +10,11 @@ from app.states.states import ReminderState
 router = Router()
 
 @router.message(F.text == "🔔 Напоминания")
-async def reminders_menu(message: Message, restaurant_id: int):
+async def reminders_menu(message: Message, restaurant_id: int, tenant: dict):
     if await user_repo.get_session_role(message.from_user.id) != "admin": return
     
     reminders = await check_repo.get_all_reminders(restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     
     if not reminders:
         return await message.answer("🔔 <b>Список напоминаний пуст.</b>", reply_markup=builders.reminders_list_menu([], roles_map))
@@ -53,12 +53,12 @@ async def add_remind_finish(message: Message, state: FSMContext, restaurant_id:
     await message.answer("✅ Периодическое напоминание сохранено.", reply_markup=reply.admin_main())
 
 @router.callback_query(F.data.startswith("del_remind:"))
-async def delete_remind(callback: CallbackQuery, restaurant_id: int):
+async def delete_remind(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     rem_id = int(callback.data.split(":")[1])
     await check_repo.delete_reminder(rem_id, restaurant_id)
     
     reminders = await check_repo.get_all_reminders(restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     
     if not reminders:
         text = "🔔 <b>Список напоминаний пуст.</b>"
@@ -5,8 +5,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 from datetime import datetime
 
-from app.database.repo import users as user_repo, tasks as task_repo, roles as role_repo, shifts as shift_repo
-from app.database.repo import saas as saas_repo
+from app.database.repo import users as user_repo, tasks as task_repo, shifts as shift_repo
 from app.services import kpi as kpi_service
 from app.keyboards import reply, builders
 from app.states.states import MoneyState
@@ -14,19 +13,19 @@ from app.states.states import MoneyState
 router = Router()
 
 @router.message(F.text == "👥 Сотрудники")
-async def list_staff(message: Message, restaurant_id: int):
+async def list_staff(message: Message, restaurant_id: int, tenant: dict):
     if await user_repo.get_session_role(message.from_user.id) != "admin": return
     users = await user_repo.get_all_users(restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     await message.answer("📂 <b>Сотрудники:</b>", reply_markup=builders.staff_list(users, message.from_user.id, roles_map))
 
 @router.callback_query(F.data.startswith("open_staff:"))
-async def open_staff_menu(callback: CallbackQuery, restaurant_id: int):
+async def open_staff_menu(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     tg_id = int(callback.data.split(":")[1])
     user = await user_repo.get_user(tg_id, restaurant_id)
     if not user: return await callback.answer("Сотрудник не найден.")
     
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     r_name = roles_map.get(user['role'], user['role'])
     
     await callback.message.edit_text(
@@ -37,16 +36,16 @@ async def open_staff_menu(callback: CallbackQuery, restaurant_id: int):
     )
 
 @router.callback_query(F.data == "back_to_staff")
-async def back_to_staff_list(callback: CallbackQuery, restaurant_id: int):
+async def back_to_staff_list(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     users = await user_repo.get_all_users(restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     await callback.message.edit_text("📂 <b>Сотрудники:</b>", reply_markup=builders.staff_list(users, callback.from_user.id, roles_map))
 
 @router.callback_query(F.data.startswith("kpi:"))
-async def show_kpi_stats(callback: CallbackQuery, restaurant_id: int):
+async def show_kpi_stats(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     tg_id = int(callback.data.split(":")[1])
     user = await user_repo.get_user(tg_id, restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     r_name = roles_map.get(user['role'], user['role'])
     
     stats = await kpi_service.calculate_kpi(tg_id, restaurant_id)
@@ -71,7 +70,7 @@ async def show_kpi_stats(callback: CallbackQuery, restaurant_id: int):
     await callback.message.edit_text(text, reply_markup=kb.as_markup())
 
 @router.callback_query(F.data.startswith("pay_bonus:"))
-async def pay_bonus_handler(callback: CallbackQuery, restaurant_id: int):
+async def pay_bonus_handler(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     tg_id = int(callback.data.split(":")[1])
     user = await user_repo.get_user(tg_id, restaurant_id)
     amount = user['balance']
@@ -83,7 +82,7 @@ async def pay_bonus_handler(callback: CallbackQuery, restaurant_id: int):
     await callback.answer(f"✅ Выплачено {amount} баллов!", show_alert=True)
     
     user = await user_repo.get_user(tg_id, restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     r_name = roles_map.get(user['role'], user['role'])
     stats = await kpi_service.calculate_kpi(tg_id, restaurant_id)
     emoji = "✅" if stats['is_eligible'] else "⚠️"
@@ -127,19 +126,17 @@ async def ask_reset_stats(callback: CallbackQuery):
     )
 
 @router.callback_query(F.data.startswith("confirm_reset:"))
-async def confirm_reset_stats(callback: CallbackQuery, restaurant_id: int):
+async def confirm_reset_stats(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     tg_id = int(callback.data.split(":")[1])
     await user_repo.reset_user_kpi_date(tg_id, restaurant_id)
     await callback.answer("✅ Новый период начат.", show_alert=True)
-    await open_staff_menu(callback, restaurant_id)
+    await open_staff_menu(callback, restaurant_id, tenant)
 
 @router.callback_query(F.data.startswith("fire:"))
-async def ask_fire_staff(callback: CallbackQuery, restaurant_id: int):
+async def ask_fire_staff(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     tg_id = int(callback.data.split(":")[1])
     
-    restaurant_info = await saas_repo.get_restaurant_info(restaurant_id)
-    
-    if restaurant_info and restaurant_info['owner_tg_id'] == tg_id:
+    if tenant['owner_tg_id'] == tg_id:
         return await callback.answer("⛔ Нельзя удалить Владельца кофейни!", show_alert=True)
         
     if tg_id == callback.from_user.id:
@@ -160,11 +157,11 @@ async def ask_fire_staff(callback: CallbackQuery, restaurant_id: int):
     )
 
 @router.callback_query(F.data.startswith("confirm_fire:"))
-async def confirm_fire_staff(callback: CallbackQuery, restaurant_id: int):
+async def confirm_fire_staff(callback: CallbackQuery, restaurant_id: int, tenant: dict):
     tg_id = int(callback.data.split(":")[1])
     await user_repo.fully_delete_user(tg_id, restaurant_id)
     await callback.answer("✅ Сотрудник удален.", show_alert=True)
-    await back_to_staff_list(callback, restaurant_id)
+    await back_to_staff_list(callback, restaurant_id, tenant)
 
 @router.callback_query(F.data.startswith("money:"))
 async def money_start(callback: CallbackQuery, state: FSMContext):
@@ -231,18 +228,21 @@ async def money_reason_handler(message: Message, state: FSMContext, restaurant_i
 async def show_user_history(callback: CallbackQuery, restaurant_id: int):
     parts = callback.data.split(":")
     target_id, page = int(parts[1]), int(parts[2])
+    cursor = parts[3] if len(parts) > 3 else None
     per_page = 5 
-    total_count = await shift_repo.count_user_shifts(target_id, restaurant_id)
-    total_pages = (total_count + per_page - 1) // per_page
-    user = await user_repo.get_user(target_id, restaurant_id)
+    result = await shift_repo.get_user_shifts_page(target_id, restaurant_id, cursor, per_page)
+    if not result['rows'] and cursor:
+        page, result = 0, await shift_repo.get_user_shifts_page(target_id, restaurant_id, None, per_page)
     
-    if total_count == 0:
+    if not result['rows']:
         return await callback.answer("Нет закрытых смен.", show_alert=True)
 
-    shifts = await shift_repo.get_user_shifts_paginated(target_id, restaurant_id, page, per_page)
+    total_count = await shift_repo.count_user_shifts(target_id, restaurant_id)
+    total_pages = (total_count + per_page - 1) // per_page
+    user = await user_repo.get_user(target_id, restaurant_id)
     text = f"📜 <b>История: {user['full_name']}</b>\n\n" 
     
-    for s in shifts:
+    for s in result['rows']:
         start = datetime.strptime(s['started_at'], "%Y-%m-%d %H:%M:%S")
         end = datetime.strptime(s['ended_at'], "%Y-%m-%d %H:%M:%S")
         try:
@@ -251,7 +251,7 @@ async def show_user_history(callback: CallbackQuery, restaurant_id: int):
         except: comment = '—'
         text += f"📅 <b>{start.strftime('%d.%m.%y')}</b>\n🕘 {start.strftime('%H:%M')} - {end.strftime('%H:%M')}\n💬 <i>{comment}</i>\n──────────────────\n"
 
-    await callback.message.edit_text(text, reply_markup=builders.shift_history_kb(page, total_pages, target_id))
+    await callback.message.edit_text(text, reply_markup=builders.shift_history_kb(page, total_pages, target_id, result['newer'], result['older']))
 
 @router.callback_query(F.data.startswith("clear_user_history:"))
 async def ask_clear_user_history(callback: CallbackQuery):
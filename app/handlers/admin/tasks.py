@@ -1,4 +1,3 @@
-import aiosqlite
 from datetime import datetime, timedelta
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
@@ -6,11 +5,11 @@ from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 from aiogram.exceptions import TelegramBadRequest
 
-from app.core.config import TZ, DB_PATH
-from app.database.repo import users as user_repo, tasks as task_repo, shifts as shift_repo, roles as role_repo
+from app.core.config import TZ
+from app.database.repo import users as user_repo, tasks as task_repo, shifts as shift_repo
 from app.keyboards import builders, reply
 from app.states.states import TaskState
-from app.services import tasks as task_service
+from app.services import tasks as task_service, outbound, notify
 
 router = Router()
 
@@ -24,9 +23,7 @@ async def complete_task_handler(callback: CallbackQuery, restaurant_id: int):
             await callback.message.edit_text(f"✅ <b>ВЫПОЛНЕНО!</b>\n💰 Вам начислено: +{reward} баллов")
             user = await user_repo.get_user(callback.from_user.id, restaurant_id)
             admin_msg = f"🔔 <b>ЗАДАЧА ВЫПОЛНЕНА!</b>\n👤 {user['full_name']}\n📝 {text}\n💰 +{reward}"
-            for admin_id in await user_repo.get_admins_ids(restaurant_id):
-                try: await callback.bot.send_message(admin_id, admin_msg)
-                except: pass
+            notify.notify_admins(restaurant_id, notify.text(callback.bot, admin_msg))
         elif reward == -1:
             await callback.message.edit_text(f"⏳ <b>ВРЕМЯ ИСТЕКЛО!</b>\nВы не успели выполнить задачу вовремя.")
         else:
@@ -48,20 +45,37 @@ async def tasks_main_menu(message: Message):
     )
     await message.answer("📝 <b>Управление заданиями:</b>", reply_markup=kb)
 
+def _tasks_history_text(rows) -> str:
+    text = "📜 <b>Последние задания:</b>\n\n"
+    for t in rows:
+        status_icon = {"completed": "✅", "expired": "⏳", "canceled": "🚫", "pending": "🕒"}.get(t['status'], "❓")
+        text += f"{status_icon} <b>{t['full_name']}</b>: {t['text']} ({t['reward']})\n"
+    return text
+
 @router.message(F.text == "📜 История заданий")
 async def tasks_history(message: Message, restaurant_id: int):
     if await user_repo.get_session_role(message.from_user.id) != "admin": return
     
     history = await task_repo.get_tasks_history(restaurant_id, limit=10)
-    if not history:
+    if not history['rows']:
         return await message.answer("📭 История пуста.")
         
-    text = "📜 <b>Последние 10 заданий:</b>\n\n"
-    for t in history:
-        status_icon = {"completed": "✅", "expired": "⏳", "canceled": "🚫", "pending": "🕒"}.get(t['status'], "❓")
-        text += f"{status_icon} <b>{t['full_name']}</b>: {t['text']} ({t['reward']})\n"
-        
-    await message.answer(text)
+    await message.answer(_tasks_history_text(history['rows']), reply_markup=builders.tasks_history_kb(0, history['newer'], history['older']))
+
+@router.callback_query(F.data.startswith("tasks_history:"))
+async def tasks_history_page(callback: CallbackQuery, restaurant_id: int):
+    if await user_repo.get_session_role(callback.from_user.id) != "admin": return await callback.answer()
+    _, page, cursor = callback.data.split(":", 2)
+    history = await task_repo.get_tasks_history(restaurant_id, cursor, limit=10)
+    if not history['rows']:
+        return await callback.answer("📭 История пуста.", show_alert=True)
+    try:
+        await callback.message.edit_text(
+            _tasks_history_text(history['rows']),
+            reply_markup=builders.tasks_history_kb(int(page), history['newer'], history['older'])
+        )
+    except TelegramBadRequest: pass
+    await callback.answer()
 
 @router.message(F.text == "📝 Дать задание")
 async def start_task(message: Message, state: FSMContext):
@@ -88,7 +102,7 @@ async def task_reward(message: Message, state: FSMContext):
     await message.answer("⏳ Срок выполнения (минуты, например 30, или часы '1ч'):")
 
 @router.message(TaskState.waiting_hours)
-async def task_deadline_parse(message: Message, state: FSMContext, restaurant_id: int):
+async def task_deadline_parse(message: Message, state: FSMContext, restaurant_id: int, tenant: dict):
     raw = message.text.lower().strip()
     try:
         if 'ч' in raw or 'h' in raw:
@@ -108,7 +122,7 @@ async def task_deadline_parse(message: Message, state: FSMContext, restaurant_id
 
     active_ids = [s['user_id'] for s in active_shifts]
     users = await user_repo.get_all_users(restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     
     await state.set_state(TaskState.waiting_employee)
     await message.answer("👉 Кому отправить задание?", reply_markup=builders.task_assign_menu(users, message.from_user.id, active_ids, roles_map))
@@ -126,14 +140,15 @@ async def task_finish(callback: CallbackQuery, state: FSMContext, bot: Bot, rest
     
     kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="✅ Я выполнил!", callback_data=f"done_task:{tid}")]])
     
+    msg_text = (
+        f"⚡️ <b>НОВОЕ ЗАДАНИЕ!</b>\n\n"
+        f"📝 {data['text']}\n"
+        f"⏳ Срок: {data['time_display']}\n"
+        f"💰 Награда: +{data['reward']} баллов"
+    )
+    sent_msg = await outbound.send_message(bot, target_id, msg_text, priority=outbound.INTERACTIVE, reply_markup=kb)
     try:
-        msg_text = (
-            f"⚡️ <b>НОВОЕ ЗАДАНИЕ!</b>\n\n"
-            f"📝 {data['text']}\n"
-            f"⏳ Срок: {data['time_display']}\n"
-            f"💰 Награда: +{data['reward']} баллов"
-        )
-        sent_msg = await bot.send_message(target_id, msg_text, reply_markup=kb)
+        if not sent_msg: raise RuntimeError("not delivered")
         await task_repo.set_task_message_id(tid, sent_msg.message_id)
         
         await callback.message.delete()
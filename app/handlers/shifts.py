@@ -1,4 +1,3 @@
-import json
 from datetime import datetime
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
@@ -9,9 +8,8 @@ from app.core.config import WEB_APP_URL, TZ
 from app.database.repo import users as user_repo
 from app.database.repo import shifts as shift_repo
 from app.database.repo import checklists as check_repo
-from app.database.repo import roles as role_repo
 from app.database.repo import tasks as task_repo 
-from app.services import shift as shift_service
+from app.services import shift as shift_service, notify
 from app.keyboards import reply, builders
 from app.states.states import ShiftState 
 
@@ -56,7 +54,7 @@ async def start_wrong_media(message: Message):
     await message.answer("❌ <b>Ошибка!</b>\nЯ жду <b>ВИДЕО-КРУЖОК</b>.\nЗапишите кружок или нажмите «Отмена».")
 
 @router.message(ShiftState.waiting_for_photo_start, F.video_note)
-async def start_shift_with_video(message: Message, state: FSMContext, restaurant_id: int):
+async def start_shift_with_video(message: Message, state: FSMContext, restaurant_id: int, tenant: dict):
     tg_id = message.from_user.id
     video_note_id = message.video_note.file_id
     
@@ -73,39 +71,29 @@ async def start_shift_with_video(message: Message, state: FSMContext, restaurant
     await message.answer("☀️ <b>Смена открыта!</b>", reply_markup=reply.menu_shift_open(WEB_APP_URL))
     await state.clear()
     
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     r_name = roles_map.get(role, role)
     type_rus = {"morning": "Утро", "evening": "Вечер", "full": "Полная"}.get(shift_type, shift_type)
     time_now = datetime.now(TZ).strftime('%H:%M')
 
-    for admin_id in await user_repo.get_admins_ids(restaurant_id):
-        try:
-            await message.bot.send_video_note(admin_id, video_note_id)
-            await message.bot.send_message(admin_id, f"☀️ <b>СМЕНА ОТКРЫТА ({type_rus})</b>\n👤 {user_info['full_name']} (<b>{r_name}</b>)\n📅 {time_now}")
-        except: pass
+    notify.notify_admins(
+        restaurant_id,
+        notify.video_note(message.bot, video_note_id),
+        notify.text(message.bot, f"☀️ <b>СМЕНА ОТКРЫТА ({type_rus})</b>\n👤 {user_info['full_name']} (<b>{r_name}</b>)\n📅 {time_now}"),
+    )
 
 @router.message(F.text == "⚡️ Онлайн Чек-лист")
-async def open_live_checklist(message: Message, restaurant_id: int):
+async def open_live_checklist(message: Message, restaurant_id: int, tenant: dict):
     tg_id = message.from_user.id
     active = await shift_repo.get_active_shift(tg_id, restaurant_id)
     if not active: return await message.answer("Смена не открыта.")
     
     tasks_list = await check_repo.get_checklist(restaurant_id, active['role'], active['shift_type'])
     
-    try:
-        data = json.loads(active['report']) if active['report'] else {}
-        user_duties = data.get('duties', [])
-    except: 
-        user_duties = []
+    duties_map = await shift_repo.get_duties_map(active['id'])
+    status_list = shift_service.build_status_list(tasks_list, duties_map)
     
-    status_list = []
-    for i in range(len(tasks_list)):
-        if i < len(user_duties):
-            status_list.append(user_duties[i].get('done', False))
-        else:
-            status_list.append(False)
-    
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     r_name = roles_map.get(active['role'], active['role'])
     
     await message.answer(
@@ -164,14 +152,10 @@ async def handle_checklist_media(message: Message, state: FSMContext, restaurant
     
     admin_msg = f"📸 <b>ОТЧЕТ ПО ЗАДАЧЕ</b>\n👤 {user['full_name']}\n📝 {task['text']}"
     
-    for admin_id in await user_repo.get_admins_ids(restaurant_id):
-        try:
-            if message.photo: await message.bot.send_photo(admin_id, message.photo[-1].file_id, caption=admin_msg)
-            elif message.video: await message.bot.send_video(admin_id, message.video.file_id, caption=admin_msg)
-            elif message.video_note:
-                await message.bot.send_message(admin_id, admin_msg)
-                await message.bot.send_video_note(admin_id, message.video_note.file_id)
-        except: pass
+    if message.video_note:
+        notify.notify_admins(restaurant_id, notify.text(message.bot, admin_msg), notify.media_copy(message))
+    else:
+        notify.notify_admins(restaurant_id, notify.media_copy(message, caption=admin_msg))
 
     status_list = await shift_service.toggle_duty(
         message.from_user.id, restaurant_id, index, True, tasks_list
@@ -202,7 +186,7 @@ async def submit_checklist_ask_comment(callback: CallbackQuery, state: FSMContex
     await callback.answer()
 
 @router.message(ShiftState.waiting_checklist_comment)
-async def submit_checklist_process(message: Message, state: FSMContext, restaurant_id: int):
+async def submit_checklist_process(message: Message, state: FSMContext, restaurant_id: int, tenant: dict):
     if message.text == "❌ Отмена":
         await state.clear()
         return await message.answer("Отменено.", reply_markup=reply.menu_shift_open(WEB_APP_URL))
@@ -218,20 +202,14 @@ async def submit_checklist_process(message: Message, state: FSMContext, restaura
         return await message.answer("Смена уже неактивна.", reply_markup=reply.menu_shift_open(WEB_APP_URL))
 
     tasks_list = await check_repo.get_checklist(restaurant_id, active['role'], active['shift_type'])
-    try:
-        data_report = json.loads(active['report']) if active['report'] else {}
-        user_duties = data_report.get('duties', [])
-    except: user_duties = []
+    duties_map = await shift_repo.get_duties_map(active['id'])
     
     completed_count = 0
     visual = ""
-    for i, task_data in enumerate(tasks_list):
+    for task_data in tasks_list:
         title = task_data['text']
-        is_done = False
-        if i < len(user_duties):
-            is_done = user_duties[i].get('done', False)
         
-        if is_done:
+        if duties_map.get(task_data['id'], False):
             visual += f"✅ {title}\n"
             completed_count += 1
         else:
@@ -241,7 +219,7 @@ async def submit_checklist_process(message: Message, state: FSMContext, restaura
     percent = int((completed_count / total) * 100) if total > 0 else 0
     
     user = await user_repo.get_user(message.from_user.id, restaurant_id)
-    roles_map = await role_repo.get_roles_map(restaurant_id)
+    roles_map = tenant['roles_map']
     r_name = roles_map.get(active['role'], active['role'])
     
     msg_text = (
@@ -255,10 +233,7 @@ async def submit_checklist_process(message: Message, state: FSMContext, restaura
     
     msg_text += f"\n{visual}"
 
-    for admin_id in await user_repo.get_admins_ids(restaurant_id):
-        try:
-            await message.bot.send_message(admin_id, msg_text)
-        except: pass
+    notify.notify_admins(restaurant_id, notify.text(message.bot, msg_text))
     
     await state.clear()
     await message.answer("✅ Отчет отправлен!", reply_markup=reply.menu_shift_open(WEB_APP_URL))
@@ -306,11 +281,11 @@ async def end_shift_with_video(message: Message, state: FSMContext, restaurant_i
     await message.answer(result['user_report'], reply_markup=reply.menu_shift_closed())
     await state.clear()
     
-    for admin_id in await user_repo.get_admins_ids(restaurant_id):
-        try:
-            await message.bot.send_video_note(admin_id, video_note_id)
-            await message.bot.send_message(admin_id, result['user_report'])
-        except: pass
+    notify.notify_admins(
+        restaurant_id,
+        notify.video_note(message.bot, video_note_id),
+        notify.text(message.bot, result['user_report']),
+    )
 
 @router.message(F.text == "💰 Мой баланс")
 async def balance_btn(message: Message, restaurant_id: int):
@@ -1,3 +1,4 @@
+import asyncio
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.filters import Command, StateFilter
@@ -5,7 +6,9 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
 from app.core.config import SUPER_ADMIN_PASSWORD
+from app.database import cache
 from app.database.repo import saas as saas_repo
+from app.services import outbound
 from app.keyboards import reply
 from app.states.states import RootState
 
@@ -13,12 +16,14 @@ router = Router()
 
 async def get_dashboard_data():
     stats = await saas_repo.get_platform_stats()
+    checklist_cache = cache.get_checklist_stats()
     text = (
         f"🌌 <b>SaaS MASTER PANEL</b>\n"
         f"━━━━━━━━━━━━━━━━━━\n"
         f"🏢 <b>Кофейни:</b> {stats['cafes']}\n"
         f"👥 <b>Пользователи:</b> {stats['users']}\n"
         f"🟢 <b>Активные смены:</b> {stats['shifts']}\n"
+        f"⚡️ <b>Кэш чек-листов:</b> {checklist_cache['hit_rate']:.0%} ({checklist_cache['hits']}/{checklist_cache['misses']})\n"
         f"━━━━━━━━━━━━━━━━━━\n"
         f"<i>Выберите системное действие:</i>"
     )
@@ -122,12 +127,11 @@ async def root_broadcast_finish(message: Message, state: FSMContext, bot: Bot):
         return await message.answer(dash_text, reply_markup=dash_kb)
 
     owners = await saas_repo.get_all_owners_ids()
-    count = 0
-    for o_id in owners:
-        try:
-            await bot.send_message(o_id, f"📢 <b>УВЕДОМЛЕНИЕ:</b>\n\n{message.text}")
-            count += 1
-        except: pass
+    results = await asyncio.gather(*[
+        outbound.send_message(bot, o_id, f"📢 <b>УВЕДОМЛЕНИЕ:</b>\n\n{message.text}", priority=outbound.BULK)
+        for o_id in owners
+    ])
+    count = sum(1 for r in results if r is not None)
         
     await state.set_state(RootState.active)
     await message.answer(f"✅ Рассылка завершена. Доставлено: {count}", reply_markup=reply.super_admin_panel())
@@ -197,8 +201,7 @@ async def delete_cafe_confirm(callback: CallbackQuery, bot: Bot):
     users = await saas_repo.get_restaurant_users(r_id)
     
     for u_id in users:
-        try: await bot.send_message(u_id, f"🚫 <b>Кофейня '{info['title']}' была удалена из системы.</b>\nВсе сессии завершены.")
-        except: pass
+        outbound.send_message(bot, u_id, f"🚫 <b>Кофейня '{info['title']}' была удалена из системы.</b>\nВсе сессии завершены.")
         
     await saas_repo.delete_restaurant(r_id)
     await callback.answer("Кофейня успешно удалена", show_alert=True)
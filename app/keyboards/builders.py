@@ -57,6 +57,7 @@ def checklist_items_edit(items: list, role_slug: str, shift_type: str, mode: str
     builder = InlineKeyboardBuilder()
     if mode == "view":
         builder.button(text="➕ Добавить задачу", callback_data=f"add_item:{role_slug}:{shift_type}")
+        builder.button(text="📥 Импорт списком", callback_data=f"import_items:{role_slug}:{shift_type}")
         builder.button(text="🗑 Удалить задачи", callback_data=f"mode_del:{role_slug}:{shift_type}")
         builder.button(text="🔙 Назад", callback_data=f"edit_cl:{role_slug}")
         builder.button(text="🏠 Закончить", callback_data="back_to_admin")
@@ -167,19 +168,23 @@ def journal_user_select(users):
     builder.adjust(1)
     return builder.as_markup()
 
-def shift_history_kb(current_page: int, total_pages: int, target_user_id: int = None):
+def _page_nav(prefix: str, current_page: int, newer: str = None, older: str = None, total_pages: int = None):
+    """Кнопки ⬅️/➡️ с курсором в callback_data: {prefix}:{номер страницы}:{курсор}."""
+    nav_buttons = []
+    if newer:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{prefix}:{current_page - 1}:{newer}"))
+    label = f"{current_page + 1}/{max(total_pages, current_page + 1)}" if total_pages else f"{current_page + 1}"
+    nav_buttons.append(InlineKeyboardButton(text=label, callback_data="noop"))
+    if older:
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{prefix}:{current_page + 1}:{older}"))
+    return nav_buttons
+
+def shift_history_kb(current_page: int, total_pages: int, target_user_id: int = None, newer: str = None, older: str = None):
     builder = InlineKeyboardBuilder()
     
     prefix = f"user_history:{target_user_id}" if target_user_id else "journal_all"
     
-    nav_buttons = []
-    if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{prefix}:{current_page - 1}"))
-    nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="noop"))
-    if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{prefix}:{current_page + 1}"))
-    
-    builder.row(*nav_buttons)
+    builder.row(*_page_nav(prefix, current_page, newer, older, total_pages))
     
     if target_user_id:
         builder.row(InlineKeyboardButton(text="🗑 Очистить историю сотрудника", callback_data=f"clear_user_history:{target_user_id}"))
@@ -187,4 +192,11 @@ def shift_history_kb(current_page: int, total_pages: int, target_user_id: int =
         builder.row(InlineKeyboardButton(text="🗑 Очистить весь журнал", callback_data="confirm_clear_shifts"))
         
     builder.row(InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_journal_type"))
+    return builder.as_markup()
+
+def tasks_history_kb(current_page: int, newer: str = None, older: str = None):
+    if not newer and not older:
+        return None
+    builder = InlineKeyboardBuilder()
+    builder.row(*_page_nav("tasks_history", current_page, newer, older))
     return builder.as_markup()
\ No newline at end of file
@@ -1,56 +1,175 @@
 import asyncio
 import logging
+import signal
+from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from app.core.config import BOT_TOKEN
+from app.core.config import (
+    BOT_TOKEN, BOT_MODE, TELEGRAM_API_URL,
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    SHARDS, SHARD_ID, SHARD_DIR, SHARD_HOST, SHARD_BASE_PORT, SHARD_SECRET
+)
 from app.database.core import init_db
+from app.database.connection import init_pool, close_pool
+from app.database.fsm import SQLiteStorage
+from app.database import duty_buffer, active_shifts, routes
 from app.middlewares.saas import SaasMiddleware
+from app.middlewares.metrics import UpdateMetricsMiddleware, HandlerNameMiddleware
 
 from app.handlers.super_admin import menu as super_admin_menu
 from app.handlers import registration, auth, shifts, admin
 from app.core.scheduler import send_hourly_reminders, clean_expired_tasks
+from app.core import deadlines, reminder_wheel, metrics, shards
+from app.database.repo import tasks as task_repo, shifts as shift_repo, checklists as check_repo, users as user_repo
+from app.services import outbound
 
 logging.basicConfig(level=logging.INFO)
 
-async def main():
-    await init_db()
-    
-    session = AiohttpSession(proxy=None)
-    bot = Bot(
-        token=BOT_TOKEN, 
+def create_bot() -> Bot:
+    if TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    else:
+        session = AiohttpSession(proxy=None)
+    return Bot(
+        token=BOT_TOKEN,
         session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    
-    await bot.delete_webhook(drop_pending_updates=True)
 
-    dp = Dispatcher()
-    
+def create_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=SQLiteStorage())
+
+    # Метрики: время апдейта целиком снаружи, имя выбранного хендлера — изнутри (действует на все вложенные роутеры)
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
+
     dp.message.outer_middleware(SaasMiddleware())
     dp.callback_query.outer_middleware(SaasMiddleware())
 
     dp.include_routers(
         super_admin_menu.router,
-        registration.router,     
-        auth.router,            
-        shifts.router, 
-        admin.router 
+        registration.router,
+        auth.router,
+        shifts.router,
+        admin.router
     )
+    return dp
+
+async def run_polling(bot: Bot, dp: Dispatcher):
+    await bot.delete_webhook(drop_pending_updates=True)
+    # handle_as_tasks (по умолчанию) — каждый апдейт обрабатывается отдельной задачей
+    await dp.start_polling(bot, polling_timeout=60, allowed_updates=[])
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_BASE_URL")
+
+    app = web.Application()
+    # handle_in_background: Telegram сразу получает 200, апдейты обрабатываются параллельно
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET or None, handle_in_background=True
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    async def set_webhook():
+        await bot.set_webhook(
+            WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True
+        )
+        logging.info(f"Webhook: слушаю {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH}")
+
+    await serve(app, WEBAPP_HOST, WEBAPP_PORT, set_webhook)
+
+async def run_worker(bot: Bot, dp: Dispatcher):
+    """Воркер шарда: апдейты присылает роутер (app/router.py), к Telegram за ними не ходит."""
+    if not SHARD_SECRET:
+        raise RuntimeError("SHARDS > 1 требует SHARD_SECRET")
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=SHARD_SECRET, handle_in_background=True
+    ).register(app, path="/update")
+    shards.setup_rpc(app)
+    setup_application(app, dp, bot=bot)
+
+    port = SHARD_BASE_PORT + SHARD_ID
+    logging.info(f"Шард {SHARD_ID}/{SHARDS}: слушаю {SHARD_HOST}:{port}")
+    await serve(app, SHARD_HOST, port)
+
+async def serve(app: web.Application, host: str, port: int, on_ready=None):
+    """Поднимает aiohttp-приложение и держит его до SIGINT/SIGTERM."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    if on_ready is not None:
+        await on_ready()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try: loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError: pass  # Windows
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+
+async def main():
+    if shards.enabled():
+        SHARD_DIR.mkdir(parents=True, exist_ok=True)
+    await init_db()
+    await init_pool()
+
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    await active_shifts.load()
+    await routes.sync(await user_repo.get_session_routes())
+    reminder_wheel.load(await shift_repo.get_all_open_shifts(), await check_repo.get_reminders_all_restaurants())
+
+    outbound.start()
 
     scheduler = AsyncIOScheduler()
     scheduler.add_job(send_hourly_reminders, 'interval', minutes=1, kwargs={'bot': bot})
-    scheduler.add_job(clean_expired_tasks, 'interval', minutes=1, kwargs={'bot': bot})
     scheduler.start()
 
-    print("✅ SaaS Бот запущен!")
-    await dp.start_polling(bot, polling_timeout=60, allowed_updates=[])
+    deadlines.load(await task_repo.get_pending_deadlines())
+    deadlines.start(lambda task_ids: clean_expired_tasks(bot, task_ids))
+
+    await metrics.start()
+
+    mode = f"шард {SHARD_ID}/{SHARDS}" if shards.enabled() else BOT_MODE
+    print(f"✅ SaaS Бот запущен! ({mode})")
+    try:
+        if shards.enabled():
+            await run_worker(bot, dp)
+        elif BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            await run_polling(bot, dp)
+    finally:
+        scheduler.shutdown(wait=False)
+        await metrics.stop()
+        await deadlines.stop()
+        await outbound.stop()
+        await dp.storage.close()
+        await duty_buffer.close()
+        await shards.close()
+        await routes.close()
+        await close_pool()
+        await bot.session.close()
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
-        print("Бот остановлен")
\ No newline at end of file
+        print("Бот остановлен")
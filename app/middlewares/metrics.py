@@ -0,0 +1,58 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from app.core import metrics
+from app.database.connection import track_db_usage
+
+# Какой хендлер обрабатывает текущий апдейт: заполняет HandlerNameMiddleware
+_current: ContextVar[Optional[Dict[str, str]]] = ContextVar("metrics_handler", default=None)
+
+def handler_key(data: Dict[str, Any]) -> tuple:
+    """(роутер, хендлер): модуль хендлера без app.handlers. и имя функции."""
+    handler = data.get("handler")
+    callback = getattr(handler, "callback", None)
+    if callback is None:
+        return "-", "unknown"
+    module = getattr(callback, "__module__", "") or ""
+    return module.removeprefix("app.handlers."), getattr(callback, "__name__", "unknown")
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Внешний middleware на update: время всего апдейта (включая SaasMiddleware) и работа с БД."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        current = {"router": "-", "handler": "unhandled"}
+        _current.set(current)
+        usage = track_db_usage()
+        started = time.perf_counter()
+        error = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            error = True
+            raise
+        finally:
+            metrics.observe(
+                current["router"], current["handler"], time.perf_counter() - started,
+                usage.queries, usage.ms / 1000, error
+            )
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Внутренний middleware: запоминает, какой хендлер выбран для апдейта."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        current = _current.get()
+        if current is not None:
+            current["router"], current["handler"] = handler_key(data)
+        return await handler(event, data)
@@ -0,0 +1,180 @@
+"""Роутер шардированного режима: единственный процесс, который получает апдейты от Telegram.
+
+    SHARDS=4 SHARD_SECRET=... SHARD_ID=0 python -m app.main   # и так для SHARD_ID=1..3
+    SHARDS=4 SHARD_SECRET=... python -m app.router
+
+Для каждого апдейта берет отправителя и ищет его сессию в справочнике маршрутов
+(app/database/routes.py): есть сессия — апдейт уходит воркеру кофейни, нет — воркеру-«лобби»
+user_id % SHARDS. Апдейты одного воркера пересылаются по очереди, в порядке получения.
+"""
+import asyncio
+import logging
+import signal
+from typing import Any, Dict, List, Optional
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
+from app.core.config import (
+    BOT_TOKEN, BOT_MODE, TELEGRAM_API_URL,
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    SHARDS, SHARD_SECRET
+)
+from app.core import shards
+from app.database import routes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 60
+FORWARD_RETRIES = 5
+# Воркеры слушают только сообщения и нажатия кнопок (dp.resolve_used_update_types)
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+def user_of(update: Dict[str, Any]) -> Optional[int]:
+    for kind, payload in update.items():
+        if kind != "update_id" and isinstance(payload, dict) and isinstance(payload.get("from"), dict):
+            return payload["from"]["id"]
+    return None
+
+async def shard_for(update: Dict[str, Any]) -> int:
+    user_id = user_of(update)
+    if user_id is None:
+        return 0
+    restaurant_id = await routes.lookup(user_id)
+    if restaurant_id is None:
+        return shards.lobby_of(user_id)
+    return shards.shard_of(restaurant_id)
+
+class Forwarder:
+    """Очередь на каждый воркер: апдейты уходят POST-запросом на /update по одному, с повторами."""
+
+    def __init__(self):
+        self._queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(SHARDS)]
+        self._client: Optional[ClientSession] = None
+        self._senders: List[asyncio.Task] = []
+
+    def start(self):
+        self._client = ClientSession(timeout=ClientTimeout(total=10))
+        self._senders = [asyncio.create_task(self._send_loop(shard)) for shard in range(SHARDS)]
+
+    async def stop(self):
+        # Дадим дослать то, что уже получено от Telegram
+        try:
+            await asyncio.wait_for(asyncio.gather(*[queue.join() for queue in self._queues]), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Роутер: остановлен с недосланными апдейтами")
+        for sender in self._senders:
+            sender.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+
+    async def dispatch(self, update: Dict[str, Any]):
+        self._queues[await shard_for(update)].put_nowait(update)
+
+    async def _send_loop(self, shard: int):
+        queue = self._queues[shard]
+        while True:
+            update = await queue.get()
+            for attempt in range(1, FORWARD_RETRIES + 1):
+                try:
+                    async with self._client.post(
+                        f"{shards.worker_url(shard)}/update", json=update,
+                        headers={"X-Telegram-Bot-Api-Secret-Token": SHARD_SECRET}
+                    ) as resp:
+                        if resp.status == 200:
+                            break
+                        error = f"HTTP {resp.status}"
+                except (ClientError, asyncio.TimeoutError) as e:
+                    error = str(e) or type(e).__name__
+                if attempt < FORWARD_RETRIES:
+                    await asyncio.sleep(attempt)
+            else:
+                logger.warning(f"Шард {shard}: апдейт {update.get('update_id')} не доставлен: {error}")
+            queue.task_done()
+
+class TelegramAPI:
+    def __init__(self):
+        base = TELEGRAM_API_URL.rstrip("/") if TELEGRAM_API_URL else "https://api.telegram.org"
+        self._url = f"{base}/bot{BOT_TOKEN}"
+        self._client = ClientSession(timeout=ClientTimeout(total=POLL_TIMEOUT + 10))
+
+    async def call(self, method: str, **params) -> Any:
+        async with self._client.post(f"{self._url}/{method}", json=params) as resp:
+            body = await resp.json()
+        if not body.get("ok"):
+            raise RuntimeError(f"{method}: {body.get('description')}")
+        return body["result"]
+
+    async def close(self):
+        await self._client.close()
+
+async def run_polling(api: TelegramAPI, forwarder: Forwarder):
+    await api.call("deleteWebhook", drop_pending_updates=True)
+    offset = None
+    while True:
+        try:
+            updates = await api.call("getUpdates", offset=offset, timeout=POLL_TIMEOUT, allowed_updates=[])
+        except (ClientError, asyncio.TimeoutError, RuntimeError) as e:
+            logger.warning(f"getUpdates: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            offset = update["update_id"] + 1
+            await forwarder.dispatch(update)
+
+async def run_webhook(api: TelegramAPI, forwarder: Forwarder):
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_BASE_URL")
+
+    async def handle(request: web.Request) -> web.Response:
+        if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+            return web.Response(status=401)
+        await forwarder.dispatch(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT).start()
+    params = {"url": WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH, "allowed_updates": ALLOWED_UPDATES, "drop_pending_updates": True}
+    if WEBHOOK_SECRET:
+        params["secret_token"] = WEBHOOK_SECRET
+    try:
+        await api.call("setWebhook", **params)
+        logger.info(f"Webhook: слушаю {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+async def main():
+    if not shards.enabled():
+        raise RuntimeError("Роутер нужен только в шардированном режиме (SHARDS > 1)")
+    if not SHARD_SECRET:
+        raise RuntimeError("SHARDS > 1 требует SHARD_SECRET")
+
+    api = TelegramAPI()
+    forwarder = Forwarder()
+    forwarder.start()
+    run = run_webhook if BOT_MODE == "webhook" else run_polling
+    task = asyncio.create_task(run(api, forwarder))
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try: loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError: pass  # Windows
+
+    print(f"✅ Роутер запущен! ({BOT_MODE}, шардов: {SHARDS})")
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await forwarder.stop()
+        await api.close()
+        await routes.close()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit):
+        print("Роутер остановлен")
@@ -0,0 +1,75 @@
+import re
+from typing import List, Optional, Tuple
+from app.database.repo import checklists as check_repo
+
+MAX_IMPORT_ITEMS = 200
+MAX_ITEM_LEN = 300
+
+# Тип отчета в последней колонке: после ; | или табуляции. Запятая считается разделителем колонок,
+# только если первая строка — заголовок CSV через запятую («Пункт,Тип»): в обычном тексте это просто запятая
+_TYPES = {
+    "simple": "simple", "обычное": "simple", "обычный": "simple", "текст": "simple",
+    "photo": "photo", "фото": "photo",
+    "video": "video", "видео": "video",
+}
+_HEADERS = {"type", "тип"}
+_TYPED_LINE = re.compile(r"^(.*?)\s*[;\t|]\s*\"?([^\s;,\t|\"]+)\"?\s*$")
+_CSV_LINE = re.compile(r"^(.*?)\s*([;,\t|])\s*\"?([^\s;,\t|\"]+)\"?\s*$")
+_LIST_MARKER = re.compile(r"^\s*(?:\d{1,3}[.)]|[-–—•*])\s+")
+
+def decode_import(data: bytes) -> str:
+    """Текст загруженного файла: UTF-8 (в т.ч. с BOM) или cp1251 — так сохраняет CSV Excel."""
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1251", errors="replace")
+
+def _unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1].replace('""', '"')
+    return text.strip()
+
+def _skipped(line: str) -> bool:
+    return not line or line.startswith("#")
+
+def _header_columns(line: str) -> Optional[re.Pattern]:
+    """Если строка — заголовок CSV («Пункт;Тип»), возвращает шаблон строк с колонкой типа."""
+    m = _CSV_LINE.match(line)
+    if not m or m.group(3).lower() not in _HEADERS:
+        return None
+    return _CSV_LINE if m.group(2) == "," else _TYPED_LINE
+
+def _parse_line(line: str, typed: re.Pattern) -> Optional[Tuple[str, str]]:
+    line = line.strip()
+    if _skipped(line):
+        return None
+    item_type = "simple"
+    m = typed.match(line)
+    if m:
+        kind = m.group(m.lastindex).lower()
+        if kind in _TYPES:
+            line, item_type = m.group(1), _TYPES[kind]
+    text = _unquote(_LIST_MARKER.sub("", line, count=1))
+    return (text[:MAX_ITEM_LEN], item_type) if text else None
+
+def parse_import(raw: str) -> List[Tuple[str, str]]:
+    """Разбирает вставленный список или CSV: по пункту на строку, тип — необязательная последняя колонка.
+    Нумерация и маркеры списка отбрасываются, пустые строки и строки с # пропускаются.
+    Заголовок CSV пропускается, только если это первая непустая строка."""
+    lines = [line.strip() for line in raw.splitlines()]
+    typed = _TYPED_LINE
+    first = next((i for i, line in enumerate(lines) if not _skipped(line)), None)
+    if first is not None:
+        header = _header_columns(lines[first])
+        if header is not None:
+            typed = header
+            del lines[first]
+    items = [item for item in (_parse_line(line, typed) for line in lines) if item]
+    return items[:MAX_IMPORT_ITEMS]
+
+async def import_items(restaurant_id: int, role: str, shift_type: str, raw: str) -> Tuple[int, int]:
+    """Добавляет все пункты списка одной транзакцией. Возвращает (добавлено, пропущено дублей)."""
+    items = parse_import(raw)
+    added = await check_repo.add_checklist_items(restaurant_id, role, shift_type, items)
+    return added, len(items) - added
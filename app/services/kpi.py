@@ -1,28 +1,11 @@
-import json
-from app.database.repo import shifts as shift_repo
+from app.database.repo import kpi as kpi_repo
 
 async def calculate_kpi(tg_id: int, restaurant_id: int):
-    shifts = await shift_repo.get_monthly_stats(tg_id, restaurant_id)
+    totals = await kpi_repo.get_kpi_totals(tg_id, restaurant_id)
     
-    shifts_x = len(shifts)
-    total_completed_items = 0 
-    total_possible_items = 0 
-    
-    for s in shifts:
-        try:
-            data = json.loads(s['report']) if s['report'] else {}
-            duties = data.get('duties', [])
-            
-            if not duties: continue
-            
-            done_count = len([d for d in duties if d['done']])
-            total_count = len(duties)
-            
-            total_completed_items += done_count
-            total_possible_items += total_count
-            
-        except json.JSONDecodeError:
-            continue
+    shifts_x = totals['shifts']
+    total_completed_items = totals['done_items']
+    total_possible_items = totals['total_items']
 
     tasks_y_avg = round(total_completed_items / shifts_x, 1) if shifts_x > 0 else 0
     activity_score = total_completed_items 
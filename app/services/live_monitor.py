@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from aiogram import Bot
+from app.database.repo import shifts as shift_repo, checklists as check_repo, tenants as tenant_repo
+from app.keyboards import builders
+from app.services import outbound
+
+logger = logging.getLogger(__name__)
+
+# Живой мониторинг: сообщение админа с чек-листом сотрудника подписывается на смену
+# и само обновляется, когда сотрудник отмечает пункты. Отметки за DEBOUNCE секунд
+# сливаются в одну правку; правка не отправляется, если текст не изменился.
+
+DEBOUNCE = 1.5
+TTL = 30 * 60
+
+class _Watch:
+    __slots__ = ("bot", "chat_id", "message_id", "restaurant_id", "user_id", "shift_id", "text", "expires_at")
+
+    def __init__(self, bot: Bot, chat_id: int, message_id: int, restaurant_id: int, user_id: int, shift_id: int, text: str):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.restaurant_id = restaurant_id
+        self.user_id = user_id
+        self.shift_id = shift_id
+        self.text = text
+        self.expires_at = time.monotonic() + TTL
+
+# shift_id -> {(chat_id, message_id): подписка}; одно сообщение следит за одной сменой
+_by_shift: Dict[int, Dict[Tuple[int, int], _Watch]] = {}
+_by_message: Dict[Tuple[int, int], _Watch] = {}
+_pending: Dict[int, asyncio.Task] = {}
+
+async def render(restaurant_id: int, user_id: int, live: bool = True, shift_id: Optional[int] = None) -> Optional[str]:
+    """Текст мониторинга смены сотрудника или None, если смена не открыта (или открыта уже другая)."""
+    active = await shift_repo.get_active_shift(user_id, restaurant_id)
+    if not active or (shift_id is not None and active['id'] != shift_id):
+        return None
+    meta = await tenant_repo.get_tenant_meta(restaurant_id)
+    roles_map = meta["roles_map"] if meta else {}
+    r_name = roles_map.get(active['role'], active['role'])
+
+    tasks = await check_repo.get_checklist(restaurant_id, active['role'], active['shift_type'])
+    duties_map = await shift_repo.get_duties_map(active['id'])
+
+    visual = ""
+    completed_count = 0
+    for task_data in tasks:
+        type_icon = {"photo": "📸 ", "video": "🎥 "}.get(task_data.get('item_type', 'simple'), "")
+        if duties_map.get(task_data['id'], False):
+            visual += f"✅ {type_icon}{task_data['text']}\n"
+            completed_count += 1
+        else:
+            visual += f"🟥 {type_icon}{task_data['text']}\n"
+
+    total = len(tasks)
+    perc = int((completed_count / total) * 100) if total > 0 else 0
+    blocks = perc // 10
+    progress = "🟩" * blocks + "⬜️" * (10 - blocks)
+
+    if live:
+        footer = "🔴 <i>Обновляется автоматически</i>"
+    else:
+        footer = "⏸ <i>Автообновление остановлено — откройте сотрудника заново</i>"
+    return (
+        f"👤 <b>{active['full_name']}</b> (<b>{r_name}</b>)\n"
+        f"📊 Прогресс: {completed_count}/{total} ({perc}%)\n"
+        f"{progress}\n\n"
+        f"{visual}\n"
+        f"{footer}"
+    )
+
+def subscribe(bot: Bot, chat_id: int, message_id: int, restaurant_id: int, user_id: int, shift_id: int, text: str):
+    """Сообщение (уже показывающее text) будет обновляться вместе со сменой."""
+    unsubscribe(chat_id, message_id)
+    # Подписки на смены без отметок сами не истекают — чистим устаревшие здесь
+    now = time.monotonic()
+    for stale in [w for w in _by_message.values() if w.expires_at <= now]:
+        unsubscribe(stale.chat_id, stale.message_id)
+    watch = _Watch(bot, chat_id, message_id, restaurant_id, user_id, shift_id, text)
+    _by_message[(chat_id, message_id)] = watch
+    _by_shift.setdefault(shift_id, {})[(chat_id, message_id)] = watch
+
+def unsubscribe(chat_id: int, message_id: int):
+    """Админ ушел с этого сообщения (к списку, к другому сотруднику, закрыл)."""
+    watch = _by_message.pop((chat_id, message_id), None)
+    if watch is None:
+        return
+    watchers = _by_shift.get(watch.shift_id)
+    if watchers is not None:
+        watchers.pop((chat_id, message_id), None)
+        if not watchers:
+            del _by_shift[watch.shift_id]
+
+def shift_changed(shift_id: int):
+    """Отметки смены изменились: обновить подписанные сообщения (с задержкой DEBOUNCE)."""
+    if shift_id not in _by_shift or shift_id in _pending:
+        return
+    task = asyncio.create_task(_refresh_later(shift_id))
+    _pending[shift_id] = task
+    task.add_done_callback(lambda _: _pending.pop(shift_id, None))
+
+def shift_closed(shift_id: int):
+    """Смена закрыта: подписки снимаются, сообщения получают итоговую пометку."""
+    for watch in list(_by_shift.get(shift_id, {}).values()):
+        unsubscribe(watch.chat_id, watch.message_id)
+        _edit(watch, watch.text.rsplit("\n", 1)[0] + "\n🏁 <i>Смена закрыта</i>")
+
+async def _refresh_later(shift_id: int):
+    await asyncio.sleep(DEBOUNCE)
+    try:
+        await _refresh(shift_id)
+    except Exception as e:
+        logger.warning(f"Мониторинг: не удалось обновить смену {shift_id}: {e}")
+
+async def _refresh(shift_id: int):
+    watchers = list(_by_shift.get(shift_id, {}).values())
+    if not watchers:
+        return
+    now = time.monotonic()
+    # Все подписчики смотрят одну смену одного заведения — текст общий
+    text = await render(watchers[0].restaurant_id, watchers[0].user_id, shift_id=shift_id)
+    if text is None:
+        return shift_closed(shift_id)
+    paused = None
+    for watch in watchers:
+        if watch.expires_at <= now:
+            unsubscribe(watch.chat_id, watch.message_id)
+            paused = paused or await render(watch.restaurant_id, watch.user_id, live=False, shift_id=shift_id)
+            if paused:
+                _edit(watch, paused)
+        elif text != watch.text:
+            _edit(watch, text)
+
+def _edit(watch: _Watch, text: str):
+    watch.text = text
+    future = outbound.submit(watch.chat_id, lambda: watch.bot.edit_message_text(
+        text, chat_id=watch.chat_id, message_id=watch.message_id, reply_markup=builders.back_to_monitor()
+    ))
+    future.add_done_callback(lambda f: _edit_done(watch, f))
+
+def _edit_done(watch: _Watch, future: asyncio.Future):
+    # Сообщение удалено или недоступно — следить за ним больше незачем
+    if future.cancelled() or future.result() is not None:
+        return
+    if _by_message.get((watch.chat_id, watch.message_id)) is watch:
+        unsubscribe(watch.chat_id, watch.message_id)
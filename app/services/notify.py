@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+from aiogram import Bot
+from aiogram.types import Message
+from app.database.repo import users as user_repo
+from app.services import outbound
+
+logger = logging.getLogger(__name__)
+
+# Шаг рассылки: получает chat_id получателя и возвращает корутину отправки
+Sender = Callable[[int], Awaitable[Any]]
+
+# Держим ссылки на фоновые рассылки, иначе задачи может собрать GC
+_background: Set[asyncio.Task] = set()
+
+async def fan_out(recipients: Iterable[int], *senders: Sender, priority: int = outbound.NOTIFY) -> Dict[int, bool]:
+    """Отправляет всем получателям одновременно (через очередь outbound).
+    Шаги для одного получателя идут по порядку. Возвращает {chat_id: доставлено ли}."""
+    recipients = list(dict.fromkeys(recipients))
+    futures = [
+        outbound.submit(chat_id, *[lambda s=s, c=chat_id: s(c) for s in senders], priority=priority)
+        for chat_id in recipients
+    ]
+    results = await asyncio.gather(*futures)
+    return {chat_id: result is not None for chat_id, result in zip(recipients, results)}
+
+async def _notify_admins(restaurant_id: int, senders: tuple, priority: int) -> Dict[int, bool]:
+    # Задачу никто не ждет — ошибку (например, БД) нужно залогировать здесь, иначе она потеряется
+    try:
+        admin_ids = await user_repo.get_admins_ids(restaurant_id)
+        results = await fan_out(admin_ids, *senders, priority=priority)
+    except Exception:
+        logger.exception(f"Уведомление админов (restaurant {restaurant_id}): ошибка рассылки")
+        return {}
+    failed = [chat_id for chat_id, ok in results.items() if not ok]
+    if failed:
+        logger.warning(f"Уведомление админов (restaurant {restaurant_id}): не доставлено {len(failed)}/{len(results)}: {failed}")
+    return results
+
+def notify_admins(restaurant_id: int, *senders: Sender, priority: int = outbound.NOTIFY) -> asyncio.Task:
+    """Рассылает админам заведения в фоне — хендлер не ждет доставки.
+    Результат задачи — {admin_id: доставлено ли} (пустой, если рассылка не удалась)."""
+    task = asyncio.create_task(_notify_admins(restaurant_id, senders, priority))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+def text(bot: Bot, text: str, **kwargs) -> Sender:
+    return lambda chat_id: bot.send_message(chat_id, text, **kwargs)
+
+def video_note(bot: Bot, file_id: str) -> Sender:
+    return lambda chat_id: bot.send_video_note(chat_id, file_id)
+
+def media_copy(message: Message, caption: Optional[str] = None) -> Sender:
+    """Пересылает фото/видео/кружок из сообщения сотрудника (caption — только для фото и видео)."""
+    bot = message.bot
+    if message.photo:
+        return lambda chat_id: bot.send_photo(chat_id, message.photo[-1].file_id, caption=caption)
+    if message.video:
+        return lambda chat_id: bot.send_video(chat_id, message.video.file_id, caption=caption)
+    return video_note(bot, message.video_note.file_id)
@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from app.core.config import OUTBOUND_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST, OUTBOUND_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета: меньше — раньше
+INTERACTIVE = 0   # ответ на действие пользователя, который ждут прямо сейчас
+NOTIFY = 1        # уведомления админам, напоминания
+BULK = 2          # рассылки по платформе
+
+MAX_RETRIES = 3
+CHAT_BUCKETS_LIMIT = 10000
+
+Step = Callable[[], Awaitable[Any]]
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Сколько ждать до свободного токена (без списания)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> float:
+        """Резервирует токен и возвращает, сколько нужно подождать до его наступления."""
+        wait = self.delay()
+        self.tokens -= 1
+        return wait
+
+class _Job:
+    __slots__ = ("chat_id", "steps", "step", "attempts", "priority", "seq", "future")
+
+    def __init__(self, chat_id: int, steps: List[Step], priority: int, future: asyncio.Future):
+        self.seq = next(_seq)
+        self.chat_id = chat_id
+        self.steps = steps
+        self.step = 0
+        self.attempts = 0
+        self.priority = priority
+        self.future = future
+
+_queue: Optional[asyncio.PriorityQueue] = None
+_workers: List[asyncio.Task] = []
+_seq = itertools.count()
+_global_bucket = TokenBucket(OUTBOUND_RATE, OUTBOUND_RATE)
+_chat_buckets: Dict[int, TokenBucket] = {}
+_pause_until = 0.0
+
+# В каждый чат одновременно отправляется не больше одного задания — так сохраняется порядок сообщений
+_chat_owner: Dict[int, "_Job"] = {}
+_chat_waiting: Dict[int, deque] = {}
+# Задания, отложенные таймером (лимит чата, flood control): их нет в очереди, stop() ждет их отдельно
+_deferred: Dict["_Job", asyncio.TimerHandle] = {}
+
+_stats = {"sent": 0, "failed": 0, "retry_after": 0}
+
+def _chat_bucket(chat_id: int) -> TokenBucket:
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        if len(_chat_buckets) >= CHAT_BUCKETS_LIMIT:
+            for cid in [cid for cid, b in _chat_buckets.items() if b.delay() == 0]:
+                del _chat_buckets[cid]
+        bucket = _chat_buckets[chat_id] = TokenBucket(OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST)
+    return bucket
+
+def _put(job: _Job):
+    if _queue is None:
+        return _finish(job, None)
+    _queue.put_nowait((job.priority, job.seq, job))
+
+def _requeue_later(job: _Job, delay: float):
+    _deferred[job] = asyncio.get_running_loop().call_later(delay, _requeue, job)
+
+def _requeue(job: _Job):
+    _deferred.pop(job, None)
+    _put(job)
+
+async def _acquire(chat_id: int):
+    pause = _pause_until - time.monotonic()
+    if pause > 0:
+        await asyncio.sleep(pause)
+    wait = max(_global_bucket.take(), _chat_bucket(chat_id).take())
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+def _finish(job: _Job, result: Any):
+    if not job.future.done():
+        job.future.set_result(result)
+
+def _release(chat_id: int):
+    waiting = _chat_waiting.get(chat_id)
+    if waiting:
+        nxt = waiting.popleft()
+        if not waiting:
+            del _chat_waiting[chat_id]
+        _chat_owner[chat_id] = nxt
+        _put(nxt)
+    else:
+        _chat_owner.pop(chat_id, None)
+
+async def _run_job(job: _Job) -> bool:
+    """Возвращает True, если задание отложено и вернется в очередь позже."""
+    global _pause_until
+
+    # Чат упирается в свой лимит — возвращаем задание в очередь, не занимая воркер
+    if job.step == 0:
+        delay = _chat_bucket(job.chat_id).delay()
+        if delay > 0:
+            _requeue_later(job, delay)
+            return True
+
+    result = None
+    while job.step < len(job.steps):
+        await _acquire(job.chat_id)
+        try:
+            result = await job.steps[job.step]()
+        except TelegramRetryAfter as e:
+            _stats["retry_after"] += 1
+            _pause_until = max(_pause_until, time.monotonic() + e.retry_after)
+            job.attempts += 1
+            if job.attempts <= MAX_RETRIES:
+                logger.warning(f"Flood control: пауза {e.retry_after} с (chat {job.chat_id})")
+                _requeue_later(job, e.retry_after)
+                return True
+            _stats["failed"] += 1
+            logger.warning(f"Не удалось отправить (chat {job.chat_id}): {e}")
+            _finish(job, None)
+            return False
+        except Exception as e:
+            _stats["failed"] += 1
+            logger.warning(f"Не удалось отправить (chat {job.chat_id}): {e}")
+            _finish(job, None)
+            return False
+        job.step += 1
+
+    _stats["sent"] += 1
+    _finish(job, result)
+    return False
+
+async def _worker():
+    while True:
+        _, _, job = await _queue.get()
+        owner = _chat_owner.setdefault(job.chat_id, job)
+        if owner is not job:
+            _chat_waiting.setdefault(job.chat_id, deque()).append(job)
+            _queue.task_done()
+            continue
+
+        deferred = False
+        try:
+            deferred = await _run_job(job)
+        except Exception:
+            logger.exception(f"Ошибка очереди отправки (chat {job.chat_id})")
+            _finish(job, None)
+        finally:
+            if not deferred:
+                _release(job.chat_id)
+            _queue.task_done()
+
+def start(concurrency: int = OUTBOUND_CONCURRENCY):
+    global _queue
+    if _queue is None:
+        _queue = asyncio.PriorityQueue()
+    while len(_workers) < max(1, concurrency):
+        _workers.append(asyncio.create_task(_worker()))
+
+async def _drain():
+    """Ждет, пока опустеет очередь и в нее вернутся все отложенные задания."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await _queue.join()
+        if not _deferred:
+            return
+        await asyncio.sleep(max(min(h.when() for h in _deferred.values()) - loop.time(), 0.05))
+
+async def stop(timeout: float = 10):
+    """Дожидается отправки очереди и отложенных заданий (не дольше timeout) и останавливает воркеры."""
+    global _queue
+    if _queue is not None:
+        try:
+            await asyncio.wait_for(_drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Очередь отправки остановлена, не отправлено: {_queue.qsize() + len(_deferred)}")
+    # Отложенные задания не должны сработать после остановки (сессия бота уже закрыта)
+    for job, handle in list(_deferred.items()):
+        handle.cancel()
+        _finish(job, None)
+    _deferred.clear()
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    for waiting in _chat_waiting.values():
+        for job in waiting:
+            _finish(job, None)
+    _chat_waiting.clear()
+    _chat_owner.clear()
+
+def submit(chat_id: int, *steps: Step, priority: int = NOTIFY) -> asyncio.Future:
+    """Ставит в очередь отправку в чат. Шаги выполняются по порядку (например, кружок, затем текст).
+    Future получает результат последнего шага или None, если отправить не удалось."""
+    if not _workers:
+        start()
+    future = asyncio.get_running_loop().create_future()
+    _put(_Job(chat_id, list(steps), priority, future))
+    return future
+
+def send_message(bot: Bot, chat_id: int, text: str, priority: int = NOTIFY, **kwargs) -> asyncio.Future:
+    return submit(chat_id, lambda: bot.send_message(chat_id, text, **kwargs), priority=priority)
+
+def get_stats() -> Dict[str, Any]:
+    return {**_stats, "queued": _queue.qsize() if _queue is not None else 0}
@@ -1,8 +1,10 @@
 import json
-import aiosqlite
 from datetime import datetime
-from app.database.repo import shifts as shift_repo, tasks as task_repo, roles as role_repo
-from app.core.config import DB_PATH, TZ
+from app.database.repo import shifts as shift_repo, roles as role_repo
+from app.core.config import TZ
+from app.core import deadlines
+from app.services import live_monitor
+from app.database.connection import acquire
 
 def calculate_duration(start_str: str):
     start_dt = datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S")
@@ -12,38 +14,19 @@ def calculate_duration(start_str: str):
     minutes = int((duration.total_seconds() % 3600) // 60)
     return hours, minutes
 
+def build_status_list(tasks_list: list, duties_map: dict) -> list:
+    return [duties_map.get(t['id'], False) for t in tasks_list]
+
 async def toggle_duty(tg_id: int, restaurant_id: int, task_index: int, is_checked: bool, master_tasks_list: list):
     active = await shift_repo.get_active_shift(tg_id, restaurant_id)
     if not active: return None
+    if not 0 <= task_index < len(master_tasks_list): return None
 
-    try: 
-        data = json.loads(active['report']) if active['report'] else {}
-    except json.JSONDecodeError:
-        data = {}
-
-    user_duties = data.get('duties', [])
-
-    if len(user_duties) != len(master_tasks_list):
-        new_duties = []
-        for i, task_data in enumerate(master_tasks_list):
-            title = task_data['text']
-            is_done = False
-            if i < len(user_duties):
-                if user_duties[i].get('title') == title:
-                    is_done = user_duties[i].get('done', False)
-            
-            new_duties.append({"title": title, "done": is_done})
-        user_duties = new_duties
-
-    if 0 <= task_index < len(user_duties):
-        user_duties[task_index]['done'] = is_checked
-        user_duties[task_index]['title'] = master_tasks_list[task_index]['text']
-
-    data['duties'] = user_duties
-    new_report = json.dumps(data)
-    await shift_repo.update_shift_report(active['id'], restaurant_id, new_report)
+    await shift_repo.set_duty(active['id'], master_tasks_list[task_index]['id'], is_checked)
+    live_monitor.shift_changed(active['id'])
+    duties_map = await shift_repo.get_duties_map(active['id'])
     
-    return [t['done'] for t in user_duties]
+    return build_status_list(master_tasks_list, duties_map)
 
 async def close_shift_logic(tg_id: int, restaurant_id: int, raw_data: str, user_name: str, tasks_list: list, comment: str = None):
     active_shift = await shift_repo.get_active_shift(tg_id, restaurant_id)
@@ -56,9 +39,9 @@ async def close_shift_logic(tg_id: int, restaurant_id: int, raw_data: str, user_
         data['end_comment'] = comment 
     updated_raw_data = json.dumps(data)
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with acquire() as db:
         async with db.execute(
-            "SELECT text FROM extra_tasks WHERE assigned_to = ? AND status = 'pending' AND restaurant_id = ?", 
+            "SELECT text, id FROM extra_tasks WHERE assigned_to = ? AND status = 'pending' AND restaurant_id = ?", 
             (tg_id, restaurant_id)
         ) as cur:
             pending_tasks = await cur.fetchall()
@@ -69,36 +52,27 @@ async def close_shift_logic(tg_id: int, restaurant_id: int, raw_data: str, user_
         )
         await db.commit()
 
-    await shift_repo.end_shift(active_shift['id'], restaurant_id, updated_raw_data)
-    
-    try:
-        data = json.loads(raw_data)
-    except:
-        data = {}
+    for task in pending_tasks:
+        deadlines.unschedule(task[1])
 
+    # Отметки читаем, пока смена открыта: после закрытия буфер отметок ее забывает
+    duties_map = await shift_repo.get_duties_map(active_shift['id'])
+    await shift_repo.end_shift(active_shift['id'], restaurant_id, updated_raw_data, [t['id'] for t in tasks_list])
+    live_monitor.shift_closed(active_shift['id'])
+    
     roles_map = await role_repo.get_roles_map(restaurant_id)
     r_name = roles_map.get(active_shift['role'], active_shift['role'])
 
     hours, minutes = calculate_duration(active_shift['started_at'])
-    
-    user_duties = data.get('duties', [])
-    
-    if not user_duties:
-        user_duties = [{"title": t['text'], "done": False} for t in tasks_list]
 
     missed = []
     completed_count = 0
     
-    for i, task_data in enumerate(tasks_list):
-        title = task_data['text']
-        is_done = False
-        if i < len(user_duties):
-            is_done = user_duties[i].get('done', False)
-        
-        if is_done:
+    for task_data in tasks_list:
+        if duties_map.get(task_data['id'], False):
             completed_count += 1
         else:
-            missed.append(title)
+            missed.append(task_data['text'])
 
     total = len(tasks_list)
     efficiency = int((completed_count / total) * 100) if total > 0 else 0
@@ -44,6 +44,7 @@ class RoleState(StatesGroup):
 class ChecklistState(StatesGroup):
     waiting_checklist_text = State()
     waiting_checklist_type = State()
+    waiting_import = State()
 
 class ReminderState(StatesGroup):
     remind_role = State()
@@ -0,0 +1,5 @@
+"""Микробенчмарки функций app/database/repo и сервисов на синтетической базе.
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.25
+"""
@@ -0,0 +1,408 @@
+"""Набор замеров: repo-функции и сервисы горячего пути.
+
+Каждый случай — функция и подготовка аргументов. Подготовка (вне замера) берет данные
+из синтетической базы или создает их заранее: для удаления сначала создается удаляемое,
+для закрытия смены — открытая смена и т.п.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from app.core.config import TZ
+from app.database import cache, duty_buffer
+from app.database.connection import fetch_one
+from app.database.repo import (
+    checklists as check_repo, kpi as kpi_repo, roles as role_repo, saas as saas_repo,
+    shifts as shift_repo, tasks as task_repo, tenants as tenant_repo, users as user_repo
+)
+from app.services import shift as shift_service, kpi as kpi_service, tasks as task_service
+from benchmarks.seed import Dataset, PIN
+
+class Exhausted(Exception):
+    """Закончились подготовленные данные (например, запасные кофейни для удаления)."""
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[..., Any]
+    args: Callable[["Context"], Awaitable[tuple]]
+
+class Context:
+    def __init__(self, data: Dataset, spare: int, seed: int = 42):
+        self.data = data
+        self.rng = random.Random(seed)
+        # Хвост списка кофеен отдаем под разрушающие замеры (удаление, очистка журнала)
+        self.spare = data.restaurants[len(data.restaurants) - spare:]
+        self.restaurants = data.restaurants[:len(data.restaurants) - spare]
+        kept = set(self.restaurants)
+        self.open_shifts = [s for s in data.open_shifts if s[1] in kept]
+        busy = {(tg_id, r) for tg_id, r, _ in self.open_shifts}
+        self.idle = [(tg_id, r, role) for r in self.restaurants for tg_id, role in data.employees[r] if (tg_id, r) not in busy]
+        self.rng.shuffle(self.idle)
+        self._counter = 0
+
+    def next_id(self) -> int:
+        self._counter += 1
+        return self._counter
+
+    def uniq(self, prefix: str) -> str:
+        return f"{prefix}{self.next_id()}"
+
+    def restaurant(self) -> int:
+        return self.rng.choice(self.restaurants)
+
+    def employee(self) -> Tuple[int, int, str]:
+        r = self.restaurant()
+        tg_id, role = self.rng.choice(self.data.employees[r])
+        return tg_id, r, role
+
+    def open_shift(self) -> Tuple[int, int, str]:
+        return self.rng.choice(self.open_shifts)
+
+    def spare_restaurant(self) -> int:
+        if not self.spare:
+            raise Exhausted
+        return self.spare.pop()
+
+    def idle_employee(self) -> Tuple[int, int, str]:
+        if not self.idle:
+            raise Exhausted
+        return self.idle.pop()
+
+    async def fresh_shift(self) -> Tuple[int, int, str, int]:
+        """Новая открытая смена, которую замер может закрыть."""
+        tg_id, r, role = self.idle_employee()
+        return tg_id, r, role, await shift_repo.start_shift(tg_id, r, role, "full")
+
+def _now(**delta) -> str:
+    return (datetime.now(TZ).replace(tzinfo=None) + timedelta(**delta)).strftime("%Y-%m-%d %H:%M:%S")
+
+async def _last_id(table: str) -> int:
+    return (await fetch_one(f"SELECT MAX(id) AS id FROM {table}"))["id"]
+
+async def _pending_task(ctx: Context) -> Tuple[int, int]:
+    tg_id, r, _ = ctx.employee()
+    return await task_repo.create_personal_task_with_deadline("bench", 10, _now(hours=6), tg_id, r), r
+
+# --- подготовка аргументов ---
+
+async def _restaurant(ctx):
+    return (ctx.restaurant(),)
+
+async def _user(ctx):
+    tg_id, r, _ = ctx.employee()
+    return tg_id, r
+
+async def _tg_id(ctx):
+    return (ctx.employee()[0],)
+
+async def _checklist(ctx):
+    tg_id, r, role = ctx.employee()
+    return r, role, ctx.rng.choice(("full", "morning", "evening"))
+
+async def _checklist_warm(ctx):
+    args = await _checklist(ctx)
+    await check_repo.get_checklist(*args)
+    return args
+
+async def _checklist_cold(ctx):
+    args = await _checklist(ctx)
+    cache.invalidate_checklists(args[0])
+    return args
+
+async def _tenant_warm(ctx):
+    r = ctx.restaurant()
+    await tenant_repo.get_tenant_meta(r)
+    return (r,)
+
+async def _restaurant_cold(ctx):
+    r = ctx.restaurant()
+    cache.invalidate_tenant(r)
+    return (r,)
+
+async def _new_checklist_item(ctx):
+    return ctx.restaurant(), "barista", "common", ctx.uniq("Пункт ")
+
+async def _existing_checklist_item(ctx):
+    r = ctx.restaurant()
+    return r, "barista", "common", "Бариста: common #1"
+
+async def _deletable_checklist_item(ctx):
+    r = ctx.restaurant()
+    await check_repo.add_checklist_item(r, "barista", "common", ctx.uniq("Удалить "))
+    return await _last_id("checklist_items"), r
+
+async def _new_checklist_items(ctx):
+    # Типичная первичная настройка кофейни: 50 пунктов одним импортом
+    prefix = ctx.uniq("Импорт ")
+    return ctx.restaurant(), "barista", "common", [(f"{prefix} #{i}", "simple") for i in range(50)]
+
+async def _deletable_checklist_items(ctx):
+    r = ctx.restaurant()
+    prefix = ctx.uniq("Удалить ")
+    await check_repo.add_checklist_items(r, "barista", "common", [(f"{prefix} #{i}", "simple") for i in range(10)])
+    last = await _last_id("checklist_items")
+    return list(range(last - 9, last + 1)), r
+
+async def _items_by_type(ctx):
+    return ctx.restaurant(), "barista", ctx.rng.choice(("morning", "common", "evening"))
+
+async def _new_reminder(ctx):
+    return ctx.restaurant(), "barista", "bench", 3
+
+async def _deletable_reminder(ctx):
+    r = ctx.restaurant()
+    await check_repo.add_reminder(r, "barista", "bench", 3)
+    return await _last_id("reminders"), r
+
+async def _invite_role(ctx):
+    return ctx.restaurant(), "barista"
+
+async def _invite_code(ctx):
+    return (await check_repo.create_invite(ctx.restaurant(), "barista"),)
+
+async def _new_role(ctx):
+    return ctx.restaurant(), ctx.uniq("role"), "Бенч"
+
+async def _role(ctx):
+    return ctx.restaurant(), "barista"
+
+async def _rename_role(ctx):
+    return ctx.restaurant(), "cook", ctx.uniq("Повар ")
+
+async def _deletable_role(ctx):
+    r, slug = ctx.restaurant(), ctx.uniq("tmp")
+    await role_repo.add_role(r, slug, "Временная")
+    return r, slug
+
+async def _license_key(ctx):
+    return (ctx.rng.choice(list(ctx.data.owners.values())),)
+
+async def _existing_key(ctx):
+    return (await saas_repo.create_license_key(1),)
+
+async def _registration(ctx):
+    key = await saas_repo.create_license_key(1)
+    n = ctx.next_id()
+    return f"Новая кофейня {n}", 30_000_000 + n, None, "Владелец", user_repo.hash_pin(PIN), key
+
+async def _spare(ctx):
+    return (ctx.spare_restaurant(),)
+
+async def _none(ctx):
+    return ()
+
+async def _pin(ctx):
+    return (PIN,)
+
+async def _idle_start(ctx):
+    tg_id, r, role = ctx.idle_employee()
+    return tg_id, r, role, "full"
+
+async def _open_user(ctx):
+    tg_id, r, _ = ctx.open_shift()
+    return tg_id, r
+
+async def _end_shift(ctx):
+    tg_id, r, role, shift_id = await ctx.fresh_shift()
+    items = await check_repo.get_checklist(r, role, "full")
+    return shift_id, r, "{}", [i["id"] for i in items]
+
+async def _set_duty(ctx):
+    tg_id, r, role = ctx.open_shift()
+    active = await shift_repo.get_active_shift(tg_id, r)
+    items = await check_repo.get_checklist(r, role, "full")
+    return active["id"], ctx.rng.choice(items)["id"], ctx.rng.random() < 0.7
+
+async def _duties(ctx):
+    tg_id, r, _ = ctx.open_shift()
+    return ((await shift_repo.get_active_shift(tg_id, r))["id"],)
+
+async def _dirty_duties(ctx):
+    # Пачка отметок, как за один период сброса в часы пик
+    for _ in range(20):
+        duty_buffer.set_duty(*await _set_duty(ctx), _now())
+    return ()
+
+async def _duties_warm(ctx):
+    args = await _duties(ctx)
+    await shift_repo.get_duties_map(*args)
+    return args
+
+async def _duties_cold(ctx):
+    shift_id, = await _duties(ctx)
+    duty_buffer.forget(shift_id)
+    return (shift_id,)
+
+async def _journal_deep(ctx):
+    r = ctx.restaurant()
+    page = await shift_repo.get_shifts_page(r, None, 10)
+    for _ in range(ctx.rng.randint(1, 3)):
+        if not page["older"]:
+            break
+        page = await shift_repo.get_shifts_page(r, page["older"], 10)
+    return r, page["older"] or page["newer"], 10
+
+async def _user_history(ctx):
+    tg_id, r, _ = ctx.employee()
+    return tg_id, r, None, 5
+
+async def _spare_user(ctx):
+    r = ctx.spare_restaurant()
+    return ctx.data.employees[r][-1][0], r
+
+async def _new_task(ctx):
+    tg_id, r, _ = ctx.employee()
+    return "bench", 10, _now(hours=6), tg_id, r
+
+async def _task_message(ctx):
+    task_id, _ = await _pending_task(ctx)
+    return task_id, 12345
+
+async def _task(ctx):
+    return await _pending_task(ctx)
+
+async def _task_now(ctx):
+    return (*await _pending_task(ctx), _now())
+
+async def _bonus(ctx):
+    tg_id, r, _ = ctx.employee()
+    return tg_id, r, 10
+
+async def _new_user(ctx):
+    n = ctx.next_id()
+    return 40_000_000 + n, ctx.restaurant(), f"Новичок {n}", "barista", PIN
+
+async def _session(ctx):
+    tg_id, r, role = ctx.employee()
+    return tg_id, r, role
+
+async def _session_warm(ctx):
+    tg_id = ctx.employee()[0]
+    await user_repo.get_session_state(tg_id)
+    return (tg_id,)
+
+async def _session_cold(ctx):
+    tg_id = ctx.employee()[0]
+    cache.invalidate_session(tg_id)
+    return (tg_id,)
+
+async def _deletable_session(ctx):
+    tg_id, r, role = ctx.employee()
+    await user_repo.create_session(tg_id, r, role)
+    return (tg_id,)
+
+async def _toggle_duty(ctx):
+    tg_id, r, role = ctx.open_shift()
+    items = await check_repo.get_checklist(r, role, "full")
+    return tg_id, r, ctx.rng.randrange(len(items)), ctx.rng.random() < 0.7, items
+
+async def _close_shift(ctx):
+    tg_id, r, role, _ = await ctx.fresh_shift()
+    items = await check_repo.get_checklist(r, role, "full")
+    return tg_id, r, "{}", "Сотрудник", items, None
+
+CASES: List[Case] = [
+    # checklists
+    Case("repo.checklists.get_checklist", check_repo.get_checklist, _checklist_warm),
+    Case("repo.checklists.get_checklist[cold]", check_repo.get_checklist, _checklist_cold),
+    Case("repo.checklists.add_checklist_item", check_repo.add_checklist_item, _new_checklist_item),
+    Case("repo.checklists.is_checklist_item_exists", check_repo.is_checklist_item_exists, _existing_checklist_item),
+    Case("repo.checklists.add_checklist_items[50]", check_repo.add_checklist_items, _new_checklist_items),
+    Case("repo.checklists.delete_checklist_item", check_repo.delete_checklist_item, _deletable_checklist_item),
+    Case("repo.checklists.delete_checklist_items[10]", check_repo.delete_checklist_items, _deletable_checklist_items),
+    Case("repo.checklists.get_items_by_type", check_repo.get_items_by_type, _items_by_type),
+    Case("repo.checklists.add_reminder", check_repo.add_reminder, _new_reminder),
+    Case("repo.checklists.delete_reminder", check_repo.delete_reminder, _deletable_reminder),
+    Case("repo.checklists.get_all_reminders", check_repo.get_all_reminders, _restaurant),
+    Case("repo.checklists.get_reminders_all_restaurants", check_repo.get_reminders_all_restaurants, _none),
+    Case("repo.checklists.create_invite", check_repo.create_invite, _invite_role),
+    Case("repo.checklists.check_invite", check_repo.check_invite, _invite_code),
+    Case("repo.checklists.mark_invite_used", check_repo.mark_invite_used, _invite_code),
+    # kpi
+    Case("repo.kpi.get_kpi_totals", kpi_repo.get_kpi_totals, _user),
+    Case("repo.kpi.rebuild_rollup", kpi_repo.rebuild_rollup, _restaurant),
+    # roles
+    Case("repo.roles.get_all_roles", role_repo.get_all_roles, _restaurant),
+    Case("repo.roles.get_role", role_repo.get_role, _role),
+    Case("repo.roles.add_role", role_repo.add_role, _new_role),
+    Case("repo.roles.update_role_name", role_repo.update_role_name, _rename_role),
+    Case("repo.roles.delete_role", role_repo.delete_role, _deletable_role),
+    Case("repo.roles.get_roles_map", role_repo.get_roles_map, _tenant_warm),
+    # saas
+    Case("repo.saas.create_license_key", saas_repo.create_license_key, _license_key),
+    Case("repo.saas.get_license_key", saas_repo.get_license_key, _existing_key),
+    Case("repo.saas.register_new_restaurant", saas_repo.register_new_restaurant, _registration),
+    Case("repo.saas.delete_restaurant", saas_repo.delete_restaurant, _spare),
+    Case("repo.saas.get_restaurant_info", saas_repo.get_restaurant_info, _restaurant),
+    Case("repo.saas.get_restaurant_users", saas_repo.get_restaurant_users, _restaurant),
+    Case("repo.saas.get_platform_stats", saas_repo.get_platform_stats, _none),
+    Case("repo.saas.get_all_restaurants", saas_repo.get_all_restaurants, _none),
+    Case("repo.saas.toggle_restaurant_status", saas_repo.toggle_restaurant_status, _restaurant),
+    Case("repo.saas.is_restaurant_active", saas_repo.is_restaurant_active, _restaurant),
+    Case("repo.saas.get_all_owners_ids", saas_repo.get_all_owners_ids, _none),
+    Case("repo.saas.count_tenants", saas_repo.count_tenants, _none),
+    # shifts
+    Case("repo.shifts.start_shift", shift_repo.start_shift, _idle_start),
+    Case("repo.shifts.get_active_shift", shift_repo.get_active_shift, _open_user),
+    Case("repo.shifts.end_shift", shift_repo.end_shift, _end_shift),
+    Case("repo.shifts.set_duty", shift_repo.set_duty, _set_duty),
+    Case("repo.shifts.get_duties_map", shift_repo.get_duties_map, _duties_warm),
+    Case("repo.shifts.get_duties_map[cold]", shift_repo.get_duties_map, _duties_cold),
+    Case("duty_buffer.flush", duty_buffer.flush, _dirty_duties),
+    Case("repo.shifts.get_last_shifts", shift_repo.get_last_shifts, _user),
+    Case("repo.shifts.get_all_open_shifts", shift_repo.get_all_open_shifts, _none),
+    Case("repo.shifts.get_all_active_shifts_data", shift_repo.get_all_active_shifts_data, _restaurant),
+    Case("repo.shifts.get_shifts_page", shift_repo.get_shifts_page, _restaurant),
+    Case("repo.shifts.get_shifts_page[deep]", shift_repo.get_shifts_page, _journal_deep),
+    Case("repo.shifts.count_total_shifts", shift_repo.count_total_shifts, _restaurant),
+    Case("repo.shifts.get_user_shifts_page", shift_repo.get_user_shifts_page, _user_history),
+    Case("repo.shifts.count_user_shifts", shift_repo.count_user_shifts, _user),
+    Case("repo.shifts.clear_user_shifts", shift_repo.clear_user_shifts, _spare_user),
+    Case("repo.shifts.clear_all_restaurant_shifts", shift_repo.clear_all_restaurant_shifts, _spare),
+    # tasks
+    Case("repo.tasks.create_personal_task_with_deadline", task_repo.create_personal_task_with_deadline, _new_task),
+    Case("repo.tasks.set_task_message_id", task_repo.set_task_message_id, _task_message),
+    Case("repo.tasks.complete_task", task_repo.complete_task, _task_now),
+    Case("repo.tasks.get_task_details", task_repo.get_task_details, _task),
+    Case("repo.tasks.get_tasks_history", task_repo.get_tasks_history, _restaurant),
+    Case("repo.tasks.add_bonus", task_repo.add_bonus, _bonus),
+    Case("repo.tasks.get_balance", task_repo.get_balance, _user),
+    Case("repo.tasks.get_pending_tasks_details", task_repo.get_pending_tasks_details, _restaurant),
+    Case("repo.tasks.cancel_task_in_db", task_repo.cancel_task_in_db, _task),
+    Case("repo.tasks.get_pending_deadlines", task_repo.get_pending_deadlines, _none),
+    Case("repo.tasks.reset_balance", task_repo.reset_balance, _user),
+    # tenants
+    Case("repo.tenants.get_tenant_meta", tenant_repo.get_tenant_meta, _tenant_warm),
+    Case("repo.tenants.get_tenant_meta[cold]", tenant_repo.get_tenant_meta, _restaurant_cold),
+    # users
+    Case("repo.users.hash_pin", user_repo.hash_pin, _pin),
+    Case("repo.users.add_user", user_repo.add_user, _new_user),
+    Case("repo.users.get_user", user_repo.get_user, _user),
+    Case("repo.users.get_user_restaurants", user_repo.get_user_restaurants, _tg_id),
+    Case("repo.users.get_all_users", user_repo.get_all_users, _restaurant),
+    Case("repo.users.delete_user", user_repo.delete_user, _spare_user),
+    Case("repo.users.get_admins_ids", user_repo.get_admins_ids, _tenant_warm),
+    Case("repo.users.create_session", user_repo.create_session, _session),
+    Case("repo.users.get_session_state", user_repo.get_session_state, _session_warm),
+    Case("repo.users.get_session_state[cold]", user_repo.get_session_state, _session_cold),
+    Case("repo.users.get_session_info", user_repo.get_session_info, _tg_id),
+    Case("repo.users.get_session_routes", user_repo.get_session_routes, _none),
+    Case("repo.users.delete_session", user_repo.delete_session, _deletable_session),
+    Case("repo.users.reset_user_kpi_date", user_repo.reset_user_kpi_date, _user),
+    Case("repo.users.fully_delete_user", user_repo.fully_delete_user, _spare_user),
+    Case("repo.users.get_session_role", user_repo.get_session_role, _tg_id),
+    # сервисы
+    Case("service.shift.toggle_duty", shift_service.toggle_duty, _toggle_duty),
+    Case("service.shift.close_shift_logic", shift_service.close_shift_logic, _close_shift),
+    Case("service.kpi.calculate_kpi", kpi_service.calculate_kpi, _user),
+    Case("service.tasks.try_complete_task", task_service.try_complete_task, _task),
+]
+
+def spare_needed(iterations: int, warmup: int) -> int:
+    """Сколько кофеен зарезервировать под разрушающие замеры."""
+    destructive = sum(1 for c in CASES if c.args in (_spare, _spare_user))
+    return destructive * (iterations + warmup)
+
+def select(pattern: Optional[str]) -> List[Case]:
+    return [c for c in CASES if not pattern or pattern in c.name]
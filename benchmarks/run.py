@@ -0,0 +1,163 @@
+"""Запуск бенчмарков: синтетическая база, замеры, JSON с результатами и сравнение с базовым прогоном.
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --restaurants 3000 --iterations 200 --filter repo.shifts
+    python -m benchmarks.run --baseline bench.json --threshold 0.25   # код возврата 1 при регрессии
+
+Регрессия — медиана случая выросла больше чем на threshold (доля) и больше чем на
+--min-delta-ms относительно базового файла. Сравнивать имеет смысл прогоны на одной машине
+с одинаковыми параметрами базы.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+def _configure(workdir: str):
+    # Конфиг читается при импорте app.*, поэтому путь к базе задаем до первого импорта
+    os.environ["DB_PATH"] = os.path.join(workdir, "bench.db")
+
+def _percentile(ordered: List[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def _summary(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(_percentile(ordered, 95), 4),
+        "min_ms": round(ordered[0], 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+async def _measure(case, ctx, iterations: int, warmup: int) -> List[float]:
+    from benchmarks.cases import Exhausted
+    samples = []
+    for i in range(warmup + iterations):
+        try:
+            args = await case.args(ctx)
+        except Exhausted:
+            break
+        started = time.perf_counter()
+        result = case.fn(*args)
+        if inspect.isawaitable(result):
+            await result
+        elapsed = (time.perf_counter() - started) * 1000
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+async def _run(args) -> Dict[str, Any]:
+    from app.database.core import init_db
+    from app.database.connection import init_pool, close_pool
+    from app.database import duty_buffer
+    from app.database.repo import kpi as kpi_repo
+    from benchmarks import cases
+    from benchmarks.seed import SeedConfig, seed
+
+    cfg = SeedConfig(args.restaurants, args.employees, args.shifts, args.items, args.tasks, args.seed)
+    spare = cases.spare_needed(args.iterations, args.warmup)
+    if spare >= cfg.restaurants:
+        raise SystemExit(f"Нужно больше кофеен: {spare} уйдет на разрушающие замеры")
+
+    started = time.perf_counter()
+    await init_db()
+    data = await seed(os.environ["DB_PATH"], cfg)
+    await init_pool()
+    await kpi_repo.rebuild_rollup()
+    print(f"База: {cfg.restaurants} кофеен, {cfg.restaurants * cfg.employees} сотрудников, "
+          f"{cfg.restaurants * cfg.employees * cfg.shifts} смен — {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+    ctx = cases.Context(data, spare, args.seed)
+    results = {}
+    try:
+        for case in cases.select(args.filter):
+            samples = await _measure(case, ctx, args.iterations, args.warmup)
+            if not samples:
+                print(f"{case.name}: нет данных для замера, пропущен", file=sys.stderr)
+                continue
+            results[case.name] = _summary(samples)
+            r = results[case.name]
+            print(f"{case.name:<55}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}  мс", file=sys.stderr)
+    finally:
+        await duty_buffer.close()
+        await close_pool()
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "dataset": vars(cfg),
+        },
+        "results": results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[str]:
+    """Печатает сравнение медиан и возвращает имена случаев с регрессией."""
+    if baseline.get("meta", {}).get("dataset") != current["meta"]["dataset"]:
+        print("⚠️ Параметры базы отличаются от базового прогона — сравнение приблизительное", file=sys.stderr)
+    regressions = []
+    print(f"\n{'случай':<55}{'было':>10}{'стало':>10}{'изм.':>9}")
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:<55}{'—':>10}{now['p50_ms']:>10.3f}{'новый':>9}")
+            continue
+        old, new = before["p50_ms"], now["p50_ms"]
+        change = (new - old) / old if old else 0.0
+        bad = change > threshold and new - old > min_delta_ms
+        if bad:
+            regressions.append(name)
+        print(f"{name:<55}{old:>10.3f}{new:>10.3f}{change:>+8.0%}{' ❌' if bad else ''}")
+    return regressions
+
+async def _main(args) -> int:
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(workdir)
+        current = await _run(args)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"Результаты: {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nРегрессии ({len(regressions)}): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+        print("\nРегрессий нет", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарки repo-функций и сервисов")
+    parser.add_argument("--restaurants", type=int, default=1000)
+    parser.add_argument("--employees", type=int, default=6, help="сотрудников на кофейню")
+    parser.add_argument("--shifts", type=int, default=10, help="закрытых смен на сотрудника")
+    parser.add_argument("--items", type=int, default=4, help="пунктов чек-листа на роль и тип смены")
+    parser.add_argument("--tasks", type=int, default=10, help="доп. заданий на кофейню")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--filter", default=None, help="только случаи, в имени которых есть подстрока")
+    parser.add_argument("--out", default=None, help="куда записать JSON с результатами")
+    parser.add_argument("--baseline", default=None, help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимый рост медианы (доля)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="рост меньше этого не считается регрессией")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,121 @@
+"""Наполнение синтетической базы для бенчмарков.
+
+Схема создается штатным init_db, данные пишутся пачками напрямую в SQLite —
+через repo-функции тысячи кофеен заливались бы минутами.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+import aiosqlite
+from app.core.config import TZ
+from app.database.repo.users import hash_pin
+
+ROLES = (("barista", "Бариста"), ("cook", "Повар"))
+SHIFT_TYPES = {
+    "full": ("morning", "common", "evening"),
+    "morning": ("morning", "common"),
+    "evening": ("common", "evening"),
+}
+PIN = "1234"
+
+@dataclass
+class SeedConfig:
+    restaurants: int = 1000
+    employees: int = 6           # сотрудников на кофейню (без владельца)
+    shifts: int = 10             # закрытых смен на сотрудника
+    items: int = 4               # пунктов чек-листа на роль и тип смены (morning/common/evening)
+    tasks: int = 10              # доп. заданий на кофейню
+    seed: int = 42
+
+@dataclass
+class Dataset:
+    """Что лежит в базе — бенчмарки выбирают аргументы отсюда."""
+    restaurants: List[int] = field(default_factory=list)
+    owners: Dict[int, int] = field(default_factory=dict)                  # restaurant_id -> owner tg_id
+    employees: Dict[int, List[Tuple[int, str]]] = field(default_factory=dict)  # restaurant_id -> [(tg_id, role)]
+    open_shifts: List[Tuple[int, int, str]] = field(default_factory=list)  # (tg_id, restaurant_id, role)
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+async def seed(db_path: str, cfg: SeedConfig) -> Dataset:
+    rng = random.Random(cfg.seed)
+    data = Dataset()
+    now = datetime.now(TZ).replace(tzinfo=None, microsecond=0)
+    pin_hash = hash_pin(PIN)
+
+    restaurants, roles, users, sessions, items, reminders, tasks = [], [], [], [], [], [], []
+    for r in range(1, cfg.restaurants + 1):
+        owner = 10_000_000 + r
+        data.restaurants.append(r)
+        data.owners[r] = owner
+        restaurants.append((r, f"Cafe {r}", owner))
+        roles.append(("admin", r, "Владелец"))
+        users.append((owner, r, f"Owner {r}", "admin", pin_hash))
+        sessions.append((owner, r, "admin"))
+        for slug, name in ROLES:
+            roles.append((slug, r, name))
+            for shift_type in ("morning", "common", "evening"):
+                for i in range(cfg.items):
+                    item_type = "photo" if i == cfg.items - 1 and shift_type == "common" else "simple"
+                    items.append((r, slug, shift_type, f"{name}: {shift_type} #{i + 1}", item_type))
+        reminders.append((r, "barista", "Проверьте витрину", 2))
+
+        staff = []
+        for e in range(cfg.employees):
+            tg_id = 20_000_000 + r * 1000 + e
+            role = ROLES[e % len(ROLES)][0]
+            staff.append((tg_id, role))
+            users.append((tg_id, r, f"Сотрудник {r}-{e}", role, pin_hash))
+            sessions.append((tg_id, r, role))
+        data.employees[r] = staff
+
+        for t in range(cfg.tasks):
+            tg_id, _ = rng.choice(staff) if staff else (owner, "admin")
+            status = rng.choice(("completed", "completed", "expired", "canceled", "pending"))
+            deadline = now + timedelta(hours=rng.randint(1, 48)) if status == "pending" else now - timedelta(days=rng.randint(1, 30))
+            tasks.append((r, f"Задание {t + 1}", rng.randint(10, 100), status, _ts(deadline), tg_id))
+
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("PRAGMA synchronous=OFF")
+        await db.execute("BEGIN")
+        await db.executemany("INSERT INTO restaurants (id, title, owner_tg_id, is_active) VALUES (?, ?, ?, 1)", restaurants)
+        await db.executemany("INSERT INTO roles (slug, restaurant_id, name) VALUES (?, ?, ?)", roles)
+        await db.executemany("INSERT INTO users (tg_id, restaurant_id, full_name, role, pin_hash, is_active) VALUES (?, ?, ?, ?, ?, 1)", users)
+        await db.executemany("INSERT INTO sessions (user_id, active_restaurant_id, role) VALUES (?, ?, ?)", sessions)
+        await db.executemany("INSERT INTO checklist_items (restaurant_id, role, shift_type, text, item_type) VALUES (?, ?, ?, ?, ?)", items)
+        await db.executemany("INSERT INTO reminders (restaurant_id, role, text, interval_hours) VALUES (?, ?, ?, ?)", reminders)
+        await db.executemany("INSERT INTO extra_tasks (restaurant_id, text, reward, status, deadline, assigned_to) VALUES (?, ?, ?, ?, ?, ?)", tasks)
+
+        item_ids: Dict[Tuple[int, str, str], List[int]] = {}
+        async with db.execute("SELECT id, restaurant_id, role, shift_type FROM checklist_items ORDER BY id") as cur:
+            for item_id, r, role, shift_type in await cur.fetchall():
+                item_ids.setdefault((r, role, shift_type), []).append(item_id)
+
+        shift_id = 0
+        shifts, duties = [], []
+        for r, staff in data.employees.items():
+            for n, (tg_id, role) in enumerate(staff):
+                for s in range(cfg.shifts):
+                    shift_id += 1
+                    shift_type = rng.choice(tuple(SHIFT_TYPES))
+                    started = now - timedelta(days=rng.randint(1, 60), hours=rng.randint(0, 6))
+                    ended = started + timedelta(hours=rng.randint(4, 12))
+                    shifts.append((shift_id, r, tg_id, role, shift_type, _ts(started), _ts(ended), "{}"))
+                    for t in SHIFT_TYPES[shift_type]:
+                        for item_id in item_ids.get((r, role, t), []):
+                            duties.append((shift_id, item_id, 1 if rng.random() < 0.85 else 0))
+                # У первого сотрудника каждой кофейни смена идет прямо сейчас
+                if n == 0:
+                    shift_id += 1
+                    shifts.append((shift_id, r, tg_id, role, "full", _ts(now - timedelta(hours=2)), None, "{}"))
+                    data.open_shifts.append((tg_id, r, role))
+
+        await db.executemany("""
+            INSERT INTO shifts (id, restaurant_id, user_id, role, shift_type, started_at, ended_at, report)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, shifts)
+        await db.executemany("INSERT INTO shift_duties (shift_id, item_id, done) VALUES (?, ?, ?)", duties)
+        await db.commit()
+    return data
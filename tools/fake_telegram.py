@@ -0,0 +1,209 @@
+"""Локальный заменитель Telegram Bot API для проверки бота без сети.
+
+Бот запускается с TELEGRAM_API_URL=http://127.0.0.1:<port>. Стенд отвечает на вызовы
+методов, записывает исходящие сообщения и доставляет апдейты тем способом, который выбрал
+бот: через getUpdates (polling) или POST на адрес из setWebhook с секретным заголовком.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+from aiohttp import ClientSession, web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+
+class FakeTelegram:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081):
+        self.host = host
+        self.port = port
+        self.calls: List[Dict[str, Any]] = []
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.connected = asyncio.Event()
+
+        self._updates: asyncio.Queue = asyncio.Queue()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._client: Optional[ClientSession] = None
+
+    # --- сервер ---
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._client = ClientSession()
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @property
+    def mode(self) -> str:
+        return "webhook" if self.webhook_url else "polling"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = {k: v for k, v in (await request.post()).items() if isinstance(v, str)}
+
+        handler = getattr(self, f"_m_{method}", None)
+        result = await handler(params) if handler else self._default(method, params)
+        return web.json_response({"ok": True, "result": result})
+
+    def _default(self, method: str, params: Dict[str, Any]) -> Any:
+        self._record(method, params)
+        # send*/edit* возвращают сообщение, остальные методы — True
+        if method.startswith("send") or method.startswith("edit") or method == "copyMessage":
+            return self._message(params)
+        return True
+
+    def _message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id = int(params.get("chat_id") or 0)
+        message = {
+            "message_id": int(params.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        return message
+
+    def _record(self, method: str, params: Dict[str, Any]):
+        call = {"method": method, "params": params, "at": time.perf_counter()}
+        self.calls.append(call)
+        chat_id = params.get("chat_id")
+        if chat_id is None:
+            return
+        for future in self._waiters.pop(int(chat_id), []):
+            if not future.done():
+                future.set_result(call)
+
+    async def _m_getMe(self, params):
+        return BOT_USER
+
+    async def _m_deleteWebhook(self, params):
+        self.webhook_url = None
+        self.webhook_secret = None
+        return True
+
+    async def _m_setWebhook(self, params):
+        self.webhook_url = params["url"]
+        self.webhook_secret = params.get("secret_token")
+        self.connected.set()
+        return True
+
+    async def _m_getUpdates(self, params):
+        self.connected.set()
+        timeout = min(float(params.get("timeout") or 0), 5)
+        try:
+            first = await asyncio.wait_for(self._updates.get(), timeout) if timeout else self._updates.get_nowait()
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            return []
+        batch = [first]
+        while not self._updates.empty():
+            batch.append(self._updates.get_nowait())
+        return batch
+
+    # --- апдейты ---
+
+    def message_update(self, user_id: int, text: Optional[str], **extra) -> Dict[str, Any]:
+        user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            **extra,
+        }
+        if text is not None:
+            message["text"] = text
+        if text and text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": message}
+
+    def video_note_update(self, user_id: int) -> Dict[str, Any]:
+        file_id = f"vn{next(self._message_ids)}"
+        return self.message_update(user_id, None, video_note={
+            "file_id": file_id, "file_unique_id": file_id, "length": 240, "duration": 3
+        })
+
+    def callback_update(self, user_id: int, data: str, message_id: int = 1) -> Dict[str, Any]:
+        user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+        return {
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._update_ids)),
+                "from": user,
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": BOT_USER,
+                    "text": "...",
+                },
+            },
+        }
+
+    async def push(self, update: Dict[str, Any]):
+        """Доставляет апдейт боту в текущем режиме."""
+        if self.webhook_url:
+            headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+            async with self._client.post(self.webhook_url, json=update, headers=headers) as resp:
+                if resp.status != 200:
+                    raise RuntimeError(f"webhook ответил {resp.status}")
+        else:
+            self._updates.put_nowait(update)
+
+    def wait_reply(self, chat_id: int) -> asyncio.Future:
+        """Future, который получит следующий вызов бота с этим chat_id."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(chat_id, []).append(future)
+        return future
+
+    async def request(self, update: Dict[str, Any], chat_id: int, timeout: float = 10) -> Dict[str, Any]:
+        """Отправляет апдейт и ждет ответа бота. Возвращает вызов с полем latency (секунды)."""
+        reply = self.wait_reply(chat_id)
+        started = time.perf_counter()
+        await self.push(update)
+        call = await asyncio.wait_for(reply, timeout)
+        return {**call, "latency": call["at"] - started}
+
+async def _main(args):
+    fake = FakeTelegram(args.host, args.port)
+    await fake.start()
+    print(f"Fake Bot API: http://{args.host}:{args.port} — жду подключения бота...")
+    try:
+        await asyncio.wait_for(fake.connected.wait(), args.connect_timeout)
+        print(f"Бот подключился, режим: {fake.mode}")
+        for _ in range(args.repeat):
+            call = await fake.request(fake.message_update(args.user, args.text), args.user, args.timeout)
+            text = call["params"].get("text", "")
+            print(f"{call['method']} за {call['latency'] * 1000:.1f} мс: {text[:80]!r}")
+    finally:
+        await fake.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальный Bot API для проверки бота")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--user", type=int, default=1000)
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--connect-timeout", type=float, default=60)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,203 @@
+"""Нагрузочный прогон бота на локальном Bot API (tools/fake_telegram.py).
+
+Поднимает стенд, временную БД и настоящий Dispatcher из app.main, заводит N кофеен
+по M сотрудников и гоняет каждого по сценарию: вход по PIN, открытие смены, чек-лист,
+закрытие смены. В конце печатает задержки (p50/p95/p99), время БД и пропускную способность.
+
+    python -m tools.loadtest --tenants 5 --employees 10
+    python -m tools.loadtest --tenants 20 --employees 5 --shifts 3 --mode webhook
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+from tools.fake_telegram import FakeTelegram
+
+PIN = "1234"
+ROLE = "barista"
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+class Stats:
+    def __init__(self):
+        self.steps: Dict[str, List[float]] = defaultdict(list)  # шаг сценария -> задержка до ответа, мс
+        self.handler_ms: List[float] = []                        # время обработки апдейта в боте, мс
+        self.db_ms: List[float] = []                             # из него — работа с БД, мс
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def middleware(self, handler, event, data):
+        from app.database.connection import track_db_usage
+        db = track_db_usage()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.handler_ms.append((time.perf_counter() - started) * 1000)
+            self.db_ms.append(db.ms)
+
+def _configure(args, workdir: str):
+    # Конфиг читается при импорте app.*, поэтому окружение задаем до первого импорта
+    os.environ["DB_PATH"] = os.path.join(workdir, "loadtest.db")
+    os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{args.api_port}"
+    os.environ.setdefault("BOT_TOKEN", "1:loadtest")
+    os.environ["BOT_MODE"] = args.mode
+    if args.mode == "webhook":
+        os.environ["WEBHOOK_BASE_URL"] = f"http://127.0.0.1:{args.webhook_port}"
+        os.environ["WEBAPP_HOST"] = "127.0.0.1"
+        os.environ["WEBAPP_PORT"] = str(args.webhook_port)
+        os.environ.setdefault("WEBHOOK_SECRET", "loadtest")
+
+async def _seed(args) -> List[List[int]]:
+    """Кофейни с владельцем, ролью, чек-листом и сотрудниками. Возвращает tg_id сотрудников по кофейням."""
+    from app.database.repo import saas as saas_repo, roles as role_repo, users as user_repo, checklists as check_repo
+    tenants = []
+    for t in range(args.tenants):
+        owner_id = 10_000 + t
+        key = await saas_repo.create_license_key(owner_id)
+        await saas_repo.register_new_restaurant(f"Load Cafe {t}", owner_id, None, f"Owner {t}", user_repo.hash_pin(PIN), key)
+        restaurant_id = (await user_repo.get_user_restaurants(owner_id))[0]['id']
+        await role_repo.add_role(restaurant_id, ROLE, "Бариста")
+        for i in range(args.items):
+            await check_repo.add_checklist_item(restaurant_id, ROLE, "common", f"Пункт {i + 1}")
+        staff = []
+        for e in range(args.employees):
+            tg_id = 1_000_000 + t * 1000 + e
+            await user_repo.add_user(tg_id, restaurant_id, f"Сотрудник {t}-{e}", ROLE, PIN)
+            staff.append(tg_id)
+        tenants.append(staff)
+    return tenants
+
+def _markup(call: Dict[str, Any]) -> Dict[str, Any]:
+    markup = call["params"].get("reply_markup") or {}
+    return json.loads(markup) if isinstance(markup, str) else markup
+
+async def _employee(fake: FakeTelegram, stats: Stats, tg_id: int, args):
+    async def step(name: str, update: Dict[str, Any]) -> Dict[str, Any]:
+        call = await fake.request(update, tg_id, args.timeout)
+        stats.steps[name].append(call["latency"] * 1000)
+        if args.think:
+            await asyncio.sleep(args.think)
+        return call
+
+    await step("login", fake.message_update(tg_id, "🔐 Войти"))
+    await step("pin", fake.message_update(tg_id, PIN))
+    for _ in range(args.shifts):
+        await step("start_shift", fake.message_update(tg_id, "🟢 Начать смену"))
+        await step("shift_type", fake.message_update(tg_id, "📅 Полный день"))
+        await step("start_video", fake.video_note_update(tg_id))
+        checklist = await step("checklist", fake.message_update(tg_id, "⚡️ Онлайн Чек-лист"))
+        buttons = [b["callback_data"] for row in _markup(checklist).get("inline_keyboard", []) for b in row
+                   if b.get("callback_data", "").startswith("check_on:")]
+        for data in buttons:
+            await step("check", fake.callback_update(tg_id, data))
+        await step("end_shift", fake.message_update(tg_id, "🔴 Закончить смену"))
+        await step("end_comment", fake.message_update(tg_id, "➡️ Пропустить"))
+        await step("end_video", fake.video_note_update(tg_id))
+
+async def _guarded(fake, stats, tg_id, args, limit: asyncio.Semaphore):
+    async with limit:
+        try:
+            await _employee(fake, stats, tg_id, args)
+        except asyncio.TimeoutError:
+            stats.errors["timeout"] += 1
+        except Exception as e:
+            stats.errors[type(e).__name__] += 1
+
+async def _run(args):
+    from app import main as app_main
+    from app.core import metrics
+    from app.database.core import init_db
+    from app.database.connection import init_pool, close_pool, get_pool_stats
+    from app.database import duty_buffer
+    from app.services import outbound
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    # Очередь уведомлений админам при остановке не дожидаемся — недоставленные не считаем ошибкой
+    logging.getLogger("app.services.notify").setLevel(logging.ERROR)
+
+    fake = FakeTelegram(port=args.api_port)
+    await fake.start()
+    await init_db()
+    await init_pool()
+    tenants = await _seed(args)
+
+    stats = Stats()
+    bot = app_main.create_bot()
+    dp = app_main.create_dispatcher()
+    dp.update.outer_middleware(stats.middleware)
+    outbound.start()
+
+    runner = app_main.run_webhook if args.mode == "webhook" else app_main.run_polling
+    serving = asyncio.create_task(runner(bot, dp))
+    try:
+        await asyncio.wait_for(fake.connected.wait(), 10)
+        busy_before = get_pool_stats()["busy_total_ms"]
+        limit = asyncio.Semaphore(args.concurrency or len(tenants) * args.employees)
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            _guarded(fake, stats, tg_id, args, limit) for staff in tenants for tg_id in staff
+        ])
+        elapsed = time.perf_counter() - started
+        busy_ms = get_pool_stats()["busy_total_ms"] - busy_before
+    finally:
+        serving.cancel()
+        try: await serving
+        except (asyncio.CancelledError, Exception): pass
+        await outbound.stop(timeout=1)
+        await dp.storage.close()
+        await duty_buffer.close()
+        await close_pool()
+        await bot.session.close()
+        await fake.stop()
+
+    _report(args, stats, elapsed, busy_ms, get_pool_stats(), len(fake.calls))
+    print(metrics.summary())
+
+def _report(args, stats: Stats, elapsed: float, busy_ms: float, pool: Dict[str, Any], api_calls: int):
+    total = sum(len(v) for v in stats.steps.values())
+    print(f"\nРежим: {args.mode} | кофеен: {args.tenants} | сотрудников: {args.tenants * args.employees} "
+          f"| смен на сотрудника: {args.shifts} | пунктов чек-листа: {args.items}")
+    print(f"Апдейтов: {total} за {elapsed:.2f} с — {total / elapsed if elapsed else 0:.1f} апд/с, вызовов Bot API: {api_calls}")
+    if stats.errors:
+        print(f"Ошибки: {dict(stats.errors)}")
+
+    print(f"\n{'шаг':<14}{'n':>7}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    all_steps = []
+    for name, values in stats.steps.items():
+        all_steps += values
+        print(f"{name:<14}{len(values):>7}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}")
+    print(f"{'до ответа':<14}{len(all_steps):>7}{percentile(all_steps, 50):>10.1f}{percentile(all_steps, 95):>10.1f}{percentile(all_steps, 99):>10.1f}")
+    for name, values in (("хендлер", stats.handler_ms), ("из них БД", stats.db_ms)):
+        print(f"{name:<14}{len(values):>7}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}")
+
+    print(f"\nБД: занято соединений {busy_ms / 1000:.2f} с ({busy_ms / total if total else 0:.2f} мс на апдейт), "
+          f"пул: ожиданий {pool['waited']}, в среднем {pool['wait_avg_ms']} мс, максимум {pool['wait_max_ms']} мс")
+
+async def _main(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(args, workdir)
+        await _run(args)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон бота на локальном Bot API")
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--employees", type=int, default=5)
+    parser.add_argument("--items", type=int, default=5, help="пунктов в чек-листе")
+    parser.add_argument("--shifts", type=int, default=1, help="смен на сотрудника")
+    parser.add_argument("--concurrency", type=int, default=0, help="одновременно активных сотрудников (0 — все)")
+    parser.add_argument("--think", type=float, default=0, help="пауза между действиями сотрудника, с")
+    parser.add_argument("--timeout", type=float, default=30, help="ожидание ответа бота, с")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--webhook-port", type=int, default=8082)
+    parser.add_argument("--verbose", action="store_true", help="логи бота уровня INFO")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,24 @@
+"""Пересчет таблицы kpi_rollup по закрытым сменам.
+
+    python -m tools.rebuild_kpi                 # все заведения
+    python -m tools.rebuild_kpi --restaurant 5  # одно заведение
+"""
+import argparse
+import asyncio
+from app.database.core import init_db
+from app.database.connection import close_pool
+from app.database.repo import kpi as kpi_repo
+
+async def _main(args):
+    await init_db()
+    try:
+        rows = await kpi_repo.rebuild_rollup(args.restaurant)
+        scope = f"заведение {args.restaurant}" if args.restaurant else "все заведения"
+        print(f"kpi_rollup пересчитан ({scope}): строк {rows}")
+    finally:
+        await close_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчет KPI-итогов по сменам")
+    parser.add_argument("--restaurant", type=int, default=None)
+    asyncio.run(_main(parser.parse_args()))
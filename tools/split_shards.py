@@ -0,0 +1,58 @@
+"""Разделение рабочей базы на шарды для запуска воркеров (SHARDS > 1).
+
+    python -m tools.split_shards --shards 4                  # app/saas.db -> SHARD_DIR/shard0..3.db
+    python -m tools.split_shards --shards 4 --source old.db --out /var/lib/coffee-bot/shards
+
+Каждый шард — копия базы, в которой оставлены только кофейни с id % shards == номер шарда
+(и все их данные). Неиспользованные лицензии остаются в шарде 0, незавершенные диалоги (FSM)
+сбрасываются. Маршруты пользователей воркеры допишут в routes.db при старте.
+Запускать при остановленном боте; существующие файлы шардов не перезаписываются.
+"""
+import argparse
+import sqlite3
+from pathlib import Path
+from app.core.config import BASE_DIR, SHARD_DIR
+
+# Таблицы с данными кофейни; shift_duties чистится по своим сменам
+_TENANT_TABLES = ("shifts", "extra_tasks", "kpi_rollup", "checklist_items", "reminders", "invites", "users", "roles")
+
+def split(source: Path, out: Path, shards: int, shard: int) -> int:
+    target = out / f"shard{shard}.db"
+    if target.exists():
+        raise SystemExit(f"{target} уже существует")
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        dst.execute("PRAGMA foreign_keys = OFF")
+        foreign = "restaurant_id % :n != :k"
+        args = {"n": shards, "k": shard}
+        dst.execute(f"DELETE FROM shift_duties WHERE shift_id IN (SELECT id FROM shifts WHERE {foreign})", args)
+        for table in _TENANT_TABLES:
+            dst.execute(f"DELETE FROM {table} WHERE {foreign}", args)
+        dst.execute("DELETE FROM sessions WHERE active_restaurant_id IS NULL OR active_restaurant_id % :n != :k", args)
+        dst.execute("DELETE FROM restaurants WHERE id % :n != :k", args)
+        if shard != 0:
+            dst.execute("DELETE FROM license_keys WHERE is_used = 0")
+        dst.execute("DELETE FROM fsm_states")
+        dst.commit()
+        restaurants = dst.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0]
+        dst.execute("VACUUM")
+    finally:
+        src.close()
+        dst.close()
+    return restaurants
+
+def main(args):
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for shard in range(args.shards):
+        restaurants = split(Path(args.source), out, args.shards, shard)
+        print(f"{out / f'shard{shard}.db'}: кофеен {restaurants}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Разделение базы на шарды по кофейням")
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--source", default=str(BASE_DIR / "saas.db"))
+    parser.add_argument("--out", default=str(SHARD_DIR))
+    main(parser.parse_args())